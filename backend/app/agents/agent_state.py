@@ -78,9 +78,18 @@ async def load_all_agent_states() -> Dict[str, Dict[str, str]]:
     if client is None:
         return {}
     try:
+        keys = [key async for key in client.scan_iter(match=f"{KEY_PREFIX}*")]
+        if not keys:
+            return {}
+
+        # 一次 round-trip 取回所有 agent 狀態
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        rows = await pipe.execute()
+
         result: Dict[str, Dict[str, str]] = {}
-        async for key in client.scan_iter(match=f"{KEY_PREFIX}*"):
-            data = await client.hgetall(key)
+        for data in rows:
             if data and "agent_id" in data:
                 result[data["agent_id"]] = data
         return result
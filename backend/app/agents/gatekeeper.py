@@ -184,7 +184,7 @@ class GatekeeperAgent:
         # 2. 如果是商機，進行 MEDDIC 分析
         meddic_analysis = None
         if intent == Intent.OPPORTUNITY:
-            meddic = await self.meddic_engine.analyze(content, [e.__dict__ for e in entities])
+            meddic = await self.meddic_engine.analyze(content, entities)
             meddic_analysis = meddic.to_dict()
 
         # 3. 判斷是否需要確認
@@ -147,7 +147,7 @@ class HunterAgent:
                 title=contact_data.get("title"),
                 role=self._determine_contact_role(contact_data),
             )
-            opp.contacts.append(contact)
+            opp.add_contact(contact)
 
             # 更新 MEDDIC
             if contact.role == ContactRole.CHAMPION:
@@ -471,14 +471,10 @@ class HunterAgent:
 
     def _analyze_stage_readiness(self, opp: Opportunity) -> Dict[str, Any]:
         """分析是否可推進到下一階段"""
-        from app.pipeline.models import STAGE_ORDER
-
-        current_idx = STAGE_ORDER.index(opp.stage) if opp.stage in STAGE_ORDER else -1
-
-        if current_idx < 0 or current_idx >= len(STAGE_ORDER) - 1:
+        next_stage = opp.next_stage()
+        if next_stage is None:
             return {"can_advance": False, "reason": "已在最終階段"}
 
-        next_stage = STAGE_ORDER[current_idx + 1]
         can_advance, blockers = opp.can_advance_to(next_stage)
 
         return {
@@ -874,16 +874,18 @@ auto_approve_eligible = true 當：
         from app.task.repository import get_task_repo
 
         repo = get_task_repo()
-        await repo.update_lifecycle_status(task_id, to_status)
-        await repo.record_event(
-            task_id=task_id,
-            event_type=f"TRANSITION_{trigger.upper()}",
-            actor="agent:ORCHESTRATOR",
-            from_status=from_status,
-            to_status=to_status,
-            payload=payload,
-            trace_id=trace_id,
-        )
+        # 狀態與事件同一交易寫入
+        async with repo.bulk_scope():
+            await repo.update_lifecycle_status(task_id, to_status)
+            await repo.record_event(
+                task_id=task_id,
+                event_type=f"TRANSITION_{trigger.upper()}",
+                actor="agent:ORCHESTRATOR",
+                from_status=from_status,
+                to_status=to_status,
+                payload=payload,
+                trace_id=trace_id,
+            )
 
     async def _create_draft_review_todo(
         self,
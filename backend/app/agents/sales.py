@@ -32,7 +32,6 @@ from app.sales.pipeline_state_machine import (
     advance_deal,
     close_lost,
     close_won,
-    detect_stagnant_deals,
     validate_new_deal,
 )
 
@@ -246,10 +245,8 @@ class SalesAgent:
 
     async def _handle_daily_briefing(self) -> Dict[str, Any]:
         repo = get_sales_repo()
-        deals = await repo.list_deals()
-
         # Stagnation alerts
-        stagnant = detect_stagnant_deals(deals)
+        stagnant = await repo.find_stagnant_deals()
 
         # Pipeline summary
         summary = await repo.get_pipeline_summary()
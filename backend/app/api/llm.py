@@ -0,0 +1,68 @@
+"""
+LLM API
+
+- 以 Server-Sent Events 串流 LLM 回應（首 token 即可送出）
+- Provider circuit breaker 狀態、回應快取命中統計
+"""
+
+from typing import List, Optional
+
+import orjson
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.llm import LLMProviderFactory, Message
+from app.llm.cache import get_cache_stats
+from app.llm.resilience import get_circuit_stats
+
+router = APIRouter()
+
+
+class ChatMessage(BaseModel):
+    role: str  # "system" | "user" | "assistant"
+    content: str
+
+
+class ChatStreamRequest(BaseModel):
+    messages: List[ChatMessage]
+    provider: Optional[str] = None  # 未指定時使用 LLM_PROVIDER
+    temperature: float = 0.7
+    max_tokens: Optional[int] = None
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatStreamRequest):
+    """串流對話（text/event-stream）"""
+    try:
+        if request.provider:
+            provider = LLMProviderFactory.create(request.provider)
+        else:
+            provider = LLMProviderFactory.get_current_provider()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    messages = [Message(role=m.role, content=m.content) for m in request.messages]
+
+    async def event_source():
+        async for delta in provider.stream(
+            messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+        ):
+            yield b"data: " + orjson.dumps({"delta": delta}) + b"\n\n"
+        yield b"data: [DONE]\n\n"
+
+    return StreamingResponse(event_source(), media_type="text/event-stream")
+
+
+@router.get("/circuits")
+async def circuit_stats():
+    """各 Provider 的 circuit breaker 狀態與成功/失敗計數"""
+    return get_circuit_stats()
+
+
+@router.get("/cache")
+async def cache_stats():
+    """LLM 回應快取的命中 / 未命中次數與命中率"""
+    return get_cache_stats()
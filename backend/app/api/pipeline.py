@@ -7,7 +7,7 @@ Sales Pipeline API Endpoints
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 
 from app.pipeline.models import (
@@ -20,7 +20,7 @@ from app.pipeline.models import (
     ActivityType,
     MEDDICScore,
 )
-from app.pipeline.repository import PipelineRepository
+from app.pipeline.repository import PipelineRepository, dumps
 
 router = APIRouter()
 
@@ -28,6 +28,11 @@ router = APIRouter()
 _repo = PipelineRepository()
 
 
+def _json(content: Any) -> Response:
+    """以 orjson 直接輸出（略過 response_model 驗證與 jsonable_encoder）"""
+    return Response(content=dumps(content), media_type="application/json")
+
+
 # === Request Models ===
 
 class ContactCreate(BaseModel):
@@ -95,6 +100,11 @@ class MEDDICUpdate(BaseModel):
     eb_access_level: Optional[str] = None
 
 
+class BulkAdvanceRequest(BaseModel):
+    """批次推進階段"""
+    opportunity_ids: List[str]
+
+
 class LostRequest(BaseModel):
     """標記失敗"""
     reason: Optional[str] = None
@@ -161,7 +171,7 @@ async def create_opportunity(request: OpportunityCreate):
             meddic.eb_access_level = "identified"
 
     await _repo.create_opportunity(opp)
-    return opp.to_dict()
+    return _json(opp.to_dict())
 
 
 @router.get("/opportunities", response_model=List[Dict[str, Any]])
@@ -178,7 +188,8 @@ async def list_opportunities(
         owner=owner,
         limit=limit,
     )
-    return [o.to_summary() for o in opps]
+    now = datetime.utcnow()
+    return _json([o.summary(now) for o in opps])
 
 
 @router.get("/opportunities/{opp_id}", response_model=Dict[str, Any])
@@ -187,7 +198,7 @@ async def get_opportunity(opp_id: str):
     opp = await _repo.get_opportunity(opp_id)
     if not opp:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return opp.to_dict()
+    return _json(opp.to_dict())
 
 
 @router.put("/opportunities/{opp_id}", response_model=Dict[str, Any])
@@ -211,7 +222,7 @@ async def update_opportunity(opp_id: str, request: OpportunityUpdate):
         opp.owner = request.owner
 
     await _repo.update_opportunity(opp)
-    return opp.to_dict()
+    return _json(opp.to_dict())
 
 
 @router.delete("/opportunities/{opp_id}")
@@ -233,12 +244,10 @@ async def advance_stage(opp_id: str):
         raise HTTPException(status_code=404, detail="Opportunity not found")
 
     # 檢查是否可以推進
-    from app.pipeline.models import STAGE_ORDER
-    current_idx = STAGE_ORDER.index(opp.stage) if opp.stage in STAGE_ORDER else -1
-    if current_idx < 0 or current_idx >= len(STAGE_ORDER) - 1:
+    next_stage = opp.next_stage()
+    if next_stage is None:
         raise HTTPException(status_code=400, detail="Cannot advance from current stage")
 
-    next_stage = STAGE_ORDER[current_idx + 1]
     can_advance, blockers = opp.can_advance_to(next_stage)
 
     if not can_advance:
@@ -251,7 +260,15 @@ async def advance_stage(opp_id: str):
         )
 
     result = await _repo.advance_stage(opp_id)
-    return result.to_dict()
+    return _json(result.to_dict())
+
+
+@router.post("/opportunities/bulk-advance", response_model=List[Dict[str, Any]])
+async def bulk_advance_stages(request: BulkAdvanceRequest):
+    """批次推進到下一階段（不符條件者略過）"""
+    opps = await _repo.bulk_advance_stages(request.opportunity_ids)
+    now = datetime.utcnow()
+    return _json([o.summary(now) for o in opps])
 
 
 @router.post("/opportunities/{opp_id}/stage/{stage}", response_model=Dict[str, Any])
@@ -265,7 +282,7 @@ async def set_stage(opp_id: str, stage: str):
     result = await _repo.set_stage(opp_id, target_stage)
     if not result:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return result.to_dict()
+    return _json(result.to_dict())
 
 
 @router.post("/opportunities/{opp_id}/win", response_model=Dict[str, Any])
@@ -274,7 +291,7 @@ async def mark_won(opp_id: str):
     result = await _repo.mark_won(opp_id)
     if not result:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return result.to_dict()
+    return _json(result.to_dict())
 
 
 @router.post("/opportunities/{opp_id}/lose", response_model=Dict[str, Any])
@@ -283,7 +300,7 @@ async def mark_lost(opp_id: str, request: LostRequest):
     result = await _repo.mark_lost(opp_id, request.reason)
     if not result:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return result.to_dict()
+    return _json(result.to_dict())
 
 
 @router.post("/opportunities/{opp_id}/dormant", response_model=Dict[str, Any])
@@ -292,7 +309,7 @@ async def mark_dormant(opp_id: str, request: DormantRequest):
     result = await _repo.mark_dormant(opp_id, request.reason)
     if not result:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return result.to_dict()
+    return _json(result.to_dict())
 
 
 @router.post("/opportunities/{opp_id}/reactivate", response_model=Dict[str, Any])
@@ -301,7 +318,7 @@ async def reactivate_opportunity(opp_id: str):
     result = await _repo.reactivate(opp_id)
     if not result:
         raise HTTPException(status_code=400, detail="Cannot reactivate: opportunity not found or not dormant")
-    return result.to_dict()
+    return _json(result.to_dict())
 
 
 # === Closed Deals Endpoints ===
@@ -320,28 +337,32 @@ async def list_closed_deals(
             raise HTTPException(status_code=400, detail=f"Invalid status: {status}")
 
     opps = await _repo.list_closed_opportunities(status=status_enum, limit=limit)
-    return [o.to_summary() for o in opps]
+    now = datetime.utcnow()
+    return _json([o.summary(now) for o in opps])
 
 
 @router.get("/closed/won", response_model=List[Dict[str, Any]])
 async def list_won_deals(limit: int = 100):
     """列出成交商機"""
     opps = await _repo.list_closed_opportunities(status=OpportunityStatus.WON, limit=limit)
-    return [o.to_summary() for o in opps]
+    now = datetime.utcnow()
+    return _json([o.summary(now) for o in opps])
 
 
 @router.get("/closed/lost", response_model=List[Dict[str, Any]])
 async def list_lost_deals(limit: int = 100):
     """列出失敗商機"""
     opps = await _repo.list_closed_opportunities(status=OpportunityStatus.LOST, limit=limit)
-    return [o.to_summary() for o in opps]
+    now = datetime.utcnow()
+    return _json([o.summary(now) for o in opps])
 
 
 @router.get("/closed/dormant", response_model=List[Dict[str, Any]])
 async def list_dormant_deals(limit: int = 100):
     """列出休眠商機"""
     opps = await _repo.list_closed_opportunities(status=OpportunityStatus.DORMANT, limit=limit)
-    return [o.to_summary() for o in opps]
+    now = datetime.utcnow()
+    return _json([o.summary(now) for o in opps])
 
 
 # === Contact Endpoints ===
@@ -362,7 +383,7 @@ async def add_contact(opp_id: str, request: ContactCreate):
     result = await _repo.add_contact(opp_id, contact)
     if not result:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return result.to_dict()
+    return _json(result.to_dict())
 
 
 @router.get("/opportunities/{opp_id}/contacts", response_model=List[Dict[str, Any]])
@@ -371,7 +392,7 @@ async def list_contacts(opp_id: str):
     opp = await _repo.get_opportunity(opp_id)
     if not opp:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return [c.to_dict() for c in opp.contacts]
+    return _json([c.to_dict() for c in opp.contacts])
 
 
 # === Activity Endpoints ===
@@ -403,14 +424,14 @@ async def add_activity(opp_id: str, request: ActivityCreate):
     if request.meddic_updates:
         await _repo.update_meddic(opp_id, request.meddic_updates)
 
-    return activity.to_dict()
+    return _json(activity.to_dict())
 
 
 @router.get("/opportunities/{opp_id}/activities", response_model=List[Dict[str, Any]])
 async def list_activities(opp_id: str, limit: int = 20):
     """列出活動"""
     activities = await _repo.get_activities(opp_id, limit)
-    return [a.to_dict() for a in activities]
+    return _json([a.to_dict() for a in activities])
 
 
 # === MEDDIC Endpoints ===
@@ -421,7 +442,7 @@ async def get_meddic(opp_id: str):
     opp = await _repo.get_opportunity(opp_id)
     if not opp:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return opp.meddic.to_dict()
+    return _json(opp.meddic.to_dict())
 
 
 @router.put("/opportunities/{opp_id}/meddic", response_model=Dict[str, Any])
@@ -431,7 +452,7 @@ async def update_meddic(opp_id: str, request: MEDDICUpdate):
     result = await _repo.update_meddic(opp_id, updates)
     if not result:
         raise HTTPException(status_code=404, detail="Opportunity not found")
-    return result.to_dict()
+    return _json(result.to_dict())
 
 
 # === Dashboard Endpoints ===
@@ -439,10 +460,10 @@ async def update_meddic(opp_id: str, request: MEDDICUpdate):
 @router.get("/dashboard", response_model=Dict[str, Any])
 async def get_dashboard():
     """取得 Pipeline 儀表板"""
-    return _repo.get_pipeline_summary()
+    return _json(_repo.get_pipeline_summary())
 
 
 @router.get("/statistics", response_model=Dict[str, Any])
 async def get_statistics():
     """取得統計資訊"""
-    return _repo.get_statistics()
+    return _json(_repo.get_statistics())
@@ -5,7 +5,9 @@ Product API Router
 """
 
 from typing import Any, Dict, List, Optional
-from fastapi import APIRouter, HTTPException
+
+import orjson
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel
 
 from app.product.models import (
@@ -13,6 +15,7 @@ from app.product.models import (
     ProductStage,
     ProductPriority,
     ProductType,
+    dump_products,
 )
 from app.product.repository import get_product_repo
 
@@ -20,6 +23,15 @@ from app.product.repository import get_product_repo
 router = APIRouter()
 
 
+def _json(content: Any) -> Response:
+    """以 orjson 直接輸出（略過 response_model 驗證與 jsonable_encoder）"""
+    return Response(content=orjson.dumps(content), media_type="application/json")
+
+
+def _item_json(product: ProductItem) -> Response:
+    return Response(content=product.to_json(), media_type="application/json")
+
+
 # === Request Models ===
 
 class ProductCreate(BaseModel):
@@ -93,7 +105,7 @@ async def create_product(request: ProductCreate):
         tags=request.tags or [],
     )
     await get_product_repo().create(product)
-    return product.to_dict()
+    return _item_json(product)
 
 
 @router.get("", response_model=List[Dict[str, Any]])
@@ -114,25 +126,25 @@ async def list_products(
         version=version,
         limit=limit,
     )
-    return [p.to_dict() for p in products]
+    return Response(content=dump_products(products), media_type="application/json")
 
 
 @router.get("/dashboard", response_model=Dict[str, Any])
 async def get_dashboard():
     """取得儀表板摘要"""
-    return await get_product_repo().get_dashboard()
+    return _json(await get_product_repo().get_dashboard())
 
 
 @router.get("/roadmap", response_model=Dict[str, List[Dict[str, Any]]])
 async def get_roadmap():
     """取得版本 Roadmap"""
-    return await get_product_repo().get_roadmap()
+    return _json(await get_product_repo().get_roadmap())
 
 
 @router.get("/statistics", response_model=Dict[str, Any])
 async def get_statistics():
     """取得統計資訊"""
-    return await get_product_repo().get_statistics()
+    return _json(await get_product_repo().get_statistics())
 
 
 @router.get("/{product_id}", response_model=Dict[str, Any])
@@ -141,7 +153,7 @@ async def get_product(product_id: str):
     product = await get_product_repo().get(product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product.to_dict()
+    return _item_json(product)
 
 
 @router.put("/{product_id}", response_model=Dict[str, Any])
@@ -177,7 +189,7 @@ async def update_product(product_id: str, request: ProductUpdate):
         product.tags = request.tags
 
     await get_product_repo().update(product)
-    return product.to_dict()
+    return _item_json(product)
 
 
 @router.delete("/{product_id}")
@@ -197,24 +209,21 @@ async def advance_stage(product_id: str):
         raise HTTPException(status_code=404, detail="Product not found")
 
     # Check if can advance
-    from app.product.models import STAGE_ORDER
-    try:
-        current_idx = STAGE_ORDER.index(product.stage)
-        if current_idx < len(STAGE_ORDER) - 1:
-            next_stage = STAGE_ORDER[current_idx + 1]
-            can_advance, blockers = product.can_advance_to(next_stage)
-            if not can_advance:
-                raise HTTPException(
-                    status_code=400,
-                    detail={"message": "Cannot advance", "blockers": blockers}
-                )
-    except ValueError:
+    if product.stage == ProductStage.BLOCKED:
         raise HTTPException(status_code=400, detail="Cannot advance from blocked state")
+    next_stage = product.next_stage()
+    if next_stage:
+        can_advance, blockers = product.can_advance_to(next_stage)
+        if not can_advance:
+            raise HTTPException(
+                status_code=400,
+                detail={"message": "Cannot advance", "blockers": blockers}
+            )
 
     result = await get_product_repo().advance_stage(product_id)
     if not result:
         raise HTTPException(status_code=400, detail="Failed to advance stage")
-    return result.to_dict()
+    return _item_json(result)
 
 
 @router.post("/{product_id}/stage/{stage}", response_model=Dict[str, Any])
@@ -228,7 +237,7 @@ async def set_stage(product_id: str, stage: str):
     result = await get_product_repo().set_stage(product_id, target_stage)
     if not result:
         raise HTTPException(status_code=400, detail="Cannot set to this stage")
-    return result.to_dict()
+    return _item_json(result)
 
 
 @router.post("/{product_id}/assign", response_model=Dict[str, Any])
@@ -237,7 +246,7 @@ async def assign_product(product_id: str, request: AssignRequest):
     result = await get_product_repo().assign(product_id, request.assignee)
     if not result:
         raise HTTPException(status_code=404, detail="Product not found")
-    return result.to_dict()
+    return _item_json(result)
 
 
 @router.post("/{product_id}/qa", response_model=Dict[str, Any])
@@ -251,7 +260,7 @@ async def add_qa_result(product_id: str, request: QAResultRequest):
     )
     if not result:
         raise HTTPException(status_code=404, detail="Product not found")
-    return result.to_dict()
+    return _item_json(result)
 
 
 @router.post("/{product_id}/uat", response_model=Dict[str, Any])
@@ -264,7 +273,7 @@ async def add_uat_feedback(product_id: str, request: UATFeedbackRequest):
     )
     if not result:
         raise HTTPException(status_code=404, detail="Product not found")
-    return result.to_dict()
+    return _item_json(result)
 
 
 @router.post("/{product_id}/block", response_model=Dict[str, Any])
@@ -277,7 +286,7 @@ async def block_product(product_id: str, request: BlockRequest):
     )
     if not result:
         raise HTTPException(status_code=404, detail="Product not found")
-    return result.to_dict()
+    return _item_json(result)
 
 
 @router.post("/{product_id}/unblock", response_model=Dict[str, Any])
@@ -291,4 +300,4 @@ async def unblock_product(product_id: str, request: UnblockRequest):
     result = await get_product_repo().unblock(product_id, return_stage)
     if not result:
         raise HTTPException(status_code=400, detail="Product not found or not blocked")
-    return result.to_dict()
+    return _item_json(result)
@@ -16,6 +16,8 @@ from app.sales.models import (
     Deal,
     DealStage,
     SalesActivity,
+    is_closed,
+    next_stage,
 )
 from app.sales.pipeline_state_machine import (
     advance_deal,
@@ -131,23 +133,15 @@ async def advance_deal_stage(deal_id: str, request: AdvanceStageRequest):
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid stage: {request.target_stage}")
         # Terminal stages have dedicated endpoints
-        if target in (DealStage.CLOSED_WON, DealStage.CLOSED_LOST):
+        if is_closed(target):
             raise HTTPException(status_code=400, detail=f"Use /close-won or /close-lost endpoint for terminal stages")
     else:
         # Auto-advance: next in sequence (excludes terminal stages)
-        stage_order = [
-            DealStage.PROSPECTING,
-            DealStage.VALIDATION,
-            DealStage.PROPOSAL,
-            DealStage.NEGOTIATION,
-        ]
-        try:
-            idx = stage_order.index(deal.stage)
-            if idx + 1 >= len(stage_order):
-                raise HTTPException(status_code=400, detail="Already at final active stage. Use /close-won or /close-lost")
-            target = stage_order[idx + 1]
-        except ValueError:
+        if is_closed(deal.stage):
             raise HTTPException(status_code=400, detail=f"Cannot advance from {deal.stage.value}")
+        target = next_stage(deal.stage)
+        if target is None:
+            raise HTTPException(status_code=400, detail="Already at final active stage. Use /close-won or /close-lost")
 
     ok, reason = advance_deal(deal, target)
     if not ok:
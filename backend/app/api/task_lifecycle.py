@@ -9,9 +9,11 @@ Issue #14
 """
 
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+import orjson
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -117,8 +119,16 @@ async def get_task_events(task_id: str):
     if not task:
         raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
 
-    events = await repo.get_task_events(task_id)
-    return {"task_id": task_id, "events": events, "count": len(events)}
+    async def body() -> AsyncIterator[bytes]:
+        # 邊讀邊輸出 {"task_id", "events": [...], "count"}，不整批載入
+        yield b'{"task_id":' + orjson.dumps(task_id) + b',"events":['
+        count = 0
+        async for event in repo.stream_task_events(task_id):
+            yield (b"," if count else b"") + orjson.dumps(event)
+            count += 1
+        yield b'],"count":' + str(count).encode() + b"}"
+
+    return StreamingResponse(body(), media_type="application/json")
 
 
 @router.post("/{task_id}/transition")
@@ -5,9 +5,13 @@ Database Configuration and Session Management
 """
 
 import os
-from typing import AsyncGenerator
+from asyncio import current_task
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession, async_scoped_session, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker
 
 from app.db.models import Base
@@ -26,14 +30,26 @@ elif DATABASE_URL.startswith("postgresql://"):
 
 _is_sqlite = DATABASE_URL.startswith("sqlite")
 
+
+def _json_dumps(obj: Any) -> str:
+    """JSON 欄位序列化（orjson；driver 需要 str）"""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 # Build engine kwargs based on backend
 _engine_kwargs: dict = {
     "echo": os.getenv("DEBUG", "false").lower() == "true",
+    # 編譯後 SQL 快取（repository 以 bindparam 重用相同形狀的查詢）
+    "query_cache_size": 1200,
+    # JSON 欄位（qa_results / uat_feedback / payload…）改走 orjson
+    "json_serializer": _json_dumps,
+    "json_deserializer": orjson.loads,
 }
 if not _is_sqlite:
-    # PostgreSQL connection pool settings
+    # PostgreSQL connection pool settings（agents 與 API 併發存取）
     _engine_kwargs.update({
-        "pool_size": 5,
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "20")),
         "max_overflow": 10,
         "pool_pre_ping": True,
     })
@@ -48,11 +64,152 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+# 以 asyncio task 為範圍的 session：同一個 request 內多次 repository 呼叫
+# 共用一個 session；由 ScopedSessionMiddleware 在 request 結束時 remove()
+AsyncScopedSession = async_scoped_session(AsyncSessionLocal, scopefunc=current_task)
+
+# 目前 request 所在的 task（middleware 設定）
+_request_task: ContextVar[Optional[Any]] = ContextVar("db_request_task", default=None)
+
+
+def in_request_task() -> bool:
+    """
+    是否在 request 本身的 task 中
+
+    request 內另外建立的 task（asyncio.gather / create_task）會繼承
+    ContextVar 但 task 不同，回傳 False，改用獨立 session，
+    避免 scoped registry 留下無人 remove() 的 session。
+    """
+    task = _request_task.get()
+    return task is not None and task is current_task()
+
+
+class ScopedSessionMiddleware:
+    """ASGI middleware：request 期間啟用 task-scoped session，結束時釋放"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_task.set(current_task())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_task.reset(token)
+            await AsyncScopedSession.remove()
+
+
+def _add_product_qa_counters(sync_conn) -> None:
+    """
+    既有資料庫補上 product_items.qa_total / qa_passed
+
+    create_all 不會替已存在的表加欄位；缺欄位時新增並由 qa_results 回填。
+    """
+    from sqlalchemy import inspect, text
+
+    columns = {c["name"] for c in inspect(sync_conn).get_columns("product_items")}
+    if "qa_total" in columns:
+        return
+    for name in ("qa_total", "qa_passed"):
+        sync_conn.execute(text(
+            f"ALTER TABLE product_items ADD COLUMN {name} INTEGER NOT NULL DEFAULT 0"
+        ))
+    rows = sync_conn.execute(text(
+        "SELECT id, qa_results FROM product_items WHERE qa_results IS NOT NULL"
+    )).all()
+    for product_id, results in rows:
+        if isinstance(results, (str, bytes)):
+            results = orjson.loads(results)
+        if not results:
+            continue
+        sync_conn.execute(
+            text("UPDATE product_items SET qa_total = :total, qa_passed = :passed WHERE id = :id"),
+            {
+                "id": product_id,
+                "total": len(results),
+                "passed": sum(1 for r in results if r.get("passed")),
+            },
+        )
+
+
+def _convert_task_status_codes(sync_conn) -> None:
+    """
+    既有資料庫的 tasks.lifecycle_status 由字串轉為 SMALLINT 代碼
+
+    PostgreSQL 直接 ALTER COLUMN TYPE；SQLite 無法改欄位型別，就地改寫
+    為代碼（TaskStatusCode 讀取時會 int() 還原）。已轉換則不做事。
+    """
+    from sqlalchemy import Integer, inspect, text
+
+    from app.task.models import STATUS_CODES
+
+    columns = {c["name"]: c for c in inspect(sync_conn).get_columns("tasks")}
+    column = columns.get("lifecycle_status")
+    if column is None or isinstance(column["type"], Integer):
+        return
+
+    # 先找出代碼表沒有的狀態字串，直接中止啟動，不讓它們被轉成 NULL
+    # （SQLite 已轉換過的列存的是數字字串，也算已知值）
+    known = [*STATUS_CODES, *(str(code) for code in STATUS_CODES.values())]
+    in_list = ", ".join(f"'{value}'" for value in known)
+    unknown = sync_conn.execute(text(
+        "SELECT DISTINCT lifecycle_status FROM tasks "
+        f"WHERE lifecycle_status IS NOT NULL AND lifecycle_status NOT IN ({in_list})"
+    )).scalars().all()
+    if unknown:
+        raise RuntimeError(
+            f"tasks.lifecycle_status has values without a status code: {sorted(unknown)}"
+        )
+
+    case = "CASE lifecycle_status {} END".format(
+        " ".join(f"WHEN '{name}' THEN {code}" for name, code in STATUS_CODES.items())
+    )
+    if sync_conn.dialect.name == "postgresql":
+        sync_conn.execute(text(
+            f"ALTER TABLE tasks ALTER COLUMN lifecycle_status TYPE SMALLINT USING {case}"
+        ))
+    else:
+        names = ", ".join(f"'{name}'" for name in STATUS_CODES)
+        sync_conn.execute(text(
+            f"UPDATE tasks SET lifecycle_status = {case} WHERE lifecycle_status IN ({names})"
+        ))
+
+
+def _task_event_payload_to_jsonb(sync_conn) -> None:
+    """既有 PostgreSQL 資料庫的 task_events.payload 由 JSON 轉為 JSONB（其他資料庫不變）"""
+    from sqlalchemy import inspect, text
+    from sqlalchemy.dialects.postgresql import JSONB
+
+    if sync_conn.dialect.name != "postgresql":
+        return
+    columns = {c["name"]: c for c in inspect(sync_conn).get_columns("task_events")}
+    column = columns.get("payload")
+    if column is None or isinstance(column["type"], JSONB):
+        return
+    sync_conn.execute(text(
+        "ALTER TABLE task_events ALTER COLUMN payload TYPE JSONB USING payload::jsonb"
+    ))
+
+
+def _create_missing_indexes(sync_conn) -> None:
+    """既有資料表補建後來新增的 index（create_all 只在建表時建立 index）"""
+    # 建 index 不需依 FK 排序（sorted_tables 會對 agents↔tasks 的循環發出警告）
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
 
 async def create_tables():
     """Create all database tables"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_product_qa_counters)
+        await conn.run_sync(_convert_task_status_codes)
+        await conn.run_sync(_task_event_payload_to_jsonb)
+        await conn.run_sync(_create_missing_indexes)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -5,8 +5,23 @@ SQLAlchemy Database Models
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import JSON, DateTime, Enum, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    JSON,
+    DateTime,
+    Enum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.types import TypeDecorator
+
+from app.task.models import STATUS_CODES, STATUS_NAMES
 
 
 class Base(DeclarativeBase):
@@ -14,6 +29,32 @@ class Base(DeclarativeBase):
     pass
 
 
+# PostgreSQL 用 JSONB（二進位儲存、可建 GIN index），其他資料庫維持 JSON
+JSONVariant = JSON().with_variant(JSONB(), "postgresql")
+
+
+class TaskStatusCode(TypeDecorator):
+    """
+    Task 狀態：Python 端為字串，DB 端存 SMALLINT 代碼
+
+    列寬 2 bytes，索引較小、比較為整數比較；查詢條件同樣自動轉換。
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return STATUS_CODES[value]
+        except KeyError:
+            raise ValueError(f"Unknown task status: {value!r}") from None
+
+    def process_result_value(self, value, dialect):
+        # int()：SQLite 舊表（VARCHAR 親和性）回傳的是數字字串
+        return None if value is None else STATUS_NAMES[int(value)]
+
+
 class Agent(Base):
     """Agent 狀態表"""
     __tablename__ = "agents"
@@ -42,6 +83,10 @@ class Agent(Base):
 class Task(Base):
     """任務表（含 Pipeline 階段）"""
     __tablename__ = "tasks"
+    __table_args__ = (
+        # list_tasks：WHERE pipeline, lifecycle_status ORDER BY created_at DESC（反向掃描）
+        Index("ix_task_pipeline_status_created", "pipeline", "lifecycle_status", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(50), primary_key=True)
     title: Mapped[str] = mapped_column(String(200))
@@ -77,7 +122,9 @@ class Task(Base):
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     # Task Lifecycle（Issue #14）
-    lifecycle_status: Mapped[Optional[str]] = mapped_column(String(30), nullable=True, index=True)
+    lifecycle_status: Mapped[Optional[str]] = mapped_column(
+        TaskStatusCode, nullable=True, index=True
+    )
     retry_count: Mapped[int] = mapped_column(Integer, default=0)
     trace_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
     source: Mapped[Optional[str]] = mapped_column(String(30), nullable=True)
@@ -263,14 +310,18 @@ class Feature(Base):
 class ProductItemDB(Base):
     """產品項目（Product Board Pipeline）"""
     __tablename__ = "product_items"
+    __table_args__ = (
+        # list(stage=...) 依 created_at 排序：(stage, created_at) 同時涵蓋過濾與排序
+        Index("ix_product_stage_created", "stage", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(50), primary_key=True)
     title: Mapped[str] = mapped_column(String(500))
     description: Mapped[str] = mapped_column(Text, default="")
 
     # 分類
-    type: Mapped[str] = mapped_column(String(30), default="feature")
-    priority: Mapped[str] = mapped_column(String(20), default="medium")
+    type: Mapped[str] = mapped_column(String(30), default="feature", index=True)
+    priority: Mapped[str] = mapped_column(String(20), default="medium", index=True)
 
     # Pipeline 階段
     stage: Mapped[str] = mapped_column(String(30), default="backlog")
@@ -278,22 +329,25 @@ class ProductItemDB(Base):
 
     # 版本
     version: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
-    target_release: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    target_release: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, index=True)
 
     # 規格
     spec_doc: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     acceptance_criteria: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
 
     # 指派
-    assignee: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    assignee: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, index=True)
     owner: Mapped[str] = mapped_column(String(50), default="ORCHESTRATOR")
 
     # QA / UAT (JSON arrays)
     qa_results: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
     uat_feedback: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    # QA 計數（與 qa_results 同步寫入；統計直接 SUM，不解析 JSON）
+    qa_total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    qa_passed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     # 時間
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
@@ -380,9 +434,13 @@ class ActivityLog(Base):
 class ExecutionPlan(Base):
     """執行計畫（Task Lifecycle Issue #14）"""
     __tablename__ = "execution_plans"
+    __table_args__ = (
+        # 最新版本：WHERE task_id ORDER BY version DESC LIMIT 1 / MAX(version)
+        Index("ix_execplan_task_version", "task_id", "version"),
+    )
 
     id: Mapped[str] = mapped_column(String(50), primary_key=True)
-    task_id: Mapped[str] = mapped_column(String(50), ForeignKey("tasks.id"), index=True)
+    task_id: Mapped[str] = mapped_column(String(50), ForeignKey("tasks.id"))
     version: Mapped[int] = mapped_column(Integer, default=1)
     plan_json: Mapped[dict] = mapped_column(JSON)
     routing_risk: Mapped[float] = mapped_column(Float, default=0.0)
@@ -398,16 +456,109 @@ class ExecutionPlan(Base):
 class TaskEvent(Base):
     """任務事件紀錄（不可變 Event Store，Issue #14）"""
     __tablename__ = "task_events"
+    __table_args__ = (
+        # get_task_events：WHERE task_id ORDER BY created_at
+        Index("ix_taskevent_task_created", "task_id", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(50), primary_key=True)
-    task_id: Mapped[str] = mapped_column(String(50), ForeignKey("tasks.id"), index=True)
+    task_id: Mapped[str] = mapped_column(String(50), ForeignKey("tasks.id"))
     event_type: Mapped[str] = mapped_column(String(50))
     actor: Mapped[str] = mapped_column(String(100))
     from_status: Mapped[Optional[str]] = mapped_column(String(30), nullable=True)
     to_status: Mapped[Optional[str]] = mapped_column(String(30), nullable=True)
-    payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    payload: Mapped[Optional[dict]] = mapped_column(JSONVariant, nullable=True)
     trace_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     # Relationships
     task = relationship("Task", back_populates="events")
+
+
+class LLMBatch(Base):
+    """LLM Batch 工作（OpenAI Batch API / Anthropic Message Batches）"""
+    __tablename__ = "llm_batches"
+
+    id: Mapped[str] = mapped_column(String(100), primary_key=True)  # provider batch id
+    provider: Mapped[str] = mapped_column(String(20))  # claude, openai
+    model: Mapped[str] = mapped_column(String(50))
+    task_id: Mapped[Optional[str]] = mapped_column(
+        String(50), ForeignKey("tasks.id"), nullable=True
+    )
+    status: Mapped[str] = mapped_column(
+        String(20), default="submitted", index=True
+    )  # submitted, completed, failed
+    request_count: Mapped[int] = mapped_column(Integer, default=0)
+    results: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    cost_usd: Mapped[float] = mapped_column(Float, default=0.0)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+# === Sales CRM（SALES_BACKEND=sql 時使用，欄位對應 data/sales/*.csv；
+# 時間欄位沿用 sales 模型的 ISO 字串） ===
+
+class SalesClientDB(Base):
+    """CRM 客戶"""
+    __tablename__ = "sales_clients"
+
+    id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    name: Mapped[str] = mapped_column(String(200), index=True)
+    industry: Mapped[str] = mapped_column(String(100), default="")
+    tier: Mapped[str] = mapped_column(String(20), default="standard")
+    created_at: Mapped[str] = mapped_column(String(40), default="")
+
+
+class SalesDealDB(Base):
+    """銷售案件"""
+    __tablename__ = "sales_deals"
+
+    id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    client_id: Mapped[str] = mapped_column(String(50), index=True)
+    title: Mapped[str] = mapped_column(String(500))
+    stage: Mapped[str] = mapped_column(String(30), default="prospecting", index=True)
+    amount: Mapped[float] = mapped_column(Float, default=0.0)
+    probability: Mapped[int] = mapped_column(Integer, default=10)
+    owner: Mapped[str] = mapped_column(String(50), default="SALES")
+    last_activity_at: Mapped[str] = mapped_column(String(40), default="")
+    stage_entered_at: Mapped[str] = mapped_column(String(40), default="")
+    created_at: Mapped[str] = mapped_column(String(40), default="")
+    final_price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    lost_reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    lost_to_competitor: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
+
+
+class SalesActivityDB(Base):
+    """銷售互動紀錄"""
+    __tablename__ = "sales_activities"
+
+    id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    deal_id: Mapped[str] = mapped_column(String(50), index=True)
+    type: Mapped[str] = mapped_column(String(20), default="note")
+    summary: Mapped[str] = mapped_column(Text, default="")
+    created_at: Mapped[str] = mapped_column(String(40), default="")
+
+
+class SalesQuoteDB(Base):
+    """報價單"""
+    __tablename__ = "sales_quotes"
+
+    id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    deal_id: Mapped[str] = mapped_column(String(50), index=True)
+    version: Mapped[int] = mapped_column(Integer, default=1)
+    total_price: Mapped[float] = mapped_column(Float, default=0.0)
+    margin: Mapped[float] = mapped_column(Float, default=0.0)
+    evidence_log: Mapped[str] = mapped_column(Text, default="")
+    created_at: Mapped[str] = mapped_column(String(40), default="")
+
+
+class SalesProductDB(Base):
+    """產品目錄（含成本）"""
+    __tablename__ = "sales_products"
+
+    id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    name: Mapped[str] = mapped_column(String(200))
+    list_price: Mapped[float] = mapped_column(Float, default=0.0)
+    cost_base: Mapped[float] = mapped_column(Float, default=0.0)
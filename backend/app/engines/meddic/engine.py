@@ -7,7 +7,14 @@ MEDDIC Analysis Engine
 import re
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def _entity_field(entity: Any, name: str) -> Any:
+    """實體欄位：dict 用 key，其他物件（如 ParsedEntity）用屬性"""
+    if isinstance(entity, dict):
+        return entity.get(name)
+    return getattr(entity, name, None)
 
 
 class PainLevel(Enum):
@@ -231,7 +238,7 @@ class MEDDICEngine:
     async def analyze(
         self,
         content: str,
-        entities: List[Dict] = None,
+        entities: Sequence[Any] = None,
         context: Dict = None,
     ) -> MEDDICAnalysis:
         """
@@ -239,13 +246,15 @@ class MEDDICEngine:
 
         Args:
             content: 原始內容（CEO 輸入、Email 等）
-            entities: 已解析的實體（公司、人名等）
+            entities: 已解析的實體（公司、人名等）；dict 或具
+                entity_type / value 屬性的物件皆可，不需先轉 dict
             context: 額外上下文
 
         Returns:
             MEDDICAnalysis 分析結果
         """
-        entities = entities or []
+        # 會被 Champion / EB 各掃一次：generator 等一次性 iterable 先轉成 list
+        entities = list(entities) if entities else []
         context = context or {}
 
         analysis = MEDDICAnalysis()
@@ -308,16 +317,16 @@ class MEDDICEngine:
     def _analyze_champion(
         self,
         content: str,
-        entities: List[Dict]
+        entities: Sequence[Any]
     ) -> ChampionAnalysis:
         """分析 Champion"""
         champion = ChampionAnalysis()
 
         # 從實體中找人名和職稱
         for entity in entities:
-            if entity.get("entity_type") == "person":
+            if _entity_field(entity, "entity_type") == "person":
                 champion.identified = True
-                champion.name = entity.get("value")
+                champion.name = _entity_field(entity, "value")
 
         # 檢測職稱
         for level, titles in self.TITLE_KEYWORDS.items():
@@ -351,7 +360,7 @@ class MEDDICEngine:
     def _analyze_economic_buyer(
         self,
         content: str,
-        entities: List[Dict]
+        entities: Sequence[Any]
     ) -> EconomicBuyerAnalysis:
         """分析 Economic Buyer"""
         eb = EconomicBuyerAnalysis()
@@ -6,6 +6,7 @@ Knowledge Repository
 
 import logging
 from datetime import datetime
+from itertools import chain
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
@@ -29,6 +30,8 @@ class KnowledgeRepository:
 
     def __init__(self):
         self._store: Dict[str, KnowledgeCard] = {}
+        # type 值 → {id: card}；搜尋帶 type 過濾時只掃該類型的卡片
+        self._by_type: Dict[str, Dict[str, KnowledgeCard]] = {}
         self._id_counter = 0
 
     def _generate_id(self) -> str:
@@ -37,7 +40,12 @@ class KnowledgeRepository:
         year = datetime.now().year
         return f"KB-{year}-{self._id_counter:04d}"
 
-    async def create(
+    def _index(self, card: KnowledgeCard) -> None:
+        """寫入 store 與 type 索引"""
+        self._store[card.id] = card
+        self._by_type.setdefault(card.type.value, {})[card.id] = card
+
+    def _new_card(
         self,
         type: KnowledgeType,
         title: str,
@@ -48,8 +56,7 @@ class KnowledgeRepository:
         metadata: Dict[str, Any] = None,
         created_by: Optional[str] = None,
     ) -> KnowledgeCard:
-        """建立知識卡片"""
-        card = KnowledgeCard(
+        return KnowledgeCard(
             id=self._generate_id(),
             type=type,
             title=title,
@@ -61,11 +68,46 @@ class KnowledgeRepository:
             created_by=created_by,
         )
 
-        self._store[card.id] = card
+    async def create(
+        self,
+        type: KnowledgeType,
+        title: str,
+        content: str,
+        summary: Optional[str] = None,
+        category: Optional[str] = None,
+        tags: List[str] = None,
+        metadata: Dict[str, Any] = None,
+        created_by: Optional[str] = None,
+    ) -> KnowledgeCard:
+        """建立知識卡片"""
+        card = self._new_card(
+            type=type,
+            title=title,
+            content=content,
+            summary=summary,
+            category=category,
+            tags=tags,
+            metadata=metadata,
+            created_by=created_by,
+        )
+
+        self._index(card)
         logger.info(f"Created knowledge card: {card.id} - {card.title}")
 
         return card
 
+    async def create_many(self, records: List[Dict[str, Any]]) -> List[KnowledgeCard]:
+        """
+        批次建立知識卡片
+
+        每筆 dict 的 key 同 create() 參數；一次寫入 store，依傳入順序回傳。
+        """
+        cards = [self._new_card(**record) for record in records]
+        for card in cards:
+            self._index(card)
+        logger.info(f"Created {len(cards)} knowledge cards")
+        return cards
+
     async def get(self, id: str) -> Optional[KnowledgeCard]:
         """取得知識卡片"""
         card = self._store.get(id)
@@ -83,9 +125,16 @@ class KnowledgeRepository:
         if not card:
             return None
 
+        old_type = card.type.value
         for key, value in kwargs.items():
             if hasattr(card, key):
                 setattr(card, key, value)
+        if card.type.value != old_type:
+            # 類型變更：重建新類型的索引，維持與 store 相同的建立順序
+            del self._by_type[old_type][id]
+            self._by_type[card.type.value] = {
+                c.id: c for c in self._store.values() if c.type == card.type
+            }
 
         card.updated_at = datetime.utcnow()
         return card
@@ -113,36 +162,66 @@ class KnowledgeRepository:
             filters: 過濾條件 (type, category, tags, metadata)
             limit: 回傳數量限制
         """
-        results = []
-        filters = filters or {}
+        results = await self.search_batch([{"query": query, "filters": filters, "limit": limit}])
+        return results[0]
 
-        for card in self._store.values():
+    async def search_batch(self, specs: List[Dict[str, Any]]) -> List[List[SearchResult]]:
+        """
+        批次搜尋
+
+        每個 spec 的 key 同 search() 參數（query / filters / limit）。
+        只掃描 store 一次，依 spec 順序回傳各自的結果。
+        帶 type 過濾的 spec 先以 type 索引篩選，只對該類型的卡片評分；
+        若所有 spec 都帶 type，就只掃描這些類型的卡片。
+        """
+        buckets: List[List[SearchResult]] = [[] for _ in specs]
+        # type 值（None = 不限類型）→ 該類型要比對的 spec
+        by_type: Dict[Optional[str], List[tuple]] = {}
+        for spec, bucket in zip(specs, buckets):
+            filters = spec.get("filters") or {}
+            query = spec.get("query")
+            by_type.setdefault(filters.get("type"), []).append(
+                (query, (query or "").lower().split(), filters, bucket)
+            )
+
+        untyped = by_type.pop(None, [])
+        if untyped:
+            candidates = self._store.values()
+        else:
+            candidates = chain.from_iterable(
+                self._by_type.get(t, {}).values() for t in by_type
+            )
+
+        for card in candidates:
             # 只搜尋已發布的
             if card.status != KnowledgeStatus.PUBLISHED:
                 continue
 
-            # 過濾條件
-            if not card.matches_filters(filters):
-                continue
-
-            # 關鍵字匹配
-            if query:
-                if not card.matches_query(query):
+            typed = by_type.get(card.type.value, ())
+            title = card.title.lower()
+            content = card.content.lower()
+            for query, terms, filters, bucket in chain(typed, untyped):
+                # 過濾條件
+                if not card.matches_filters(filters):
                     continue
-                # 簡單評分：匹配的關鍵字數量
-                score = sum(1 for term in query.lower().split()
-                           if term in card.title.lower()) * 2
-                score += sum(1 for term in query.lower().split()
-                            if term in card.content.lower())
-            else:
-                score = 1.0
 
-            results.append(SearchResult(card=card, score=score))
+                # 關鍵字匹配
+                if query:
+                    if not card.matches_query(query):
+                        continue
+                    # 簡單評分：匹配的關鍵字數量
+                    score = sum(1 for term in terms if term in title) * 2
+                    score += sum(1 for term in terms if term in content)
+                else:
+                    score = 1.0
+
+                bucket.append(SearchResult(card=card, score=score))
 
         # 排序
-        results.sort(key=lambda x: x.score, reverse=True)
+        for bucket in buckets:
+            bucket.sort(key=lambda x: x.score, reverse=True)
 
-        return results[:limit]
+        return [bucket[:spec.get("limit", 20)] for spec, bucket in zip(specs, buckets)]
 
     async def list_by_type(
         self,
@@ -151,8 +230,8 @@ class KnowledgeRepository:
     ) -> List[KnowledgeCard]:
         """依類型列表"""
         return [
-            card for card in self._store.values()
-            if card.type == type and card.status == KnowledgeStatus.PUBLISHED
+            card for card in self._by_type.get(type.value, {}).values()
+            if card.status == KnowledgeStatus.PUBLISHED
         ][:limit]
 
     async def get_tags(self) -> Dict[str, int]:
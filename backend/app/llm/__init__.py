@@ -2,7 +2,15 @@
 LLM Provider Abstraction Layer
 """
 
-from app.llm.base import LLMProvider, LLMResponse, Message
+from app.llm.base import LLMProvider, LLMResponse, Message, TokenBudgetError
 from app.llm.factory import LLMProviderFactory
+from app.llm.resilience import CircuitOpenError
 
-__all__ = ["LLMProvider", "LLMResponse", "Message", "LLMProviderFactory"]
+__all__ = [
+    "LLMProvider",
+    "LLMResponse",
+    "Message",
+    "TokenBudgetError",
+    "CircuitOpenError",
+    "LLMProviderFactory",
+]
@@ -2,29 +2,107 @@
 LLM Provider Base Classes and Interfaces
 """
 
+import asyncio
+import os
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from typing import AsyncIterator, Callable, ClassVar, Dict, List, Optional, Tuple, Type
 
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
-@dataclass
+from app.llm.resilience import (
+    BACKOFF_MAX,
+    BACKOFF_MULTIPLIER,
+    MAX_ATTEMPTS,
+    CircuitOpenError,
+    get_circuit,
+)
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# 每則訊息的格式開銷（role / 分隔符）與回覆前綴
+TOKENS_PER_MESSAGE = 4
+TOKENS_REPLY_PRIMING = 3
+
+# 非 OpenAI 模型沒有公開 tokenizer，以 cl100k_base 近似
+DEFAULT_ENCODING = "cl100k_base"
+
+# 成本以整數 micro-USD 計算
+MICROS_PER_USD = 1_000_000
+
+# tiktoken encoder 快取（建立成本高，process 內共用）
+_ENCODERS: Dict[str, "tiktoken.Encoding"] = {}
+
+
+def _encoder(model_name: str):
+    """取得（快取的）tiktoken encoder"""
+    enc = _ENCODERS.get(model_name)
+    if enc is None:
+        try:
+            enc = tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            enc = tiktoken.get_encoding(DEFAULT_ENCODING)
+        _ENCODERS[model_name] = enc
+    return enc
+
+
+@lru_cache(maxsize=4096)
+def count_text_tokens(model_name: str, text: str) -> int:
+    """
+    估算單段文字的 token 數
+
+    未安裝 tiktoken 時以字元數粗估（中文約 1 字 1 token，英文約 4 字元 1 token）
+    """
+    if tiktoken is not None:
+        return len(_encoder(model_name).encode(text))
+    ascii_chars = sum(1 for c in text if c.isascii())
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+class TokenBudgetError(ValueError):
+    """Prompt 超過 token 上限（在呼叫 API 前拒絕）"""
+
+    def __init__(self, estimated_tokens: int, max_tokens: int):
+        self.estimated_tokens = estimated_tokens
+        self.max_tokens = max_tokens
+        super().__init__(
+            f"Prompt too large: ~{estimated_tokens} tokens exceeds budget of {max_tokens}"
+        )
+
+
+@dataclass(frozen=True, slots=True)
 class Message:
-    """對話訊息"""
+    """對話訊息（不可變、可 hash，可直接作為快取 key）"""
     role: str  # "system" | "user" | "assistant"
     content: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class LLMResponse:
-    """LLM 回應的標準格式"""
+    """LLM 回應的標準格式（成本以整數 micro-USD 儲存，加總無浮點誤差）"""
     content: str
     input_tokens: int
     output_tokens: int
-    cost_usd: float
+    cost_micro_usd: int
     model: str
     provider: str
     latency_ms: float
 
+    @property
+    def cost_usd(self) -> float:
+        """成本 (USD)"""
+        return self.cost_micro_usd / MICROS_PER_USD
+
 
 class LLMProvider(ABC):
     """
@@ -36,47 +114,217 @@ class LLMProvider(ABC):
     def __init__(self, api_key: str, model_name: str):
         self.api_key = api_key
         self.model_name = model_name
+        # Pre-flight token 上限（LLM_MAX_INPUT_TOKENS，未設定則不檢查）
+        max_input = os.getenv("LLM_MAX_INPUT_TOKENS")
+        self.max_input_tokens: Optional[int] = int(max_input) if max_input else None
+        # 每 1000 tokens 的單價（micro-USD，整數）
+        cls = type(self)
+        self._input_price_micros = round(cls.cost_per_1k_input * MICROS_PER_USD)
+        self._output_price_micros = round(cls.cost_per_1k_output * MICROS_PER_USD)
+        self._emit_response = self._build_response_emitter()
 
-    @property
-    @abstractmethod
-    def provider_name(self) -> str:
-        """Provider 名稱 (gemini, claude, openai)"""
-        pass
+    # 子類別必須以 class attribute 定義
+    provider_name: ClassVar[str]  # Provider 名稱 (gemini, claude, openai)
+    cost_per_1k_input: ClassVar[float]  # 每 1000 input tokens 的成本 (USD)
+    cost_per_1k_output: ClassVar[float]  # 每 1000 output tokens 的成本 (USD)
 
-    @property
-    @abstractmethod
-    def cost_per_1k_input(self) -> float:
-        """每 1000 input tokens 的成本 (USD)"""
-        pass
+    _REQUIRED_CLASS_ATTRS = ("provider_name", "cost_per_1k_input", "cost_per_1k_output")
 
-    @property
-    @abstractmethod
-    def cost_per_1k_output(self) -> float:
-        """每 1000 output tokens 的成本 (USD)"""
-        pass
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 仍有未實作的 abstract method（中介抽象類別）時不檢查
+        inherited = getattr(cls, "__abstractmethods__", ())
+        if any(getattr(getattr(cls, name, None), "__isabstractmethod__", False) for name in inherited):
+            return
+        missing = [name for name in cls._REQUIRED_CLASS_ATTRS if not hasattr(cls, name)]
+        if missing:
+            raise TypeError(f"{cls.__name__} must define class attributes: {missing}")
+
+    # 可重試的暫時性錯誤（429 / 5xx / 連線中斷），由各 Provider 定義
+    retryable_errors: Tuple[Type[BaseException], ...] = ()
+
+    # 進行中的請求（單一 event loop 內共用，key 含 provider / model）
+    _in_flight: Dict[str, "asyncio.Future[LLMResponse]"] = {}
 
-    @abstractmethod
     async def chat(
         self,
         messages: List[Message],
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
+        no_cache: bool = False,
     ) -> LLMResponse:
         """
         發送對話請求
 
+        Pre-flight token 檢查 → 回應快取（temperature == 0）→ 合併進行中的相同請求
+        → circuit breaker → 暫時性錯誤以 exponential backoff 重試
+
         Args:
             messages: 對話歷史
             temperature: 創意度 (0-1)
             max_tokens: 最大回應長度
+            no_cache: 略過回應快取
 
         Returns:
             LLMResponse: 標準化的回應物件
+
+        Raises:
+            TokenBudgetError: Prompt 超過 token 上限
+            CircuitOpenError: Provider 的 circuit 已開路
+        """
+        self.check_token_budget(messages)
+
+        from app.llm import cache
+
+        key = cache.cache_key(
+            self.provider_name, self.model_name, temperature, messages, max_tokens
+        )
+        use_cache = temperature == 0 and not no_cache
+
+        if use_cache:
+            start = time.perf_counter()
+            cached = await cache.get_cached(key)
+            if cached is not None:
+                return replace(cached, latency_ms=(time.perf_counter() - start) * 1000)
+
+        # Single-flight：相同請求進行中時，等待同一個結果而不重複呼叫 API
+        # （與回應快取共用同一個 key，已含 max_tokens）
+        in_flight = LLMProvider._in_flight.get(key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        future = asyncio.get_running_loop().create_future()
+        LLMProvider._in_flight[key] = future
+        try:
+            response = await self._call_upstream(messages, temperature, max_tokens)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # 標記已取得，沒有等待者時不會產生警告
+            raise
+        else:
+            future.set_result(response)
+        finally:
+            LLMProvider._in_flight.pop(key, None)
+
+        if use_cache:
+            await cache.set_cached(key, response)
+        return response
+
+    async def _call_upstream(
+        self,
+        messages: List[Message],
+        temperature: float,
+        max_tokens: Optional[int],
+    ) -> LLMResponse:
+        """經 circuit breaker 與重試呼叫 _chat"""
+        circuit = get_circuit(self.provider_name)
+        if not circuit.allow_request():
+            raise CircuitOpenError(self.provider_name)
+
+        try:
+            async for attempt in AsyncRetrying(
+                retry=retry_if_exception_type(self.retryable_errors),
+                stop=stop_after_attempt(MAX_ATTEMPTS),
+                wait=wait_random_exponential(multiplier=BACKOFF_MULTIPLIER, max=BACKOFF_MAX),
+                reraise=True,
+            ):
+                with attempt:
+                    response = await self._chat(messages, temperature, max_tokens)
+        except self.retryable_errors:
+            circuit.record_failure()
+            raise
+
+        circuit.record_success()
+        return response
+
+    @abstractmethod
+    async def _chat(
+        self,
+        messages: List[Message],
+        temperature: float,
+        max_tokens: Optional[int],
+    ) -> LLMResponse:
+        """實際呼叫 Provider API（單次，不含重試）"""
+        pass
+
+    @abstractmethod
+    def stream(
+        self,
+        messages: List[Message],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        on_complete: Optional[Callable[[LLMResponse], None]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        串流對話請求（async generator，逐段 yield 文字）
+
+        Args:
+            messages: 對話歷史
+            temperature: 創意度 (0-1)
+            max_tokens: 最大回應長度
+            on_complete: 串流結束時以完整 LLMResponse 回呼（用於記錄成本）
+
+        Yields:
+            str: 回應文字片段
         """
         pass
 
-    def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
-        """計算本次呼叫成本"""
-        input_cost = (input_tokens / 1000) * self.cost_per_1k_input
-        output_cost = (output_tokens / 1000) * self.cost_per_1k_output
-        return round(input_cost + output_cost, 6)
+    def estimate_tokens(self, messages: List[Message]) -> int:
+        """在呼叫 API 前估算 prompt 的 input tokens"""
+        total = TOKENS_REPLY_PRIMING
+        for msg in messages:
+            total += TOKENS_PER_MESSAGE + count_text_tokens(self.model_name, msg.content)
+        return total
+
+    def check_token_budget(self, messages: List[Message]) -> int:
+        """
+        Pre-flight 檢查：超過 max_input_tokens 時直接拒絕，不浪費 API 呼叫
+
+        Returns:
+            估算的 input tokens
+
+        Raises:
+            TokenBudgetError: 超過上限
+        """
+        if self.max_input_tokens is None:
+            return 0
+        estimated = self.estimate_tokens(messages)
+        if estimated > self.max_input_tokens:
+            raise TokenBudgetError(estimated, self.max_input_tokens)
+        return estimated
+
+    def _build_response_emitter(self) -> Callable[[int, int, float, str], LLMResponse]:
+        """
+        建立此 Provider / model 專用的 LLMResponse 建構函式
+
+        單價、model、provider 名稱在建立時即綁定為 closure 常數，
+        每次回應只需整數乘加，不需再查 class attribute。
+        """
+        input_price = self._input_price_micros
+        output_price = self._output_price_micros
+        model = self.model_name
+        provider = self.provider_name
+
+        def emit(input_tokens: int, output_tokens: int, latency_ms: float, content: str) -> LLMResponse:
+            return LLMResponse(
+                content,
+                input_tokens,
+                output_tokens,
+                (input_tokens * input_price + output_tokens * output_price + 999) // 1000,
+                model,
+                provider,
+                latency_ms,
+            )
+
+        return emit
+
+    def calculate_cost(self, input_tokens: int, output_tokens: int) -> int:
+        """計算本次呼叫成本（micro-USD，無條件進位）"""
+        return (
+            input_tokens * self._input_price_micros
+            + output_tokens * self._output_price_micros
+            + 999
+        ) // 1000
@@ -0,0 +1,312 @@
+"""
+LLM Batch API
+
+非即時工作（知識庫整理、每日摘要等）改走 Batch 端點：
+- OpenAI: /v1/batches（上傳 JSONL 後建立 batch）
+- Anthropic: /v1/messages/batches
+
+兩者計費約為同步呼叫的 50%，結果於 24 小時內完成。
+batch_id 會寫入 llm_batches 表，由 lifespan 中的 poller 定期收回結果。
+"""
+
+import asyncio
+import math
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import orjson
+from sqlalchemy import select, update
+
+from app.llm.base import MICROS_PER_USD, LLMProvider, LLMResponse, Message
+
+logger = logging.getLogger(__name__)
+
+# Batch 計費折扣（相對於同步呼叫）
+BATCH_COST_FACTOR = 0.5
+
+# Poller 輪詢間隔（秒）
+POLL_INTERVAL_SECONDS = 60.0
+
+SUPPORTED_PROVIDERS = ("openai", "claude")
+
+
+class BatchFailedError(RuntimeError):
+    """Provider 回報 batch 已終止且無結果（失敗 / 過期 / 取消），不會再有結果"""
+
+
+@dataclass
+class BatchJob:
+    """單筆 batch 請求"""
+    custom_id: str
+    messages: List[Message]
+    temperature: float = 0.7
+    max_tokens: Optional[int] = None
+
+
+def _batch_response(
+    provider: LLMProvider, content: str, input_tokens: int, output_tokens: int
+) -> LLMResponse:
+    """建立 batch 結果（套用 batch 折扣）"""
+    cost = provider.calculate_cost(input_tokens, output_tokens) * BATCH_COST_FACTOR
+    return LLMResponse(
+        content=content,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cost_micro_usd=math.ceil(cost),
+        model=provider.model_name,
+        provider=provider.provider_name,
+        latency_ms=0.0,
+    )
+
+
+# === OpenAI ===
+
+async def _submit_openai(provider: LLMProvider, jobs: List[BatchJob]) -> str:
+    lines = []
+    for job in jobs:
+        body = {
+            "model": provider.model_name,
+            "messages": provider._format_messages(job.messages),
+            "temperature": job.temperature,
+        }
+        if job.max_tokens:
+            body["max_tokens"] = job.max_tokens
+        lines.append(orjson.dumps({
+            "custom_id": job.custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": body,
+        }))
+    jsonl_bytes = b"\n".join(lines)
+
+    input_file = await provider.client.files.create(
+        file=("batch.jsonl", jsonl_bytes),
+        purpose="batch",
+    )
+    batch = await provider.client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+
+async def _poll_openai(
+    provider: LLMProvider, batch_id: str
+) -> Optional[Dict[str, LLMResponse]]:
+    batch = await provider.client.batches.retrieve(batch_id)
+    if batch.status in ("validating", "in_progress", "finalizing"):
+        return None
+    if batch.status != "completed" or not batch.output_file_id:
+        raise BatchFailedError(f"OpenAI batch {batch_id} ended with status '{batch.status}'")
+
+    output = await provider.client.files.content(batch.output_file_id)
+    results: Dict[str, LLMResponse] = {}
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        item = orjson.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        body = response["body"]
+        results[item["custom_id"]] = _batch_response(
+            provider,
+            body["choices"][0]["message"].get("content") or "",
+            body["usage"]["prompt_tokens"],
+            body["usage"]["completion_tokens"],
+        )
+    return results
+
+
+# === Anthropic ===
+
+async def _submit_claude(provider: LLMProvider, jobs: List[BatchJob]) -> str:
+    requests = []
+    for job in jobs:
+        system_prompt, formatted = provider._format_messages(job.messages)
+        requests.append({
+            "custom_id": job.custom_id,
+            "params": {
+                "model": provider.model_name,
+                "max_tokens": job.max_tokens or provider.default_max_tokens,
+                "system": system_prompt,
+                "messages": formatted,
+                "temperature": job.temperature,
+            },
+        })
+
+    batch = await provider.client.messages.batches.create(requests=requests)
+    return batch.id
+
+
+async def _poll_claude(
+    provider: LLMProvider, batch_id: str
+) -> Optional[Dict[str, LLMResponse]]:
+    batch = await provider.client.messages.batches.retrieve(batch_id)
+    if batch.processing_status != "ended":
+        return None
+
+    results: Dict[str, LLMResponse] = {}
+    async for entry in await provider.client.messages.batches.results(batch_id):
+        if entry.result.type != "succeeded":
+            continue
+        message = entry.result.message
+        results[entry.custom_id] = _batch_response(
+            provider,
+            message.content[0].text if message.content else "",
+            message.usage.input_tokens,
+            message.usage.output_tokens,
+        )
+    return results
+
+
+_SUBMITTERS = {"openai": _submit_openai, "claude": _submit_claude}
+_POLLERS = {"openai": _poll_openai, "claude": _poll_claude}
+
+
+# === Public API ===
+
+async def submit_batch(
+    provider: LLMProvider,
+    jobs: List[BatchJob],
+    task_id: Optional[str] = None,
+    session_factory=None,
+) -> str:
+    """
+    送出 batch 工作並記錄到 llm_batches 表
+
+    Args:
+        provider: LLM Provider（僅支援 openai / claude）
+        jobs: batch 請求列表
+        task_id: 關聯的 Task（可選）
+        session_factory: DB session factory（預設 AsyncSessionLocal）
+
+    Returns:
+        provider 端的 batch_id
+
+    Raises:
+        ValueError: Provider 不支援 batch
+    """
+    if provider.provider_name not in _SUBMITTERS:
+        raise ValueError(
+            f"Provider '{provider.provider_name}' does not support batch. "
+            f"Supported: {list(SUPPORTED_PROVIDERS)}"
+        )
+    if not jobs:
+        raise ValueError("Batch must contain at least one job")
+
+    batch_id = await _SUBMITTERS[provider.provider_name](provider, jobs)
+
+    from app.db.models import LLMBatch
+
+    if session_factory is None:
+        from app.db.database import AsyncSessionLocal
+        session_factory = AsyncSessionLocal
+
+    async with session_factory() as session:
+        session.add(LLMBatch(
+            id=batch_id,
+            provider=provider.provider_name,
+            model=provider.model_name,
+            task_id=task_id,
+            status="submitted",
+            request_count=len(jobs),
+            created_at=datetime.utcnow(),
+        ))
+        await session.commit()
+
+    logger.info(f"Submitted {provider.provider_name} batch {batch_id} ({len(jobs)} jobs)")
+    return batch_id
+
+
+async def poll_batch(
+    provider: LLMProvider, batch_id: str
+) -> Optional[Dict[str, LLMResponse]]:
+    """
+    查詢 batch 狀態
+
+    Returns:
+        完成時回傳 {custom_id: LLMResponse}；仍在處理中回傳 None
+
+    Raises:
+        BatchFailedError: batch 失敗 / 過期 / 被取消
+    """
+    if provider.provider_name not in _POLLERS:
+        raise ValueError(f"Provider '{provider.provider_name}' does not support batch")
+    return await _POLLERS[provider.provider_name](provider, batch_id)
+
+
+async def drain_finished_batches(session_factory) -> int:
+    """
+    收回所有已完成的 batch，結果寫回 llm_batches 表
+
+    只有 provider 回報終止狀態（或 provider 不支援 batch）才標記 failed；
+    網路錯誤、5xx、rate limit、暫時缺 API key 等只記 log，留在 submitted
+    等下一輪重試。查詢 provider 期間不持有 DB session。
+
+    Returns:
+        本次完成（含失敗）的 batch 數
+    """
+    from app.db.models import LLMBatch
+    from app.llm.factory import LLMProviderFactory
+
+    async with session_factory() as session:
+        result = await session.execute(
+            select(LLMBatch.id, LLMBatch.provider, LLMBatch.model)
+            .where(LLMBatch.status == "submitted")
+        )
+        pending = result.all()
+
+    drained = 0
+    for batch_id, provider_name, model in pending:
+        if provider_name not in _POLLERS:
+            logger.warning(f"Batch {batch_id} failed: provider '{provider_name}' does not support batch")
+            values = {"status": "failed"}
+        else:
+            try:
+                provider = LLMProviderFactory.create(provider_name, model_name=model)
+                responses = await poll_batch(provider, batch_id)
+            except BatchFailedError as e:
+                logger.warning(f"Batch {batch_id} failed: {e}")
+                values = {"status": "failed"}
+            except Exception as e:
+                logger.warning(f"Batch {batch_id} poll error, will retry: {e}")
+                continue
+            else:
+                if responses is None:
+                    continue
+                values = {
+                    "status": "completed",
+                    "results": {cid: asdict(r) for cid, r in responses.items()},
+                    "cost_usd": sum(r.cost_micro_usd for r in responses.values()) / MICROS_PER_USD,
+                }
+
+        async with session_factory() as session:
+            await session.execute(
+                update(LLMBatch)
+                .where(LLMBatch.id == batch_id, LLMBatch.status == "submitted")
+                .values(completed_at=datetime.utcnow(), **values)
+            )
+            await session.commit()
+        drained += 1
+
+    return drained
+
+
+async def run_batch_poller(
+    session_factory, interval: float = POLL_INTERVAL_SECONDS
+) -> None:
+    """背景 poller：定期收回已完成的 batch（由 lifespan 啟動）"""
+    while True:
+        try:
+            drained = await drain_finished_batches(session_factory)
+            if drained:
+                logger.info(f"Drained {drained} finished LLM batch(es)")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Batch poller error: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,97 @@
+"""
+LLM Response Cache — Redis-backed
+
+相同 (provider, model, temperature, messages) 的請求直接回傳快取結果，
+省下一次付費 API 呼叫。只快取 temperature == 0 的請求（輸出可重現）。
+Redis 不可用時自動略過。
+"""
+
+import logging
+from dataclasses import asdict, replace
+from hashlib import blake2b
+from typing import Dict, List, Optional
+
+import orjson
+
+from app.llm.base import LLMResponse, Message
+
+logger = logging.getLogger(__name__)
+
+# --- Global Redis singleton ---
+
+_redis = None  # redis.asyncio.Redis | None
+
+
+def get_redis():
+    """Get the Redis client used for the response cache (set by main.py lifespan)."""
+    return _redis
+
+
+def set_redis(client):
+    """Set the Redis client used for the response cache."""
+    global _redis
+    _redis = client
+
+
+KEY_PREFIX = "llm:cache:v2:"
+TTL_SECONDS = 86400  # 24 hours
+
+_stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+
+def cache_key(
+    provider_name: str,
+    model_name: str,
+    temperature: float,
+    messages: List[Message],
+    max_tokens: Optional[int] = None,
+) -> str:
+    """以正規化後的 prompt 計算快取 key（max_tokens 不同，回覆長度上限就不同）"""
+    payload = orjson.dumps([
+        provider_name,
+        model_name,
+        temperature,
+        max_tokens,
+        [(m.role, m.content.strip()) for m in messages],
+    ])
+    return blake2b(payload, digest_size=16).hexdigest()
+
+
+async def get_cached(key: str) -> Optional[LLMResponse]:
+    """讀取快取（命中時 cost_micro_usd=0）。No-op if Redis unavailable."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        raw = await client.get(f"{KEY_PREFIX}{key}")
+    except Exception as e:
+        logger.warning(f"Failed to read LLM cache from Redis: {e}")
+        return None
+
+    if raw is None:
+        _stats["misses"] += 1
+        return None
+
+    _stats["hits"] += 1
+    return replace(LLMResponse(**orjson.loads(raw)), cost_micro_usd=0)
+
+
+async def set_cached(key: str, response: LLMResponse) -> None:
+    """寫入快取（SETEX 24h）。No-op if Redis unavailable."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.setex(f"{KEY_PREFIX}{key}", TTL_SECONDS, orjson.dumps(asdict(response)))
+    except Exception as e:
+        logger.warning(f"Failed to write LLM cache to Redis: {e}")
+
+
+def get_cache_stats() -> Dict[str, float]:
+    """快取命中統計"""
+    total = _stats["hits"] + _stats["misses"]
+    return {
+        "hits": _stats["hits"],
+        "misses": _stats["misses"],
+        "hit_rate": round(_stats["hits"] / total, 4) if total else 0.0,
+    }
@@ -3,7 +3,7 @@ Anthropic Claude LLM Provider
 """
 
 import time
-from typing import List, Optional
+from typing import AsyncIterator, Callable, List, Optional
 
 import anthropic
 
@@ -20,18 +20,27 @@ class ClaudeProvider(LLMProvider):
     cost_per_1k_input = 0.003
     cost_per_1k_output = 0.015
 
+    # Claude API 必須指定 max_tokens
+    default_max_tokens = 4096
+
+    retryable_errors = (
+        anthropic.RateLimitError,
+        anthropic.APIConnectionError,
+        anthropic.InternalServerError,
+    )
+
     def __init__(self, api_key: str, model_name: str = "claude-sonnet-4-5-20250929"):
         super().__init__(api_key, model_name)
         self.client = anthropic.AsyncAnthropic(api_key=api_key)
 
-    async def chat(
+    async def _chat(
         self,
         messages: List[Message],
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None,
+        temperature: float,
+        max_tokens: Optional[int],
     ) -> LLMResponse:
         """發送對話請求到 Claude"""
-        start = time.time()
+        start = time.perf_counter()
 
         # 分離 system message 和對話訊息
         system_prompt, formatted_messages = self._format_messages(messages)
@@ -39,13 +48,13 @@ class ClaudeProvider(LLMProvider):
         # 呼叫 API
         response = await self.client.messages.create(
             model=self.model_name,
-            max_tokens=max_tokens or 4096,
+            max_tokens=max_tokens or self.default_max_tokens,
             system=system_prompt,
             messages=formatted_messages,
             temperature=temperature,
         )
 
-        latency = (time.time() - start) * 1000
+        latency = (time.perf_counter() - start) * 1000
 
         # 取得 token 用量
         input_tokens = response.usage.input_tokens
@@ -54,15 +63,41 @@ class ClaudeProvider(LLMProvider):
         # 取得回應內容
         content = response.content[0].text if response.content else ""
 
-        return LLMResponse(
-            content=content,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            cost_usd=self.calculate_cost(input_tokens, output_tokens),
+        return self._emit_response(input_tokens, output_tokens, latency, content)
+
+    async def stream(
+        self,
+        messages: List[Message],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        on_complete: Optional[Callable[[LLMResponse], None]] = None,
+    ) -> AsyncIterator[str]:
+        """串流對話請求到 Claude"""
+        self.check_token_budget(messages)
+        start = time.perf_counter()
+
+        system_prompt, formatted_messages = self._format_messages(messages)
+
+        async with self.client.messages.stream(
             model=self.model_name,
-            provider=self.provider_name,
-            latency_ms=latency,
-        )
+            max_tokens=max_tokens or self.default_max_tokens,
+            system=system_prompt,
+            messages=formatted_messages,
+            temperature=temperature,
+        ) as s:
+            async for delta in s.text_stream:
+                yield delta
+            final = await s.get_final_message()
+
+        if on_complete:
+            input_tokens = final.usage.input_tokens
+            output_tokens = final.usage.output_tokens
+            on_complete(self._emit_response(
+                input_tokens,
+                output_tokens,
+                (time.perf_counter() - start) * 1000,
+                final.content[0].text if final.content else "",
+            ))
 
     def _format_messages(self, messages: List[Message]) -> tuple[str, List[dict]]:
         """
@@ -2,6 +2,7 @@
 LLM Provider Factory
 """
 
+import logging
 import os
 from typing import Optional
 
@@ -9,6 +10,9 @@ from app.llm.base import LLMProvider
 from app.llm.claude import ClaudeProvider
 from app.llm.gemini import GeminiProvider
 from app.llm.openai_provider import OpenAIProvider
+from app.llm.resilience import get_circuit
+
+logger = logging.getLogger(__name__)
 
 
 class LLMProviderFactory:
@@ -107,9 +111,21 @@ class LLMProviderFactory:
         """
         取得當前設定的 Provider
 
-        根據 LLM_PROVIDER 環境變數決定，預設為 Claude
+        根據 LLM_PROVIDER 環境變數決定，預設為 Claude。
+        若該 Provider 的 circuit 開路中，依優先順序改用其他可用 Provider。
         """
         provider_name = os.getenv("LLM_PROVIDER", "claude")
+
+        if get_circuit(provider_name).is_open:
+            for fallback in cls._priority:
+                if fallback == provider_name or get_circuit(fallback).is_open:
+                    continue
+                if os.getenv(cls._env_keys[fallback]):
+                    logger.warning(
+                        f"Circuit open for '{provider_name}', falling back to '{fallback}'"
+                    )
+                    return cls.create(fallback)
+
         return cls.create(provider_name)
 
     @classmethod
@@ -120,6 +136,8 @@ class LLMProviderFactory:
         如果首選 Provider 沒有設定 API Key，會嘗試下一個
         """
         for provider_name in cls._priority:
+            if get_circuit(provider_name).is_open:
+                continue
             env_key = cls._env_keys[provider_name]
             if os.getenv(env_key):
                 try:
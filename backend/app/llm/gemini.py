@@ -3,12 +3,24 @@ Google Gemini LLM Provider
 """
 
 import time
-from typing import List, Optional
+from typing import AsyncIterator, Callable, List, Optional
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 
 from app.llm.base import LLMProvider, LLMResponse, Message
 
+# genai.configure 是全域設定，同一把 key 只需設定一次
+_configured_api_key: Optional[str] = None
+
+
+def _configure(api_key: str) -> None:
+    """設定 Gemini API Key（相同 key 不重複設定）"""
+    global _configured_api_key
+    if _configured_api_key != api_key:
+        genai.configure(api_key=api_key)
+        _configured_api_key = api_key
+
 
 class GeminiProvider(LLMProvider):
     """Google Gemini API Provider"""
@@ -20,19 +32,25 @@ class GeminiProvider(LLMProvider):
     cost_per_1k_input = 0.00125
     cost_per_1k_output = 0.00375
 
+    retryable_errors = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+    )
+
     def __init__(self, api_key: str, model_name: str = "gemini-1.5-pro"):
         super().__init__(api_key, model_name)
-        genai.configure(api_key=api_key)
+        _configure(api_key)
         self.client = genai.GenerativeModel(model_name)
 
-    async def chat(
+    async def _chat(
         self,
         messages: List[Message],
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None,
+        temperature: float,
+        max_tokens: Optional[int],
     ) -> LLMResponse:
         """發送對話請求到 Gemini"""
-        start = time.time()
+        start = time.perf_counter()
 
         # 轉換訊息格式
         formatted = self._format_messages(messages)
@@ -42,28 +60,60 @@ class GeminiProvider(LLMProvider):
         if max_tokens:
             generation_config["max_output_tokens"] = max_tokens
 
-        # 呼叫 API（使用 sync 版本，因為 Gemini SDK 的 async 支援有限）
-        response = self.client.generate_content(
+        # 呼叫 API（async 版本，避免阻塞 event loop）
+        response = await self.client.generate_content_async(
             formatted,
             generation_config=generation_config,
         )
 
-        latency = (time.time() - start) * 1000
+        latency = (time.perf_counter() - start) * 1000
 
         # 取得 token 用量
         input_tokens = response.usage_metadata.prompt_token_count
         output_tokens = response.usage_metadata.candidates_token_count
 
-        return LLMResponse(
-            content=response.text,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            cost_usd=self.calculate_cost(input_tokens, output_tokens),
-            model=self.model_name,
-            provider=self.provider_name,
-            latency_ms=latency,
+        return self._emit_response(input_tokens, output_tokens, latency, response.text)
+
+    async def stream(
+        self,
+        messages: List[Message],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        on_complete: Optional[Callable[[LLMResponse], None]] = None,
+    ) -> AsyncIterator[str]:
+        """串流對話請求到 Gemini"""
+        self.check_token_budget(messages)
+        start = time.perf_counter()
+
+        formatted = self._format_messages(messages)
+
+        generation_config = {"temperature": temperature}
+        if max_tokens:
+            generation_config["max_output_tokens"] = max_tokens
+
+        response = await self.client.generate_content_async(
+            formatted,
+            generation_config=generation_config,
+            stream=True,
         )
 
+        parts: List[str] = []
+        async for chunk in response:
+            if chunk.text:
+                parts.append(chunk.text)
+                yield chunk.text
+
+        if on_complete:
+            # usage_metadata 在串流結束後才完整
+            input_tokens = response.usage_metadata.prompt_token_count
+            output_tokens = response.usage_metadata.candidates_token_count
+            on_complete(self._emit_response(
+                input_tokens,
+                output_tokens,
+                (time.perf_counter() - start) * 1000,
+                "".join(parts),
+            ))
+
     def _format_messages(self, messages: List[Message]) -> List[dict]:
         """
         轉換訊息格式為 Gemini 格式
@@ -3,13 +3,25 @@ OpenAI GPT LLM Provider
 """
 
 import time
-from typing import List, Optional
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Optional
 
 import openai
 
 from app.llm.base import LLMProvider, LLMResponse, Message
 
 
+@lru_cache(maxsize=4096)
+def _format_message(msg: Message) -> dict:
+    """
+    Message → OpenAI dict（依 Message 值快取）
+
+    多輪對話每次都重送完整歷史，未變動的前綴訊息直接重用同一個 dict。
+    回傳的 dict 為共享物件，呼叫端不可修改。
+    """
+    return {"role": msg.role, "content": msg.content}
+
+
 class OpenAIProvider(LLMProvider):
     """OpenAI GPT API Provider"""
 
@@ -20,18 +32,24 @@ class OpenAIProvider(LLMProvider):
     cost_per_1k_input = 0.005
     cost_per_1k_output = 0.015
 
+    retryable_errors = (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
     def __init__(self, api_key: str, model_name: str = "gpt-4o"):
         super().__init__(api_key, model_name)
         self.client = openai.AsyncOpenAI(api_key=api_key)
 
-    async def chat(
+    async def _chat(
         self,
         messages: List[Message],
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None,
+        temperature: float,
+        max_tokens: Optional[int],
     ) -> LLMResponse:
         """發送對話請求到 OpenAI"""
-        start = time.time()
+        start = time.perf_counter()
 
         # 轉換訊息格式
         formatted = self._format_messages(messages)
@@ -44,7 +62,7 @@ class OpenAIProvider(LLMProvider):
             max_tokens=max_tokens,
         )
 
-        latency = (time.time() - start) * 1000
+        latency = (time.perf_counter() - start) * 1000
 
         # 取得 token 用量
         input_tokens = response.usage.prompt_tokens
@@ -53,20 +71,55 @@ class OpenAIProvider(LLMProvider):
         # 取得回應內容
         content = response.choices[0].message.content or ""
 
-        return LLMResponse(
-            content=content,
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            cost_usd=self.calculate_cost(input_tokens, output_tokens),
+        return self._emit_response(input_tokens, output_tokens, latency, content)
+
+    async def stream(
+        self,
+        messages: List[Message],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        on_complete: Optional[Callable[[LLMResponse], None]] = None,
+    ) -> AsyncIterator[str]:
+        """串流對話請求到 OpenAI"""
+        self.check_token_budget(messages)
+        start = time.perf_counter()
+
+        formatted = self._format_messages(messages)
+
+        response = await self.client.chat.completions.create(
             model=self.model_name,
-            provider=self.provider_name,
-            latency_ms=latency,
+            messages=formatted,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
         )
 
+        parts: List[str] = []
+        usage = None
+        async for chunk in response:
+            # 最後一個 chunk 只帶 usage、沒有 choices
+            if chunk.usage:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                delta = chunk.choices[0].delta.content
+                parts.append(delta)
+                yield delta
+
+        if on_complete:
+            input_tokens = usage.prompt_tokens if usage else 0
+            output_tokens = usage.completion_tokens if usage else 0
+            on_complete(self._emit_response(
+                input_tokens,
+                output_tokens,
+                (time.perf_counter() - start) * 1000,
+                "".join(parts),
+            ))
+
     def _format_messages(self, messages: List[Message]) -> List[dict]:
         """
         轉換訊息格式為 OpenAI 格式
 
         OpenAI 原生支援 system, user, assistant 角色
         """
-        return [{"role": msg.role, "content": msg.content} for msg in messages]
+        return [_format_message(msg) for msg in messages]
@@ -0,0 +1,117 @@
+"""
+LLM Provider Resilience
+
+- 重試：暫時性錯誤（429 / 5xx / 連線中斷）以 exponential backoff + jitter 重試
+- Circuit Breaker：連續失敗達門檻即開路，短時間內不再送請求到該 Provider，
+  由 LLMProviderFactory 改選其他 Provider
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# 重試設定
+MAX_ATTEMPTS = 5
+BACKOFF_MULTIPLIER = 0.5  # 秒
+BACKOFF_MAX = 20.0  # 秒
+
+# Circuit breaker 設定
+FAILURE_THRESHOLD = 5
+RECOVERY_TIMEOUT = 30.0  # 秒
+
+
+class CircuitState(Enum):
+    """Circuit breaker 狀態"""
+    CLOSED = "closed"        # 正常
+    OPEN = "open"            # 開路，拒絕請求
+    HALF_OPEN = "half_open"  # 試探中，允許一次請求
+
+
+class CircuitOpenError(RuntimeError):
+    """Provider 的 circuit 已開路"""
+
+    def __init__(self, provider_name: str):
+        self.provider_name = provider_name
+        super().__init__(f"Circuit open for provider '{provider_name}'")
+
+
+@dataclass
+class CircuitBreaker:
+    """單一 Provider 的 circuit breaker"""
+    name: str
+    failure_threshold: int = FAILURE_THRESHOLD
+    recovery_timeout: float = RECOVERY_TIMEOUT
+    state: CircuitState = CircuitState.CLOSED
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+
+    # 統計
+    total_successes: int = 0
+    total_failures: int = 0
+
+    @property
+    def is_open(self) -> bool:
+        """是否開路中（超過 recovery_timeout 視為可試探）"""
+        return (
+            self.state == CircuitState.OPEN
+            and time.monotonic() - self.opened_at < self.recovery_timeout
+        )
+
+    def allow_request(self) -> bool:
+        """是否允許送出請求"""
+        if self.state == CircuitState.OPEN:
+            if self.is_open:
+                return False
+            self.state = CircuitState.HALF_OPEN
+        return True
+
+    def record_success(self) -> None:
+        self.total_successes += 1
+        self.consecutive_failures = 0
+        self.state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != CircuitState.OPEN:
+                logger.warning(
+                    f"Circuit opened for provider '{self.name}' "
+                    f"after {self.consecutive_failures} consecutive failures"
+                )
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "consecutive_failures": self.consecutive_failures,
+            "total_successes": self.total_successes,
+            "total_failures": self.total_failures,
+        }
+
+
+# === Global registry（依 provider 名稱共用） ===
+
+_circuits: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit(provider_name: str) -> CircuitBreaker:
+    """取得 Provider 的 circuit breaker"""
+    circuit = _circuits.get(provider_name)
+    if circuit is None:
+        circuit = _circuits[provider_name] = CircuitBreaker(name=provider_name)
+    return circuit
+
+
+def get_circuit_stats() -> Dict[str, Dict[str, Any]]:
+    """所有 Provider 的 circuit 狀態與失敗計數"""
+    return {name: c.to_dict() for name, c in _circuits.items()}
@@ -2,38 +2,78 @@
 Nexus AI Company - FastAPI Application Entry Point
 """
 
+import asyncio
+import logging
+import os
 from contextlib import asynccontextmanager
+from importlib import import_module
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-
-from app.api import activity, agents, catalog, ceo, ceo_todo, control, dashboard, developer, goals, health, intake, knowledge, pipeline, pm, product, qa, sales, task_lifecycle, tasks
+from fastapi.responses import ORJSONResponse
+
+from app.agents.developer import get_developer_agent
+from app.agents.gatekeeper import GatekeeperAgent
+from app.agents.orchestrator import OrchestratorAgent
+from app.agents.pm import get_pm_agent
+from app.agents.qa import get_qa_agent
+from app.agents.registry import AgentRegistry, set_registry
+from app.agents.sales import get_sales_agent
 from app.agents.ws_manager import ConnectionManager, set_ws_manager, get_ws_manager
-from app.db.database import create_tables
+from app.db.database import AsyncSessionLocal, ScopedSessionMiddleware, create_tables
+from app.llm.batch import run_batch_poller
+
+# 使用 uvloop 取代預設 asyncio loop（uvicorn[standard] 已內含）
+try:
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+REDIS_MAX_CONNECTIONS = 50
+
+
+async def _connect_redis(redis_url: str):
+    """連線 Redis 並 ping，失敗時回傳 None"""
+    try:
+        import redis.asyncio as aioredis
+
+        # 共用連線池：MessageBus / Agent 狀態 / LLM 快取共用 socket
+        # （redis[hiredis] 已安裝時自動使用 C parser）
+        pool = aioredis.ConnectionPool.from_url(
+            redis_url,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            decode_responses=True,
+            retry_on_timeout=True,
+        )
+        redis_client = aioredis.Redis(connection_pool=pool)
+
+        # 檢查連線
+        if await redis_client.ping():
+            return redis_client
+        logger.warning("Redis ping failed, MessageBus disabled")
+        await redis_client.aclose(close_connection_pool=True)
+    except Exception as e:
+        logger.warning(f"Redis unavailable ({e}), MessageBus disabled — running without it")
+    return None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
-    import os
-
-    # Startup
-    await create_tables()
+    # Startup：建表與 Redis 連線互不相依，同時進行
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    tables_task = asyncio.create_task(create_tables())
+    redis_task = asyncio.create_task(_connect_redis(redis_url))
 
     # 初始化 WebSocket Manager
     ws_mgr = ConnectionManager()
     set_ws_manager(ws_mgr)
 
     # 初始化 Agent Registry
-    from app.db.database import AsyncSessionLocal
-    from app.agents.registry import AgentRegistry, set_registry
-    from app.agents.gatekeeper import GatekeeperAgent
-    from app.agents.pm import get_pm_agent
-    from app.agents.sales import get_sales_agent
-    from app.agents.orchestrator import OrchestratorAgent
-    from app.agents.developer import get_developer_agent
-    from app.agents.qa import get_qa_agent
-
     registry = AgentRegistry(session_factory=AsyncSessionLocal)
     registry.register(GatekeeperAgent())
     registry.register(get_pm_agent())
@@ -43,50 +83,45 @@ async def lifespan(app: FastAPI):
     registry.register(get_qa_agent())
     set_registry(registry)
 
-    # 初始化 Redis + Message Bus
-    redis_client = None
-    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    _, redis_client = await asyncio.gather(tables_task, redis_task)
 
-    try:
-        import redis.asyncio as aioredis
+    # 初始化 Message Bus
+    if redis_client:
         from app.agents.message_bus import MessageBus, set_bus
 
-        redis_client = aioredis.from_url(
-            redis_url,
-            decode_responses=True,
-            retry_on_timeout=True,
+        bus = MessageBus(
+            redis_client=redis_client,
+            registry=registry,
+            session_factory=AsyncSessionLocal,
         )
+        set_bus(bus)
 
-        # 檢查連線
-        if await redis_client.ping():
-            bus = MessageBus(
-                redis_client=redis_client,
-                registry=registry,
-                session_factory=AsyncSessionLocal,
-            )
-            set_bus(bus)
-
-            # Agent 狀態持久化：設定 Redis singleton + 恢復狀態
-            from app.agents.agent_state import set_redis
-            from app.api.agents import restore_agent_states
-            set_redis(redis_client)
-            await restore_agent_states()
-
-            print(f"   Redis connected: {redis_url}")
-        else:
-            print(f"   Redis ping failed, MessageBus disabled")
-    except Exception as e:
-        print(f"   Redis unavailable ({e}), MessageBus disabled — running without it")
-        redis_client = None
+        # Agent 狀態持久化：設定 Redis singleton + 恢復狀態
+        from app.agents.agent_state import set_redis
+        from app.api.agents import restore_agent_states
+        from app.llm import cache as llm_cache
+        set_redis(redis_client)
+        llm_cache.set_redis(redis_client)
+        await restore_agent_states()
+
+        logger.info(f"Redis connected: {redis_url}")
 
-    print("🚀 Nexus AI Company is starting up...")
-    print(f"   Registered agents: {[a['id'] for a in registry.list_agents()]}")
+    # LLM Batch poller（收回 OpenAI / Anthropic batch 結果）
+    batch_poller = asyncio.create_task(run_batch_poller(AsyncSessionLocal))
+
+    logger.info("🚀 Nexus AI Company is starting up...")
+    logger.info(f"Registered agents: {[a['id'] for a in registry.list_agents()]}")
     yield
     # Shutdown
+    batch_poller.cancel()
+    try:
+        await batch_poller
+    except asyncio.CancelledError:
+        pass
     if redis_client:
-        await redis_client.aclose()
-        print("   Redis connection closed")
-    print("👋 Nexus AI Company is shutting down...")
+        await redis_client.aclose(close_connection_pool=True)
+        logger.info("Redis connection closed")
+    logger.info("👋 Nexus AI Company is shutting down...")
 
 
 app = FastAPI(
@@ -94,6 +129,7 @@ app = FastAPI(
     description="零員工、全智能的虛擬企業系統 API",
     version="0.8.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -105,26 +141,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request 範圍的 DB session（同一 request 內 repository 呼叫共用）
+app.add_middleware(ScopedSessionMiddleware)
+
 # Include routers
-app.include_router(health.router, tags=["Health"])
-app.include_router(agents.router, prefix="/api/v1/agents", tags=["Agents"])
-app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["Tasks"])
-app.include_router(ceo.router, prefix="/api/v1/ceo", tags=["CEO"])
-app.include_router(ceo_todo.router, prefix="/api/v1/ceo", tags=["CEO To-Do"])
-app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
-app.include_router(control.router, prefix="/api/v1/control", tags=["Control"])
-app.include_router(intake.router, prefix="/api/v1/intake", tags=["CEO Intake"])
-app.include_router(goals.router, prefix="/api/v1/goals", tags=["Goals"])
-app.include_router(pipeline.router, prefix="/api/v1/pipeline", tags=["Sales Pipeline"])
-app.include_router(product.router, prefix="/api/v1/product", tags=["Product Board"])
-app.include_router(catalog.router, prefix="/api/v1/catalog", tags=["Product Catalog"])
-app.include_router(knowledge.router, prefix="/api/v1/knowledge", tags=["Knowledge Base"])
-app.include_router(activity.router, prefix="/api/v1/activity", tags=["Agent Activity Log"])
-app.include_router(pm.router, prefix="/api/v1/pm", tags=["PM Agent"])
-app.include_router(developer.router, prefix="/api/v1/developer", tags=["Developer Agent"])
-app.include_router(qa.router, prefix="/api/v1/qa", tags=["QA Agent"])
-app.include_router(sales.router, prefix="/api/v1/sales", tags=["Sales Agent"])
-app.include_router(task_lifecycle.router, prefix="/api/v1/task", tags=["Task Lifecycle"])
+# (module, prefix, tag)
+ROUTERS = [
+    ("health", "", "Health"),
+    ("agents", "/api/v1/agents", "Agents"),
+    ("tasks", "/api/v1/tasks", "Tasks"),
+    ("ceo", "/api/v1/ceo", "CEO"),
+    ("ceo_todo", "/api/v1/ceo", "CEO To-Do"),
+    ("dashboard", "/api/v1/dashboard", "Dashboard"),
+    ("control", "/api/v1/control", "Control"),
+    ("intake", "/api/v1/intake", "CEO Intake"),
+    ("goals", "/api/v1/goals", "Goals"),
+    ("pipeline", "/api/v1/pipeline", "Sales Pipeline"),
+    ("product", "/api/v1/product", "Product Board"),
+    ("catalog", "/api/v1/catalog", "Product Catalog"),
+    ("knowledge", "/api/v1/knowledge", "Knowledge Base"),
+    ("activity", "/api/v1/activity", "Agent Activity Log"),
+    ("pm", "/api/v1/pm", "PM Agent"),
+    ("developer", "/api/v1/developer", "Developer Agent"),
+    ("qa", "/api/v1/qa", "QA Agent"),
+    ("sales", "/api/v1/sales", "Sales Agent"),
+    ("task_lifecycle", "/api/v1/task", "Task Lifecycle"),
+    ("llm", "/api/v1/llm", "LLM"),
+]
+
+# 可用 DISABLED_ROUTERS（逗號分隔）關閉的 router，關閉時不會被 import
+OPTIONAL_ROUTERS = {"knowledge", "developer"}
+_disabled_routers = {
+    name.strip() for name in os.getenv("DISABLED_ROUTERS", "").split(",") if name.strip()
+} & OPTIONAL_ROUTERS
+
+for _name, _prefix, _tag in ROUTERS:
+    if _name in _disabled_routers:
+        continue
+    app.include_router(
+        import_module(f"app.api.{_name}").router, prefix=_prefix, tags=[_tag]
+    )
 
 
 @app.websocket("/ws")
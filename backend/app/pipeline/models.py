@@ -4,11 +4,13 @@ Sales Pipeline Models
 銷售管道資料模型
 """
 
-from dataclasses import dataclass, field
+import os
+import sys
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional
-from uuid import uuid4
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 
 class OpportunityStage(Enum):
@@ -50,6 +52,47 @@ class ActivityType(Enum):
     TASK = "task"
 
 
+# 成員 -> intern 過的 value（序列化時直接查表）
+_ENUM_VALUE: Dict[Enum, str] = {
+    member: sys.intern(member.value)
+    for enum_cls in (OpportunityStage, OpportunityStatus, ContactRole, ActivityType)
+    for member in enum_cls
+}
+
+
+class _IdPool:
+    """
+    預先取得的隨機位元組池
+
+    一次讀取 4 KiB 亂數後切片使用，用完再整批補充，
+    大量建立物件時不必每個 ID 都呼叫一次 uuid4()。
+    """
+
+    SIZE = 4096
+
+    def __init__(self):
+        self.reset()
+
+    def next_hex(self, n_bytes: int) -> str:
+        """取得 n_bytes 個隨機位元組的大寫 hex 字串"""
+        pos = self._pos
+        if pos + n_bytes > len(self._buf):
+            self._buf = os.urandom(self.SIZE)
+            pos = 0
+        self._pos = pos + n_bytes
+        return self._buf[pos:pos + n_bytes].hex().upper()
+
+    def reset(self) -> None:
+        """捨棄剩餘位元組（fork 後子行程不可沿用父行程的池）"""
+        self._buf = b""
+        self._pos = 0
+
+
+_id_pool = _IdPool()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_id_pool.reset)
+
+
 # 階段對應的成交機率
 STAGE_PROBABILITIES = {
     OpportunityStage.LEAD: 0.10,
@@ -72,8 +115,31 @@ STAGE_ORDER = [
     OpportunityStage.WON,
 ]
 
+# 階段 -> 在 STAGE_ORDER 中的位置（取代 list.index 線性搜尋）
+_STAGE_INDEX = {stage: i for i, stage in enumerate(STAGE_ORDER)}
+
+# 不需轉換、可直接放入 dict 的型別
+# （datetime 保留原物件，於 API 邊界由 orjson 直接格式化）
+_ATOMIC_TYPES = frozenset({str, int, float, bool, type(None), datetime})
+
+
+def _fast_asdict(obj: Any, names: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    依 names 順序取出屬性組成 dict（取代 dataclasses.asdict）
+
+    不做 deepcopy：atomic 值直接放入，Enum 取 _ENUM_VALUE 的 value，
+    其餘（list / dict）沿用原物件。names 可包含 property。
+    """
+    result = {}
+    for name in names:
+        value = getattr(obj, name)
+        if type(value) not in _ATOMIC_TYPES and isinstance(value, Enum):
+            value = _ENUM_VALUE.get(value, value.value)
+        result[name] = value
+    return result
 
-@dataclass
+
+@dataclass(slots=True)
 class Contact:
     """聯絡人"""
     id: str
@@ -86,21 +152,13 @@ class Contact:
 
     def __post_init__(self):
         if not self.id:
-            self.id = f"CON-{uuid4().hex[:8].upper()}"
+            self.id = f"CON-{_id_pool.next_hex(4)}"
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "name": self.name,
-            "title": self.title,
-            "email": self.email,
-            "phone": self.phone,
-            "role": self.role.value,
-            "notes": self.notes,
-        }
+        return _fast_asdict(self, _CONTACT_KEYS)
 
 
-@dataclass
+@dataclass(slots=True)
 class Activity:
     """活動/互動紀錄"""
     id: str
@@ -126,27 +184,84 @@ class Activity:
 
     def __post_init__(self):
         if not self.id:
-            self.id = f"ACT-{uuid4().hex[:8].upper()}"
+            self.id = f"ACT-{_id_pool.next_hex(4)}"
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "opportunity_id": self.opportunity_id,
-            "type": self.type.value,
-            "subject": self.subject,
-            "occurred_at": self.occurred_at.isoformat(),
-            "duration_minutes": self.duration_minutes,
-            "summary": self.summary,
-            "attendees": self.attendees,
-            "next_action": self.next_action,
-            "next_action_due": self.next_action_due.isoformat() if self.next_action_due else None,
-            "meddic_updates": self.meddic_updates,
-            "created_by": self.created_by,
-            "created_at": self.created_at.isoformat(),
-        }
+        return _fast_asdict(self, _ACTIVITY_KEYS)
+
+
+_CONTACT_KEYS = tuple(f.name for f in fields(Contact))
+_ACTIVITY_KEYS = tuple(f.name for f in fields(Activity))
+
 
+# Economic Buyer 接觸程度分類
+_EB_READY_LEVELS = frozenset({"meeting", "committed"})
+_EB_NOT_CONTACTED_LEVELS = frozenset({"unknown", "identified"})
 
-@dataclass
+# 缺口 → 建議下一步（依缺口順序）
+_GAP_ACTIONS = {
+    "痛點未確認": "進行 Discovery Call 了解客戶痛點",
+    "痛點強度不足": "量化痛點的商業影響",
+    "尚未找到 Champion": "識別並培養內部支持者",
+    "Champion 影響力不足": "尋找更高層級的支持者",
+    "Economic Buyer 未確認": "向 Champion 確認決策者是誰",
+    "尚未接觸 Economic Buyer": "透過 Champion 安排與決策者會議",
+}
+
+
+class MEDDICSnapshot(NamedTuple):
+    """MEDDIC 衍生值（同一組評分只計算一次）"""
+    total_score: int
+    health: str
+    gaps: Tuple[str, ...]
+    next_actions: Tuple[str, ...]
+
+
+@lru_cache(maxsize=1024)
+def _compute_meddic(key: Tuple[int, bool, int, bool, int, bool, str]) -> MEDDICSnapshot:
+    """
+    由評分欄位計算 (total_score, health, gaps, next_actions)
+
+    結果只取決於評分欄位，以欄位 tuple 為 key 快取；
+    欄位變動時 key 不同，不需手動失效。
+    """
+    (pain_score, pain_identified, champion_score, champion_identified,
+     eb_score, eb_identified, eb_access_level) = key
+
+    # Pain: 30%, Champion: 35%, EB: 35%
+    pain = pain_score * 3  # max 30
+    champion = int(champion_score * 3.5)  # max ~31
+    eb = int(eb_score * 3.5)  # max 35
+    total = min(100, pain + champion + eb)
+
+    if total >= 70:
+        health = "healthy"
+    elif total >= 50:
+        health = "at_risk"
+    elif total >= 30:
+        health = "needs_attention"
+    else:
+        health = "weak"
+
+    gaps = []
+    if not pain_identified:
+        gaps.append("痛點未確認")
+    elif pain_score < 6:
+        gaps.append("痛點強度不足")
+    if not champion_identified:
+        gaps.append("尚未找到 Champion")
+    elif champion_score < 6:
+        gaps.append("Champion 影響力不足")
+    if not eb_identified:
+        gaps.append("Economic Buyer 未確認")
+    elif eb_access_level in _EB_NOT_CONTACTED_LEVELS:
+        gaps.append("尚未接觸 Economic Buyer")
+
+    actions = tuple(_GAP_ACTIONS[g] for g in gaps) or ("持續推進，準備提案",)
+    return MEDDICSnapshot(total, health, tuple(gaps), actions)
+
+
+@dataclass(slots=True)
 class MEDDICScore:
     """MEDDIC 分數快照"""
     pain_score: int = 0
@@ -163,69 +278,41 @@ class MEDDICScore:
     eb_name: Optional[str] = None
     eb_access_level: str = "unknown"
 
+    def snapshot(self) -> MEDDICSnapshot:
+        """取得（快取的）衍生值，需要多個衍生值時優先使用"""
+        return _compute_meddic((
+            self.pain_score, self.pain_identified,
+            self.champion_score, self.champion_identified,
+            self.eb_score, self.eb_identified, self.eb_access_level,
+        ))
+
     @property
     def total_score(self) -> int:
         """總分 0-100"""
-        # Pain: 30%, Champion: 35%, EB: 35%
-        pain = self.pain_score * 3  # max 30
-        champion = int(self.champion_score * 3.5)  # max ~31
-        eb = int(self.eb_score * 3.5)  # max 35
-        return min(100, pain + champion + eb)
+        return self.snapshot().total_score
 
     @property
     def health(self) -> str:
         """Deal 健康度"""
-        score = self.total_score
-        if score >= 70:
-            return "healthy"
-        elif score >= 50:
-            return "at_risk"
-        elif score >= 30:
-            return "needs_attention"
-        else:
-            return "weak"
+        return self.snapshot().health
 
     def get_gaps(self) -> List[str]:
         """找出缺口"""
-        gaps = []
-        if not self.pain_identified:
-            gaps.append("痛點未確認")
-        elif self.pain_score < 6:
-            gaps.append("痛點強度不足")
-        if not self.champion_identified:
-            gaps.append("尚未找到 Champion")
-        elif self.champion_score < 6:
-            gaps.append("Champion 影響力不足")
-        if not self.eb_identified:
-            gaps.append("Economic Buyer 未確認")
-        elif self.eb_access_level in ["unknown", "identified"]:
-            gaps.append("尚未接觸 Economic Buyer")
-        return gaps
-
-    def get_next_actions(self) -> List[str]:
-        """建議下一步"""
-        actions = []
-        gaps = self.get_gaps()
-
-        if "痛點未確認" in gaps:
-            actions.append("進行 Discovery Call 了解客戶痛點")
-        if "痛點強度不足" in gaps:
-            actions.append("量化痛點的商業影響")
-        if "尚未找到 Champion" in gaps:
-            actions.append("識別並培養內部支持者")
-        if "Champion 影響力不足" in gaps:
-            actions.append("尋找更高層級的支持者")
-        if "Economic Buyer 未確認" in gaps:
-            actions.append("向 Champion 確認決策者是誰")
-        if "尚未接觸 Economic Buyer" in gaps:
-            actions.append("透過 Champion 安排與決策者會議")
-
-        if not actions:
-            actions.append("持續推進，準備提案")
-
-        return actions
+        return list(self.snapshot().gaps)
+
+    def get_next_actions(self, gaps: Optional[List[str]] = None) -> List[str]:
+        """
+        建議下一步
+
+        Args:
+            gaps: 已算好的缺口（省略時依目前分數計算）
+        """
+        if gaps is None:
+            return list(self.snapshot().next_actions)
+        return [_GAP_ACTIONS[g] for g in gaps] or ["持續推進，準備提案"]
 
     def to_dict(self) -> Dict[str, Any]:
+        total, health, gaps, actions = self.snapshot()
         return {
             "pain": {
                 "score": self.pain_score,
@@ -244,14 +331,36 @@ class MEDDICScore:
                 "name": self.eb_name,
                 "access_level": self.eb_access_level,
             },
-            "total_score": self.total_score,
-            "health": self.health,
-            "gaps": self.get_gaps(),
-            "next_actions": self.get_next_actions(),
+            "total_score": total,
+            "health": health,
+            "gaps": list(gaps),
+            "next_actions": list(actions),
         }
 
 
-@dataclass
+@dataclass(slots=True)
+class OpportunitySummary:
+    """商機摘要（slots dataclass，orjson 可直接輸出，不需先轉成 dict）"""
+    id: str
+    name: str
+    company: str
+    amount: Optional[float]
+    stage: str
+    status: str
+    meddic_score: int
+    meddic_health: str
+    win_probability: float
+    weighted_amount: float
+    days_in_stage: int
+    is_stale: bool
+    champion: Optional[str]
+    expected_close: Optional[datetime]
+
+
+_SUMMARY_KEYS = tuple(f.name for f in fields(OpportunitySummary))
+
+
+@dataclass(slots=True)
 class Opportunity:
     """商機"""
     id: str
@@ -297,32 +406,61 @@ class Opportunity:
     # 關聯 Goal（成交後）
     related_goal_id: Optional[str] = None
 
+    # 角色 -> 聯絡人（每個角色取第一位）
+    _contacts_by_role: Dict[ContactRole, Contact] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
     def __post_init__(self):
         if not self.id:
-            self.id = f"OPP-{datetime.now().strftime('%Y%m%d')}-{uuid4().hex[:4].upper()}"
+            self.id = f"OPP-{datetime.now().strftime('%Y%m%d')}-{_id_pool.next_hex(2)}"
+        self.reindex_contacts()
+
+    def add_contact(self, contact: Contact) -> None:
+        """新增聯絡人（同步更新角色索引）"""
+        self.contacts.append(contact)
+        self._contacts_by_role.setdefault(contact.role, contact)
+
+    def reindex_contacts(self) -> None:
+        """依 contacts 重建角色索引（聯絡人角色變更後呼叫）"""
+        by_role: Dict[ContactRole, Contact] = {}
+        for contact in self.contacts:
+            by_role.setdefault(contact.role, contact)
+        self._contacts_by_role = by_role
 
     @property
     def days_in_stage(self) -> int:
         """在當前階段的天數"""
-        return (datetime.utcnow() - self.stage_entered_at).days
+        return self.days_in_stage_as_of(datetime.utcnow())
 
     @property
     def days_since_activity(self) -> Optional[int]:
         """距離上次活動的天數"""
-        if self.last_activity_at:
-            return (datetime.utcnow() - self.last_activity_at).days
-        return None
+        return self.days_since_activity_as_of(datetime.utcnow())
 
     @property
     def is_stale(self) -> bool:
         """超過 14 天沒有活動"""
-        days = self.days_since_activity
+        return self.is_stale_as_of(datetime.utcnow())
+
+    # 以下 *_as_of 接受呼叫端傳入的 now，批次處理時整批共用同一個時間點
+
+    def days_in_stage_as_of(self, now: datetime) -> int:
+        return (now - self.stage_entered_at).days
+
+    def days_since_activity_as_of(self, now: datetime) -> Optional[int]:
+        if self.last_activity_at:
+            return (now - self.last_activity_at).days
+        return None
+
+    def is_stale_as_of(self, now: datetime) -> bool:
+        days = self.days_since_activity_as_of(now)
         return days is not None and days > 14
 
     @property
     def win_probability(self) -> float:
         """成交機率"""
-        return STAGE_PROBABILITIES.get(self.stage, 0.0)
+        return STAGE_PROBABILITIES[self.stage]
 
     @property
     def weighted_amount(self) -> float:
@@ -334,18 +472,12 @@ class Opportunity:
     @property
     def champion(self) -> Optional[Contact]:
         """取得 Champion"""
-        for contact in self.contacts:
-            if contact.role == ContactRole.CHAMPION:
-                return contact
-        return None
+        return self._contacts_by_role.get(ContactRole.CHAMPION)
 
     @property
     def economic_buyer(self) -> Optional[Contact]:
         """取得 Economic Buyer"""
-        for contact in self.contacts:
-            if contact.role == ContactRole.ECONOMIC_BUYER:
-                return contact
-        return None
+        return self._contacts_by_role.get(ContactRole.ECONOMIC_BUYER)
 
     def can_advance_to(self, target_stage: OpportunityStage) -> tuple[bool, List[str]]:
         """檢查是否可以推進到目標階段"""
@@ -360,7 +492,7 @@ class Opportunity:
                 blockers.append("需要先找到 Champion")
 
         elif target_stage == OpportunityStage.PROPOSAL:
-            if self.meddic.eb_access_level not in ["meeting", "committed"]:
+            if self.meddic.eb_access_level not in _EB_READY_LEVELS:
                 blockers.append("需要先與 Economic Buyer 會面")
 
         elif target_stage == OpportunityStage.NEGOTIATION:
@@ -373,11 +505,17 @@ class Opportunity:
 
         return len(blockers) == 0, blockers
 
+    def next_stage(self) -> Optional[OpportunityStage]:
+        """下一個階段（已在最終階段或不在階段序列中時為 None）"""
+        current_index = _STAGE_INDEX.get(self.stage, -1)
+        if 0 <= current_index < len(STAGE_ORDER) - 1:
+            return STAGE_ORDER[current_index + 1]
+        return None
+
     def advance_stage(self) -> Optional[OpportunityStage]:
         """推進到下一階段"""
-        current_index = STAGE_ORDER.index(self.stage) if self.stage in STAGE_ORDER else -1
-        if current_index >= 0 and current_index < len(STAGE_ORDER) - 1:
-            next_stage = STAGE_ORDER[current_index + 1]
+        next_stage = self.next_stage()
+        if next_stage is not None:
             can_advance, _ = self.can_advance_to(next_stage)
             if can_advance:
                 self.stage = next_stage
@@ -387,51 +525,72 @@ class Opportunity:
                 return next_stage
         return None
 
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "name": self.name,
-            "company": self.company,
-            "amount": self.amount,
-            "currency": self.currency,
-            "stage": self.stage.value,
-            "stage_entered_at": self.stage_entered_at.isoformat(),
-            "days_in_stage": self.days_in_stage,
-            "meddic": self.meddic.to_dict(),
-            "contacts": [c.to_dict() for c in self.contacts],
-            "champion": self.champion.to_dict() if self.champion else None,
-            "economic_buyer": self.economic_buyer.to_dict() if self.economic_buyer else None,
-            "created_at": self.created_at.isoformat(),
-            "expected_close": self.expected_close.isoformat() if self.expected_close else None,
-            "last_activity_at": self.last_activity_at.isoformat() if self.last_activity_at else None,
-            "days_since_activity": self.days_since_activity,
-            "is_stale": self.is_stale,
-            "source": self.source,
-            "source_detail": self.source_detail,
-            "owner": self.owner,
-            "status": self.status.value,
-            "win_probability": self.win_probability,
-            "weighted_amount": self.weighted_amount,
-            "lost_reason": self.lost_reason,
-            "notes": self.notes,
-            "related_goal_id": self.related_goal_id,
-        }
-
-    def to_summary(self) -> Dict[str, Any]:
-        """簡化摘要"""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "company": self.company,
-            "amount": self.amount,
-            "stage": self.stage.value,
-            "status": self.status.value,
-            "meddic_score": self.meddic.total_score,
-            "meddic_health": self.meddic.health,
-            "win_probability": self.win_probability,
-            "weighted_amount": self.weighted_amount,
-            "days_in_stage": self.days_in_stage,
-            "is_stale": self.is_stale,
-            "champion": self.champion.name if self.champion else None,
-            "expected_close": self.expected_close.isoformat() if self.expected_close else None,
-        }
+    def to_dict(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        if now is None:
+            now = datetime.utcnow()
+        result = _fast_asdict(self, _OPPORTUNITY_KEYS)
+        days_since_activity = self.days_since_activity_as_of(now)
+        result["days_in_stage"] = self.days_in_stage_as_of(now)
+        result["days_since_activity"] = days_since_activity
+        result["is_stale"] = days_since_activity is not None and days_since_activity > 14
+        champion = self.champion
+        economic_buyer = self.economic_buyer
+        result["meddic"] = self.meddic.to_dict()
+        result["contacts"] = [c.to_dict() for c in self.contacts]
+        result["champion"] = champion.to_dict() if champion else None
+        result["economic_buyer"] = economic_buyer.to_dict() if economic_buyer else None
+        return result
+
+    def summary(
+        self,
+        now: Optional[datetime] = None,
+        meddic: Optional[MEDDICSnapshot] = None,
+    ) -> "OpportunitySummary":
+        """
+        簡化摘要（API 層由 orjson 直接序列化）
+
+        Args:
+            now: 計算天數用的時間點（省略時取目前時間）
+            meddic: 呼叫端已取得的 MEDDIC 快照（省略時重新取得）
+        """
+        if now is None:
+            now = datetime.utcnow()
+        if meddic is None:
+            meddic = self.meddic.snapshot()
+        champion = self.champion
+        probability = self.win_probability
+        return OpportunitySummary(
+            self.id,
+            self.name,
+            self.company,
+            self.amount,
+            _ENUM_VALUE[self.stage],
+            _ENUM_VALUE[self.status],
+            meddic.total_score,
+            meddic.health,
+            probability,
+            self.amount * probability if self.amount else 0.0,
+            self.days_in_stage_as_of(now),
+            self.is_stale_as_of(now),
+            champion.name if champion else None,
+            self.expected_close,
+        )
+
+    def to_summary(
+        self,
+        now: Optional[datetime] = None,
+        meddic: Optional[MEDDICSnapshot] = None,
+    ) -> Dict[str, Any]:
+        """簡化摘要（dict 形式）"""
+        return _fast_asdict(self.summary(now, meddic), _SUMMARY_KEYS)
+
+
+# Opportunity.to_dict 的純量欄位與衍生屬性（巢狀物件與時間相關欄位另外處理）
+_OPPORTUNITY_KEYS = (
+    "id", "name", "company", "amount", "currency",
+    "stage", "stage_entered_at",
+    "created_at", "expected_close", "last_activity_at",
+    "source", "source_detail", "owner", "status",
+    "win_probability", "weighted_amount",
+    "lost_reason", "notes", "related_goal_id",
+)
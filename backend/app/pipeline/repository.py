@@ -4,11 +4,18 @@ Sales Pipeline Repository
 In-memory 儲存（Tracer Bullet 版本）
 """
 
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from bisect import insort
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson
 
 from app.pipeline.models import (
     Opportunity,
+    OpportunitySummary,
     OpportunityStage,
     OpportunityStatus,
     Contact,
@@ -20,19 +27,115 @@ from app.pipeline.models import (
 )
 
 
+def dumps(obj: Any) -> bytes:
+    """
+    序列化為 JSON bytes
+
+    orjson 原生支援 dict / list / datetime / Enum / dataclass，
+    API 層直接回傳 bytes，不經 jsonable_encoder 逐欄位轉換。
+    naive datetime（皆為 UTC）輸出時加上 +00:00。
+    """
+    return orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC)
+
+
+# 需要關注的 MEDDIC 健康度
+_UNHEALTHY_HEALTHS = frozenset({"at_risk", "needs_attention", "weak"})
+
+
+def _newest_first(activity: Activity) -> timedelta:
+    """活動排序 key：越新越小"""
+    return datetime.max - activity.occurred_at
+
+
+@dataclass(slots=True)
+class _Totals:
+    """累計值（count / amount / weighted_amount）"""
+    count: int = 0
+    amount: float = 0.0
+    weighted: float = 0.0
+
+    def add(self, amount: float, weighted: float, sign: int = 1) -> None:
+        self.count += sign
+        if self.count == 0:
+            # 歸零時重設，避免浮點加減殘差
+            self.amount = 0.0
+            self.weighted = 0.0
+        else:
+            self.amount += sign * amount
+            self.weighted += sign * weighted
+
+
 class PipelineRepository:
     """Pipeline 儲存庫"""
 
     def __init__(self):
         self._opportunities: Dict[str, Opportunity] = {}
-        self._activities: Dict[str, List[Activity]] = {}  # opp_id -> activities
+        self._activities: Dict[str, List[Activity]] = defaultdict(list)  # opp_id -> activities（首次新增時建立）
+
+        # 次級索引：stage / status / owner -> opp_ids
+        self._by_stage: Dict[OpportunityStage, Set[str]] = defaultdict(set)
+        self._by_status: Dict[OpportunityStatus, Set[str]] = defaultdict(set)
+        self._by_owner: Dict[str, Set[str]] = defaultdict(set)
+        # (status, stage) -> 累計金額，隨每次寫入增量更新
+        self._totals: Dict[Tuple[OpportunityStatus, OpportunityStage], _Totals] = defaultdict(_Totals)
+        # status -> 跨階段累計（與 _totals 同步更新，讀取時不需再加總）
+        self._status_totals: Dict[OpportunityStatus, _Totals] = defaultdict(_Totals)
+        # opp_id -> 最後一次索引時的 (stage, status, owner, amount, weighted_amount)
+        self._index_keys: Dict[str, Tuple[OpportunityStage, OpportunityStatus, str, float, float]] = {}
+        # 批次操作期間延後索引更新（None 表示未延後）
+        self._dirty: Optional[Set[str]] = None
+
+    # === Index Maintenance ===
+
+    def _unindex(self, opp_id: str) -> None:
+        """從次級索引與累計值移除"""
+        keys = self._index_keys.pop(opp_id, None)
+        if keys:
+            stage, status, owner, amount, weighted = keys
+            self._by_stage[stage].discard(opp_id)
+            self._by_status[status].discard(opp_id)
+            self._by_owner[owner].discard(opp_id)
+            self._totals[status, stage].add(amount, weighted, -1)
+            self._status_totals[status].add(amount, weighted, -1)
+
+    @contextmanager
+    def _deferred_indexing(self):
+        """批次操作期間只記錄變動的 opp_id，結束時每筆重建一次索引"""
+        if self._dirty is not None:
+            yield
+            return
+        self._dirty = set()
+        try:
+            yield
+        finally:
+            dirty, self._dirty = self._dirty, None
+            for opp_id in dirty:
+                opp = self._opportunities.get(opp_id)
+                if opp:
+                    self._reindex(opp)
+
+    def _reindex(self, opp: Opportunity) -> None:
+        """依目前的 stage / status / owner / amount 更新次級索引與累計值"""
+        if self._dirty is not None:
+            self._dirty.add(opp.id)
+            return
+        keys = (opp.stage, opp.status, opp.owner, opp.amount or 0, opp.weighted_amount)
+        if self._index_keys.get(opp.id) == keys:
+            return
+        self._unindex(opp.id)
+        self._by_stage[opp.stage].add(opp.id)
+        self._by_status[opp.status].add(opp.id)
+        self._by_owner[opp.owner].add(opp.id)
+        self._totals[opp.status, opp.stage].add(keys[3], keys[4])
+        self._status_totals[opp.status].add(keys[3], keys[4])
+        self._index_keys[opp.id] = keys
 
     # === Opportunity CRUD ===
 
     async def create_opportunity(self, opp: Opportunity) -> Opportunity:
         """建立商機"""
         self._opportunities[opp.id] = opp
-        self._activities[opp.id] = []
+        self._reindex(opp)
         return opp
 
     async def get_opportunity(self, opp_id: str) -> Optional[Opportunity]:
@@ -42,14 +145,15 @@ class PipelineRepository:
     async def update_opportunity(self, opp: Opportunity) -> Opportunity:
         """更新商機"""
         self._opportunities[opp.id] = opp
+        self._reindex(opp)
         return opp
 
     async def delete_opportunity(self, opp_id: str) -> bool:
         """刪除商機"""
         if opp_id in self._opportunities:
             del self._opportunities[opp_id]
-            if opp_id in self._activities:
-                del self._activities[opp_id]
+            self._unindex(opp_id)
+            self._activities.pop(opp_id, None)
             return True
         return False
 
@@ -61,14 +165,22 @@ class PipelineRepository:
         limit: int = 50,
     ) -> List[Opportunity]:
         """列出商機"""
-        results = list(self._opportunities.values())
-
+        buckets = []
         if stage:
-            results = [o for o in results if o.stage == stage]
+            buckets.append(self._by_stage.get(stage, set()))
         if status:
-            results = [o for o in results if o.status == status]
+            buckets.append(self._by_status.get(status, set()))
         if owner:
-            results = [o for o in results if o.owner == owner]
+            buckets.append(self._by_owner.get(owner, set()))
+
+        if buckets:
+            # 從最小的索引集合開始取交集
+            buckets.sort(key=len)
+            ids = buckets[0].intersection(*buckets[1:])
+            opp_by_id = self._opportunities
+            results = [opp_by_id[i] for i in ids]
+        else:
+            results = list(self._opportunities.values())
 
         # 按建立時間排序（最新的在前）
         results.sort(key=lambda o: o.created_at, reverse=True)
@@ -91,6 +203,16 @@ class PipelineRepository:
                 return opp
         return None
 
+    async def bulk_advance_stages(self, opp_ids: List[str]) -> List[Opportunity]:
+        """批次推進階段，回傳成功推進的商機（索引於最後一次更新）"""
+        advanced = []
+        with self._deferred_indexing():
+            for opp_id in opp_ids:
+                opp = await self.advance_stage(opp_id)
+                if opp:
+                    advanced.append(opp)
+        return advanced
+
     async def set_stage(
         self,
         opp_id: str,
@@ -161,14 +283,17 @@ class PipelineRepository:
         limit: int = 100,
     ) -> List[Opportunity]:
         """列出已關閉的商機 (Won/Lost/Dormant)"""
-        results = list(self._opportunities.values())
-
         # 篩選已關閉的
         closed_statuses = [OpportunityStatus.WON, OpportunityStatus.LOST, OpportunityStatus.DORMANT]
-        results = [o for o in results if o.status in closed_statuses]
-
         if status:
-            results = [o for o in results if o.status == status]
+            closed_statuses = [status] if status in closed_statuses else []
+
+        opp_by_id = self._opportunities
+        results = [
+            opp_by_id[i]
+            for s in closed_statuses
+            for i in self._by_status.get(s, ())
+        ]
 
         # 按更新時間排序
         results.sort(key=lambda o: o.stage_entered_at, reverse=True)
@@ -185,7 +310,7 @@ class PipelineRepository:
         """新增聯絡人"""
         opp = await self.get_opportunity(opp_id)
         if opp:
-            opp.contacts.append(contact)
+            opp.add_contact(contact)
 
             # 自動更新 MEDDIC
             if contact.role == ContactRole.CHAMPION:
@@ -220,6 +345,8 @@ class PipelineRepository:
                     for key, value in updates.items():
                         if hasattr(contact, key):
                             setattr(contact, key, value)
+                    if "role" in updates:
+                        opp.reindex_contacts()
                     await self.update_opportunity(opp)
                     return contact
         return None
@@ -229,9 +356,8 @@ class PipelineRepository:
     async def add_activity(self, activity: Activity) -> Activity:
         """新增活動"""
         opp_id = activity.opportunity_id
-        if opp_id not in self._activities:
-            self._activities[opp_id] = []
-        self._activities[opp_id].append(activity)
+        # 依時間由新到舊維持排序（通常是插在最前面）
+        insort(self._activities[opp_id], activity, key=_newest_first)
 
         # 更新商機的最後活動時間
         opp = await self.get_opportunity(opp_id)
@@ -247,10 +373,8 @@ class PipelineRepository:
         limit: int = 20
     ) -> List[Activity]:
         """取得活動列表"""
-        activities = self._activities.get(opp_id, [])
-        # 按時間排序（最新的在前）
-        activities.sort(key=lambda a: a.occurred_at, reverse=True)
-        return activities[:limit]
+        # 寫入時已按時間排序（最新的在前）
+        return self._activities.get(opp_id, [])[:limit]
 
     # === MEDDIC Operations ===
 
@@ -291,75 +415,78 @@ class PipelineRepository:
 
     def get_pipeline_summary(self) -> Dict[str, Any]:
         """取得 Pipeline 摘要"""
-        all_opps = list(self._opportunities.values())
-        open_opps = [o for o in all_opps if o.status == OpportunityStatus.OPEN]
+        now = datetime.utcnow()
+        opp_by_id = self._opportunities
 
-        # 按階段分組
-        by_stage: Dict[str, List[Opportunity]] = {}
-        for stage in OpportunityStage:
-            by_stage[stage.value] = [
-                o for o in open_opps if o.stage == stage
-            ]
-
-        # 計算各階段統計
+        # 各階段統計（讀取累計值）
         stage_stats = {}
-        for stage_value, opps in by_stage.items():
-            stage_stats[stage_value] = {
-                "count": len(opps),
-                "total_amount": sum(o.amount or 0 for o in opps),
-                "weighted_amount": sum(o.weighted_amount for o in opps),
+        for stage in OpportunityStage:
+            totals = self._totals.get((OpportunityStatus.OPEN, stage)) or _Totals()
+            stage_stats[stage.value] = {
+                "count": totals.count,
+                "total_amount": totals.amount,
+                "weighted_amount": totals.weighted,
             }
 
         # 總計
-        total_open = len(open_opps)
-        total_amount = sum(o.amount or 0 for o in open_opps)
-        total_weighted = sum(o.weighted_amount for o in open_opps)
-
-        # 警告
-        stale_opps = [o for o in open_opps if o.is_stale]
-        at_risk = [o for o in open_opps if o.meddic.health in ["at_risk", "needs_attention", "weak"]]
+        open_totals = self._status_totals.get(OpportunityStatus.OPEN) or _Totals()
+
+        # 警告（單次掃描 open 商機，同時出現在兩個清單時共用同一份摘要）
+        stale_summaries: List[OpportunitySummary] = []
+        at_risk_summaries: List[OpportunitySummary] = []
+        for opp_id in self._by_status.get(OpportunityStatus.OPEN, ()):
+            o = opp_by_id[opp_id]
+            meddic = o.meddic.snapshot()
+            stale = o.is_stale_as_of(now)
+            at_risk = meddic.health in _UNHEALTHY_HEALTHS
+            if stale or at_risk:
+                summary = o.summary(now, meddic)
+                if stale:
+                    stale_summaries.append(summary)
+                if at_risk:
+                    at_risk_summaries.append(summary)
+
+        month = now.month
 
         return {
-            "total_open": total_open,
-            "total_amount": total_amount,
-            "total_weighted_amount": total_weighted,
+            "total_open": open_totals.count,
+            "total_amount": open_totals.amount,
+            "total_weighted_amount": open_totals.weighted,
             "by_stage": stage_stats,
             "alerts": {
-                "stale_count": len(stale_opps),
-                "stale_opportunities": [o.to_summary() for o in stale_opps],
-                "at_risk_count": len(at_risk),
-                "at_risk_opportunities": [o.to_summary() for o in at_risk],
+                "stale_count": len(stale_summaries),
+                "stale_opportunities": stale_summaries,
+                "at_risk_count": len(at_risk_summaries),
+                "at_risk_opportunities": at_risk_summaries,
             },
-            "won_this_month": len([
-                o for o in all_opps
-                if o.status == OpportunityStatus.WON
-                and o.stage_entered_at.month == datetime.utcnow().month
-            ]),
-            "lost_this_month": len([
-                o for o in all_opps
-                if o.status == OpportunityStatus.LOST
-                and o.stage_entered_at.month == datetime.utcnow().month
-            ]),
+            "won_this_month": sum(
+                1 for i in self._by_status.get(OpportunityStatus.WON, ())
+                if opp_by_id[i].stage_entered_at.month == month
+            ),
+            "lost_this_month": sum(
+                1 for i in self._by_status.get(OpportunityStatus.LOST, ())
+                if opp_by_id[i].stage_entered_at.month == month
+            ),
         }
 
     def get_statistics(self) -> Dict[str, Any]:
         """取得統計資訊"""
-        all_opps = list(self._opportunities.values())
-
-        won = [o for o in all_opps if o.status == OpportunityStatus.WON]
-        lost = [o for o in all_opps if o.status == OpportunityStatus.LOST]
-        open_opps = [o for o in all_opps if o.status == OpportunityStatus.OPEN]
+        empty = _Totals()
+        won = self._status_totals.get(OpportunityStatus.WON, empty)
+        lost_count = len(self._by_status.get(OpportunityStatus.LOST, ()))
+        open_totals = self._status_totals.get(OpportunityStatus.OPEN, empty)
 
-        win_rate = len(won) / (len(won) + len(lost)) if (len(won) + len(lost)) > 0 else 0
+        closed = won.count + lost_count
+        win_rate = won.count / closed if closed > 0 else 0
 
         return {
-            "total": len(all_opps),
-            "open": len(open_opps),
-            "won": len(won),
-            "lost": len(lost),
+            "total": len(self._opportunities),
+            "open": open_totals.count,
+            "won": won.count,
+            "lost": lost_count,
             "win_rate": round(win_rate * 100, 1),
-            "total_won_amount": sum(o.amount or 0 for o in won),
-            "average_deal_size": sum(o.amount or 0 for o in won) / len(won) if won else 0,
-            "pipeline_value": sum(o.amount or 0 for o in open_opps),
-            "weighted_pipeline": sum(o.weighted_amount for o in open_opps),
+            "total_won_amount": won.amount,
+            "average_deal_size": won.amount / won.count if won.count else 0,
+            "pipeline_value": open_totals.amount,
+            "weighted_pipeline": open_totals.weighted,
         }
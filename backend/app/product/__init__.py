@@ -12,6 +12,7 @@ from app.product.models import (
     QAResult,
     UATFeedback,
     STAGE_ORDER,
+    dump_products,
 )
 from app.product.repository import ProductRepository, get_product_repo, set_product_repo
 
@@ -26,4 +27,5 @@ __all__ = [
     "get_product_repo",
     "set_product_repo",
     "STAGE_ORDER",
+    "dump_products",
 ]
@@ -8,11 +8,14 @@ Based on docs/pipelines/product-pipeline.md
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from uuid import uuid4
 
+import orjson
 
-class ProductStage(Enum):
+
+class ProductStage(str, Enum):
     """產品開發階段"""
     P1_BACKLOG = "backlog"           # 需求池 (CEO 想法)
     P2_SPEC_READY = "spec_ready"     # 規格確認 (PM 完成)
@@ -23,7 +26,7 @@ class ProductStage(Enum):
     BLOCKED = "blocked"              # 被阻擋
 
 
-class ProductPriority(Enum):
+class ProductPriority(str, Enum):
     """優先級"""
     CRITICAL = "critical"
     HIGH = "high"
@@ -31,7 +34,11 @@ class ProductPriority(Enum):
     LOW = "low"
 
 
-class ProductType(Enum):
+# 排序權重：CRITICAL=0 … LOW=3（repository 據此產生 SQL ORDER BY CASE）
+_PRIORITY_RANK: Dict[ProductPriority, int] = {p: i for i, p in enumerate(ProductPriority)}
+
+
+class ProductType(str, Enum):
     """產品類型"""
     FEATURE = "feature"          # 新功能
     ENHANCEMENT = "enhancement"  # 功能增強
@@ -40,6 +47,12 @@ class ProductType(Enum):
     EXPERIMENT = "experiment"    # 實驗性功能
 
 
+# Enum → 字串值（序列化熱路徑用 dict 查找取代 .value descriptor）
+_STAGE_VALUE: Dict[ProductStage, str] = {m: m.value for m in ProductStage}
+_PRIO_VALUE: Dict[ProductPriority, str] = {m: m.value for m in ProductPriority}
+_TYPE_VALUE: Dict[ProductType, str] = {m: m.value for m in ProductType}
+
+
 # Stage transition order
 STAGE_ORDER = [
     ProductStage.P1_BACKLOG,
@@ -50,42 +63,74 @@ STAGE_ORDER = [
     ProductStage.P6_DONE,
 ]
 
-
-@dataclass
+# 階段 -> 在 STAGE_ORDER 中的位置（取代 list.index 線性搜尋）
+_STAGE_INDEX: Dict[ProductStage, int] = {stage: i for i, stage in enumerate(STAGE_ORDER)}
+
+# 推進到各階段的前置條件：(取值函式, 不滿足時的阻擋訊息)
+_ADVANCE_RULES: Dict[ProductStage, Tuple[Tuple[Callable[[Any], Any], str], ...]] = {
+    ProductStage.P2_SPEC_READY: (
+        (attrgetter("description"), "需要填寫描述"),
+    ),
+    ProductStage.P3_IN_PROGRESS: (
+        (attrgetter("spec_doc"), "需要填寫規格文件"),
+        (attrgetter("acceptance_criteria"), "需要定義驗收標準"),
+    ),
+    ProductStage.P4_QA_TESTING: (
+        (attrgetter("assignee"), "需要指派開發人員"),
+    ),
+    ProductStage.P5_UAT: (
+        (attrgetter("qa_passed"), "QA 測試未通過"),
+    ),
+    ProductStage.P6_DONE: (
+        (attrgetter("uat_approved"), "需要 CEO 驗收通過"),
+    ),
+}
+
+
+@dataclass(slots=True)
 class QAResult:
     """QA 測試結果"""
     test_name: str
     passed: bool
     details: Optional[str] = None
     timestamp: datetime = field(default_factory=datetime.utcnow)
+    _ts_iso: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # timestamp 建立後不再變動，ISO 字串只格式化一次
+        self._ts_iso = self.timestamp.isoformat()
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "test_name": self.test_name,
             "passed": self.passed,
             "details": self.details,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self._ts_iso,
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class UATFeedback:
     """UAT 回饋"""
     feedback: str
     from_ceo: bool = True
     approved: Optional[bool] = None
     timestamp: datetime = field(default_factory=datetime.utcnow)
+    _ts_iso: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._ts_iso = self.timestamp.isoformat()
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "feedback": self.feedback,
             "from_ceo": self.from_ceo,
             "approved": self.approved,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self._ts_iso,
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ProductItem:
     """產品項目"""
     id: str
@@ -144,24 +189,32 @@ class ProductItem:
             year = datetime.now().year
             self.id = f"PROD-{year}-{uuid4().hex[:4].upper()}"
 
+    def add_qa_result(self, result: QAResult) -> None:
+        """新增 QA 結果"""
+        self.qa_results.append(result)
+
     @property
     def days_in_stage(self) -> int:
         return (datetime.utcnow() - self.stage_entered_at).days
 
+    @property
+    def qa_passed_count(self) -> int:
+        """通過的 QA 測試數（一律由 qa_results 計算）"""
+        return sum(1 for r in self.qa_results if r.passed)
+
     @property
     def qa_passed(self) -> bool:
         """所有 QA 測試是否通過"""
-        if not self.qa_results:
-            return False
-        return all(r.passed for r in self.qa_results)
+        qa = self.qa_results
+        return bool(qa) and all(r.passed for r in qa)
 
     @property
     def qa_score(self) -> float:
         """QA 通過率"""
-        if not self.qa_results:
+        qa = self.qa_results
+        if not qa:
             return 0.0
-        passed = sum(1 for r in self.qa_results if r.passed)
-        return (passed / len(self.qa_results)) * 100
+        return (self.qa_passed_count / len(qa)) * 100
 
     @property
     def uat_approved(self) -> bool:
@@ -171,80 +224,93 @@ class ProductItem:
 
     def can_advance_to(self, target: ProductStage) -> tuple[bool, List[str]]:
         """檢查是否可以推進到目標階段"""
-        blockers = []
-
-        if target == ProductStage.P2_SPEC_READY:
-            if not self.description:
-                blockers.append("需要填寫描述")
-
-        elif target == ProductStage.P3_IN_PROGRESS:
-            if not self.spec_doc:
-                blockers.append("需要填寫規格文件")
-            if not self.acceptance_criteria:
-                blockers.append("需要定義驗收標準")
-
-        elif target == ProductStage.P4_QA_TESTING:
-            if not self.assignee:
-                blockers.append("需要指派開發人員")
-
-        elif target == ProductStage.P5_UAT:
-            if not self.qa_passed:
-                blockers.append("QA 測試未通過")
-
-        elif target == ProductStage.P6_DONE:
-            if not self.uat_approved:
-                blockers.append("需要 CEO 驗收通過")
-
-        return len(blockers) == 0, blockers
+        blockers = [msg for check, msg in _ADVANCE_RULES.get(target, ()) if not check(self)]
+        return not blockers, blockers
+
+    def next_stage(self) -> Optional[ProductStage]:
+        """下一個階段（已完成、被阻擋或不在階段序列中時為 None）"""
+        current_index = _STAGE_INDEX.get(self.stage, -1)
+        if 0 <= current_index < len(STAGE_ORDER) - 1:
+            return STAGE_ORDER[current_index + 1]
+        return None
 
-    def advance_stage(self) -> Optional[ProductStage]:
-        """推進到下一階段"""
-        if self.stage == ProductStage.BLOCKED:
+    def advance_stage(self, now: Optional[datetime] = None) -> Optional[ProductStage]:
+        """推進到下一階段（now 由呼叫端傳入時沿用同一時間點）"""
+        next_stage = self.next_stage()
+        if next_stage is None:
             return None
 
-        try:
-            current_idx = STAGE_ORDER.index(self.stage)
-            if current_idx < len(STAGE_ORDER) - 1:
-                next_stage = STAGE_ORDER[current_idx + 1]
-                can_advance, _ = self.can_advance_to(next_stage)
-                if can_advance:
-                    self.stage = next_stage
-                    self.stage_entered_at = datetime.utcnow()
-
-                    if next_stage == ProductStage.P3_IN_PROGRESS:
-                        self.started_at = datetime.utcnow()
-                    elif next_stage == ProductStage.P6_DONE:
-                        self.completed_at = datetime.utcnow()
-
-                    return next_stage
-        except ValueError:
-            pass
-        return None
+        can_advance, _ = self.can_advance_to(next_stage)
+        if not can_advance:
+            return None
 
-    def to_dict(self) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
+        self.stage = next_stage
+        self.stage_entered_at = now
+
+        if next_stage == ProductStage.P3_IN_PROGRESS:
+            self.started_at = now
+        elif next_stage == ProductStage.P6_DONE:
+            self.completed_at = now
+
+        return next_stage
+
+    def to_dict(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
+
+        # QA / UAT 各走一次：同時組 dict 與計算彙總，不再經由 property 重掃
+        qa = self.qa_results
+        qa_total = len(qa)
+        passed = 0
+        qa_dicts = []
+        for r in qa:
+            if r.passed:
+                passed += 1
+            qa_dicts.append({
+                "test_name": r.test_name,
+                "passed": r.passed,
+                "details": r.details,
+                "timestamp": r._ts_iso,
+            })
+
+        uat_approved = False
+        uat_dicts = []
+        for f in self.uat_feedback:
+            if f.approved is True:
+                uat_approved = True
+            uat_dicts.append({
+                "feedback": f.feedback,
+                "from_ceo": f.from_ceo,
+                "approved": f.approved,
+                "timestamp": f._ts_iso,
+            })
+
+        stage_entered = self.stage_entered_at
+        started = self.started_at
+        completed = self.completed_at
         return {
             "id": self.id,
             "title": self.title,
             "description": self.description,
-            "type": self.type.value,
-            "priority": self.priority.value,
-            "stage": self.stage.value,
-            "stage_entered_at": self.stage_entered_at.isoformat(),
-            "days_in_stage": self.days_in_stage,
+            "type": _TYPE_VALUE[self.type],
+            "priority": _PRIO_VALUE[self.priority],
+            "stage": _STAGE_VALUE[self.stage],
+            "stage_entered_at": stage_entered.isoformat(),
+            "days_in_stage": (now - stage_entered).days,
             "version": self.version,
             "target_release": self.target_release,
             "spec_doc": self.spec_doc,
             "acceptance_criteria": self.acceptance_criteria,
             "assignee": self.assignee,
             "owner": self.owner,
-            "qa_results": [r.to_dict() for r in self.qa_results],
-            "qa_passed": self.qa_passed,
-            "qa_score": self.qa_score,
-            "uat_feedback": [f.to_dict() for f in self.uat_feedback],
-            "uat_approved": self.uat_approved,
+            "qa_results": qa_dicts,
+            "qa_passed": qa_total > 0 and passed == qa_total,
+            "qa_score": (passed / qa_total) * 100 if qa_total else 0.0,
+            "uat_feedback": uat_dicts,
+            "uat_approved": uat_approved,
             "created_at": self.created_at.isoformat(),
-            "started_at": self.started_at.isoformat() if self.started_at else None,
-            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "started_at": started.isoformat() if started else None,
+            "completed_at": completed.isoformat() if completed else None,
             "estimated_hours": self.estimated_hours,
             "actual_hours": self.actual_hours,
             "blocked_reason": self.blocked_reason,
@@ -253,15 +319,32 @@ class ProductItem:
             "tags": self.tags,
         }
 
-    def to_summary(self) -> Dict[str, Any]:
+    def to_json(self) -> bytes:
+        """序列化為 JSON bytes（API 直接回傳，不經框架 encoder）"""
+        return orjson.dumps(self.to_dict())
+
+    def to_summary(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
         return {
             "id": self.id,
             "title": self.title,
-            "type": self.type.value,
-            "priority": self.priority.value,
-            "stage": self.stage.value,
+            "type": _TYPE_VALUE[self.type],
+            "priority": _PRIO_VALUE[self.priority],
+            "stage": _STAGE_VALUE[self.stage],
             "assignee": self.assignee,
-            "days_in_stage": self.days_in_stage,
+            "days_in_stage": (now - self.stage_entered_at).days,
             "qa_passed": self.qa_passed,
             "version": self.version,
         }
+
+
+def dump_products(products: List[ProductItem], now: Optional[datetime] = None) -> bytes:
+    """
+    批次序列化產品清單為 JSON bytes
+
+    共用同一個 now，並以未綁定的 ProductItem.to_dict 逐筆呼叫
+    （省去每筆的 bound method 建立），最後一次交給 orjson 輸出。
+    """
+    now = now or datetime.utcnow()
+    to_dict = ProductItem.to_dict
+    return orjson.dumps([to_dict(p, now) for p in products])
@@ -4,11 +4,17 @@ Product Repository
 SQLAlchemy-backed repository for Product items.
 """
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import Integer, and_, bindparam, case, cast, extract, func, insert, select, update
+from sqlalchemy.ext.asyncio import async_scoped_session
 
 from app.product.models import (
     ProductItem,
@@ -17,11 +23,42 @@ from app.product.models import (
     ProductType,
     QAResult,
     UATFeedback,
-    STAGE_ORDER,
+    _STAGE_VALUE,
+    _PRIO_VALUE,
+    _PRIORITY_RANK,
+    _TYPE_VALUE,
 )
 
 logger = logging.getLogger(__name__)
 
+# 字串 → Enum 反查表（_db_to_domain 熱路徑不走 Enum.__call__）
+_STAGE_LOOKUP: Dict[str, ProductStage] = {v: m for m, v in _STAGE_VALUE.items()}
+_PRIO_LOOKUP: Dict[str, ProductPriority] = {v: m for m, v in _PRIO_VALUE.items()}
+_TYPE_LOOKUP: Dict[str, ProductType] = {v: m for m, v in _TYPE_VALUE.items()}
+
+# 儀表板計數模板（每次呼叫 .copy()）
+_STAGE_COUNTS: Dict[str, int] = dict.fromkeys(_STAGE_VALUE.values(), 0)
+_TYPE_COUNTS: Dict[str, int] = dict.fromkeys(_TYPE_VALUE.values(), 0)
+_PRIO_COUNTS: Dict[str, int] = dict.fromkeys(_PRIO_VALUE.values(), 0)
+
+# 彙總結果（dashboard / statistics）快取秒數；寫入時立即失效，
+# TTL 只用來限制 days_in_stage / 停滯判定隨時間漂移的幅度
+_AGGREGATE_TTL = 30.0
+
+# bulk_create 每個 executemany 批次的筆數
+_BULK_BATCH = 500
+
+# 彙總查詢掃描上限（依 created_at 由舊到新）
+_SCAN_LIMIT = 10000
+
+# (now - t).days > 7 ⇔ t <= now - 8 天
+_STALE_AFTER = timedelta(days=8)
+
+# 會被判定為停滯的階段（已完成與需求池除外）
+_STALE_STAGE_VALUES = tuple(
+    s.value for s in ProductStage if s not in (ProductStage.P6_DONE, ProductStage.P1_BACKLOG)
+)
+
 
 # === Global accessor ===
 _product_repo: Optional["ProductRepository"] = None
@@ -31,8 +68,8 @@ def get_product_repo() -> "ProductRepository":
     """取得共享的 ProductRepository 實例"""
     global _product_repo
     if _product_repo is None:
-        from app.db.database import AsyncSessionLocal
-        _product_repo = ProductRepository(session_factory=AsyncSessionLocal)
+        from app.db.database import AsyncScopedSession
+        _product_repo = ProductRepository(session_factory=AsyncScopedSession)
     return _product_repo
 
 
@@ -42,38 +79,104 @@ def set_product_repo(repo: "ProductRepository") -> None:
     _product_repo = repo
 
 
+@lru_cache(maxsize=256)
+def _version_key(version: str) -> Tuple:
+    """
+    版本排序鍵（semver-like）
+
+    "v1.10.0" → ((0, 1), (0, 10), (0, 0))，數字段以數值比較，
+    非數字段排在數字之後以字串比較；版本種類有限，結果快取。
+    """
+    return tuple(
+        (0, int(part)) if part.isdigit() else (1, part)
+        for part in version.lstrip("vV").split(".")
+    )
+
+
+@lru_cache(maxsize=None)
+def _order_by():
+    """ORDER BY 優先級權重（CASE）, created_at：排序交給資料庫"""
+    from app.db.models import ProductItemDB
+    rank = case(
+        {p.value: rank for p, rank in _PRIORITY_RANK.items()},
+        value=ProductItemDB.priority,
+        else_=len(ProductPriority),
+    )
+    return rank, ProductItemDB.created_at
+
+
+@lru_cache(maxsize=32)
+def _list_stmt(columns: Tuple[str, ...]):
+    """
+    list() 的 SELECT，依「有哪些過濾欄位」快取
+
+    條件值與 limit 皆為 bindparam，同一組合重複使用同一個 Select
+    物件，SQLAlchemy compiled cache 與 DBAPI prepared statement 都能命中。
+    """
+    from app.db.models import ProductItemDB
+    return (
+        select(ProductItemDB)
+        .where(*[getattr(ProductItemDB, c) == bindparam(c) for c in columns])
+        .order_by(*_order_by())
+        .limit(bindparam("limit"))
+    )
+
+
 # === Domain ↔ DB Converters ===
 
+@lru_cache(maxsize=4096)
+def _parse_ts(value: str) -> datetime:
+    """ISO 字串 → datetime（同一批 QA/UAT 時間戳大量重複，快取解析結果）"""
+    return datetime.fromisoformat(value)
+
+
+def _db_values(product: ProductItem) -> Dict[str, Any]:
+    """ProductItem dataclass → 欄位值 dict（不含 id / created_at）"""
+    return {
+        "title": product.title,
+        "description": product.description,
+        "type": product.type.value,
+        "priority": product.priority.value,
+        "stage": product.stage.value,
+        "stage_entered_at": product.stage_entered_at,
+        "version": product.version,
+        "target_release": product.target_release,
+        "spec_doc": product.spec_doc,
+        "acceptance_criteria": product.acceptance_criteria,
+        "assignee": product.assignee,
+        "owner": product.owner,
+        "qa_results": [r.to_dict() for r in product.qa_results],
+        "qa_total": len(product.qa_results),
+        "qa_passed": product.qa_passed_count,
+        "uat_feedback": [f.to_dict() for f in product.uat_feedback],
+        "started_at": product.started_at,
+        "completed_at": product.completed_at,
+        "estimated_hours": product.estimated_hours,
+        "actual_hours": product.actual_hours,
+        "blocked_reason": product.blocked_reason,
+        "blocked_by": product.blocked_by,
+        "source_input_id": product.source_input_id,
+        "related_opportunity_id": product.related_opportunity_id,
+        "notes": product.notes,
+        "tags": product.tags,
+    }
+
+
+def _row_values(product: ProductItem) -> Dict[str, Any]:
+    """ProductItem → 完整欄位 dict（Core INSERT 用）"""
+    values = _db_values(product)
+    values["id"] = product.id
+    values["created_at"] = product.created_at
+    return values
+
+
 def _domain_to_db(product: ProductItem) -> "ProductItemDB":
     """ProductItem dataclass → ProductItemDB ORM"""
     from app.db.models import ProductItemDB
     return ProductItemDB(
         id=product.id,
-        title=product.title,
-        description=product.description,
-        type=product.type.value,
-        priority=product.priority.value,
-        stage=product.stage.value,
-        stage_entered_at=product.stage_entered_at,
-        version=product.version,
-        target_release=product.target_release,
-        spec_doc=product.spec_doc,
-        acceptance_criteria=product.acceptance_criteria,
-        assignee=product.assignee,
-        owner=product.owner,
-        qa_results=[r.to_dict() for r in product.qa_results] if product.qa_results else [],
-        uat_feedback=[f.to_dict() for f in product.uat_feedback] if product.uat_feedback else [],
         created_at=product.created_at,
-        started_at=product.started_at,
-        completed_at=product.completed_at,
-        estimated_hours=product.estimated_hours,
-        actual_hours=product.actual_hours,
-        blocked_reason=product.blocked_reason,
-        blocked_by=product.blocked_by,
-        source_input_id=product.source_input_id,
-        related_opportunity_id=product.related_opportunity_id,
-        notes=product.notes,
-        tags=product.tags,
+        **_db_values(product),
     )
 
 
@@ -86,7 +189,7 @@ def _db_to_domain(row) -> ProductItem:
             test_name=r.get("test_name", ""),
             passed=r.get("passed", False),
             details=r.get("details"),
-            timestamp=datetime.fromisoformat(r["timestamp"]) if r.get("timestamp") else datetime.utcnow(),
+            timestamp=_parse_ts(r["timestamp"]) if r.get("timestamp") else datetime.utcnow(),
         ))
 
     # Deserialize UAT feedback
@@ -96,16 +199,16 @@ def _db_to_domain(row) -> ProductItem:
             feedback=f.get("feedback", ""),
             from_ceo=f.get("from_ceo", True),
             approved=f.get("approved"),
-            timestamp=datetime.fromisoformat(f["timestamp"]) if f.get("timestamp") else datetime.utcnow(),
+            timestamp=_parse_ts(f["timestamp"]) if f.get("timestamp") else datetime.utcnow(),
         ))
 
     return ProductItem(
         id=row.id,
         title=row.title,
         description=row.description or "",
-        type=ProductType(row.type) if row.type else ProductType.FEATURE,
-        priority=ProductPriority(row.priority) if row.priority else ProductPriority.MEDIUM,
-        stage=ProductStage(row.stage) if row.stage else ProductStage.P1_BACKLOG,
+        type=_TYPE_LOOKUP.get(row.type, ProductType.FEATURE),
+        priority=_PRIO_LOOKUP.get(row.priority, ProductPriority.MEDIUM),
+        stage=_STAGE_LOOKUP.get(row.stage, ProductStage.P1_BACKLOG),
         stage_entered_at=row.stage_entered_at or datetime.utcnow(),
         version=row.version,
         target_release=row.target_release,
@@ -129,14 +232,152 @@ def _db_to_domain(row) -> ProductItem:
     )
 
 
+# === Query Helpers ===
+# 皆以 session 為第一個參數，可經 ProductRepository._query 在獨立 session 併發執行
+
+def _days_between(dialect: str, start, end):
+    """兩個 DateTime 欄位相差的整數天數（同 timedelta.days，需依方言產生）"""
+    if dialect == "sqlite":
+        # 整數秒相減後整數除法（julianday 浮點差在整天邊界會少算一天）
+        seconds = cast(func.strftime("%s", end), Integer) - cast(func.strftime("%s", start), Integer)
+        return seconds // 86400
+    return cast(extract("day", end - start), Integer)
+
+
+async def _statistics_row(session) -> Tuple[Any, ...]:
+    """總數 / 完成數 / 完成天數總和 / QA 計數，一次 SELECT"""
+    from app.db.models import ProductItemDB
+    done = ProductItemDB.stage == ProductStage.P6_DONE.value
+    days = _days_between(
+        session.get_bind().dialect.name,
+        ProductItemDB.created_at,
+        ProductItemDB.completed_at,
+    )
+    stmt = select(
+        func.count(),
+        func.coalesce(func.sum(case((done, 1), else_=0)), 0),
+        func.coalesce(
+            func.sum(case((and_(done, ProductItemDB.completed_at.is_not(None)), days), else_=0)),
+            0,
+        ),
+        func.coalesce(func.sum(ProductItemDB.qa_total), 0),
+        func.coalesce(func.sum(ProductItemDB.qa_passed), 0),
+    )
+    return (await session.execute(stmt)).one()
+
+
+async def _count_by(session, column, template: Dict[str, int]) -> Dict[str, int]:
+    """SELECT column, COUNT(*) GROUP BY column，補上模板中為 0 的值"""
+    counts = template.copy()
+    counts.update((await session.execute(select(column, func.count()).group_by(column))).all())
+    return counts
+
+
+@lru_cache(maxsize=None)
+def _summary_columns() -> Tuple[Any, ...]:
+    """to_summary() 需要的欄位（qa_passed 由 qa_total / qa_passed 計數判斷）"""
+    from app.db.models import ProductItemDB
+    return (
+        ProductItemDB.id,
+        ProductItemDB.title,
+        ProductItemDB.type,
+        ProductItemDB.priority,
+        ProductItemDB.stage,
+        ProductItemDB.assignee,
+        ProductItemDB.stage_entered_at,
+        ProductItemDB.qa_total,
+        ProductItemDB.qa_passed,
+        ProductItemDB.version,
+    )
+
+
+async def _fetch_summaries(session, now: datetime, *conditions) -> List[Dict[str, Any]]:
+    """
+    只取摘要欄位並直接組成 to_summary() 格式，依 (priority, created_at) 排序
+
+    不載入 description / spec_doc / uat_feedback 等寬欄位，也不建 ProductItem。
+    """
+    rows = await session.execute(
+        select(*_summary_columns()).where(*conditions).order_by(*_order_by())
+    )
+    return [
+        {
+            "id": pid,
+            "title": title,
+            "type": ptype or ProductType.FEATURE.value,
+            "priority": priority or ProductPriority.MEDIUM.value,
+            "stage": stage or ProductStage.P1_BACKLOG.value,
+            "assignee": assignee,
+            "days_in_stage": (now - entered).days if entered else 0,
+            "qa_passed": bool(qa_total) and qa_passed == qa_total,
+            "version": version,
+        }
+        for (
+            pid, title, ptype, priority, stage, assignee, entered, qa_total, qa_passed, version
+        ) in rows
+    ]
+
+
 class ProductRepository:
     """SQLAlchemy-backed repository for product items"""
 
     def __init__(self, session_factory=None):
         self._session_factory = session_factory
+        self._aggregates: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # 每次寫入 +1；讀取期間若有寫入，結果就不寫回快取
+        self._generation = 0
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[Any]:
+        """
+        取得 session
+
+        scoped factory 且位於 request task 內時，沿用該 request 的 session
+        （不在此關閉，由 middleware 釋放）；其餘情況每次開新 session。
+        """
+        factory = self._session_factory
+        if isinstance(factory, async_scoped_session):
+            from app.db.database import in_request_task
+            if in_request_task():
+                session = factory()
+                try:
+                    yield session
+                except Exception:
+                    await session.rollback()
+                    raise
+                return
+            factory = factory.session_factory
+        async with factory() as session:
+            yield session
+
+    async def _query(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        執行查詢 helper；asyncio.gather 的子 task 不在 request task 內，
+        _session() 會給每個子 task 獨立 session（AsyncSession 不可跨 task 共用）
+        """
+        async with self._session() as session:
+            return await fn(session, *args)
 
-    def _session(self):
-        return self._session_factory()
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        """取得未過期的彙總結果"""
+        entry = self._aggregates.get(key)
+        if entry and time.monotonic() - entry[0] < _AGGREGATE_TTL:
+            return entry[1]
+        return None
+
+    def _remember(self, key: str, value: Dict[str, Any], generation: int) -> Dict[str, Any]:
+        """
+        寫回彙總快取；generation 為開始查詢前取得的 self._generation，
+        查詢期間有寫入（已 _invalidate）時不寫回，避免把寫入前的結果當成最新
+        """
+        if generation == self._generation:
+            self._aggregates[key] = (time.monotonic(), value)
+        return value
+
+    def _invalidate(self) -> None:
+        """任何寫入後清空彙總快取"""
+        self._generation += 1
+        self._aggregates.clear()
 
     async def create(self, product: ProductItem) -> ProductItem:
         """Create a new product item"""
@@ -145,9 +386,30 @@ class ProductRepository:
             db_item = _domain_to_db(product)
             session.add(db_item)
             await session.commit()
+        self._invalidate()
         logger.info(f"Created product item: {product.id}")
         return product
 
+    async def bulk_create(self, products: List[ProductItem]) -> List[ProductItem]:
+        """
+        批次建立產品項目
+
+        Core INSERT 以 executemany 每 _BULK_BATCH 筆送一次，
+        全部在同一個交易內，最後只 commit 一次。
+        """
+        if not products:
+            return products
+        from app.db.models import ProductItemDB
+        stmt = insert(ProductItemDB)
+        async with self._session() as session:
+            for start in range(0, len(products), _BULK_BATCH):
+                batch = products[start:start + _BULK_BATCH]
+                await session.execute(stmt, [_row_values(p) for p in batch])
+            await session.commit()
+        self._invalidate()
+        logger.info(f"Bulk created {len(products)} product items")
+        return products
+
     async def get(self, product_id: str) -> Optional[ProductItem]:
         """Get a product item by ID"""
         from app.db.models import ProductItemDB
@@ -157,37 +419,26 @@ class ProductRepository:
 
     async def update(self, product: ProductItem) -> ProductItem:
         """Update a product item"""
+        if not await self._patch(product.id, **_db_values(product)):
+            raise ValueError(f"ProductItem {product.id} not found")
+        return product
+
+    async def _patch(self, product_id: str, **values: Any) -> bool:
+        """
+        以單一 UPDATE 寫回指定欄位
+
+        不先 SELECT、不經 ORM dirty-checking；回傳是否有命中資料列。
+        """
         from app.db.models import ProductItemDB
         async with self._session() as session:
-            row = await session.get(ProductItemDB, product.id)
-            if not row:
-                raise ValueError(f"ProductItem {product.id} not found")
-            row.title = product.title
-            row.description = product.description
-            row.type = product.type.value
-            row.priority = product.priority.value
-            row.stage = product.stage.value
-            row.stage_entered_at = product.stage_entered_at
-            row.version = product.version
-            row.target_release = product.target_release
-            row.spec_doc = product.spec_doc
-            row.acceptance_criteria = product.acceptance_criteria
-            row.assignee = product.assignee
-            row.owner = product.owner
-            row.qa_results = [r.to_dict() for r in product.qa_results]
-            row.uat_feedback = [f.to_dict() for f in product.uat_feedback]
-            row.started_at = product.started_at
-            row.completed_at = product.completed_at
-            row.estimated_hours = product.estimated_hours
-            row.actual_hours = product.actual_hours
-            row.blocked_reason = product.blocked_reason
-            row.blocked_by = product.blocked_by
-            row.source_input_id = product.source_input_id
-            row.related_opportunity_id = product.related_opportunity_id
-            row.notes = product.notes
-            row.tags = product.tags
+            result = await session.execute(
+                update(ProductItemDB)
+                .where(ProductItemDB.id == product_id)
+                .values(**values)
+            )
             await session.commit()
-        return product
+        self._invalidate()
+        return result.rowcount > 0
 
     async def delete(self, product_id: str) -> bool:
         """Delete a product item"""
@@ -198,7 +449,8 @@ class ProductRepository:
                 return False
             await session.delete(row)
             await session.commit()
-            return True
+        self._invalidate()
+        return True
 
     async def list(
         self,
@@ -210,237 +462,248 @@ class ProductRepository:
         limit: int = 100,
     ) -> List[ProductItem]:
         """List product items with optional filters"""
-        from app.db.models import ProductItemDB
+        # 未指定的條件直接略過；欄位組合決定快取的 Select
+        params = {
+            column: value
+            for column, value in (
+                ("stage", stage and stage.value),
+                ("type", product_type and product_type.value),
+                ("priority", priority and priority.value),
+                ("assignee", assignee),
+                ("target_release", version),
+            )
+            if value
+        }
+        stmt = _list_stmt(tuple(params))
+        params["limit"] = limit
         async with self._session() as session:
-            stmt = select(ProductItemDB)
-
-            if stage:
-                stmt = stmt.where(ProductItemDB.stage == stage.value)
-            if product_type:
-                stmt = stmt.where(ProductItemDB.type == product_type.value)
-            if priority:
-                stmt = stmt.where(ProductItemDB.priority == priority.value)
-            if assignee:
-                stmt = stmt.where(ProductItemDB.assignee == assignee)
-            if version:
-                stmt = stmt.where(ProductItemDB.target_release == version)
-
-            stmt = stmt.order_by(ProductItemDB.created_at).limit(limit)
-            result = await session.execute(stmt)
+            result = await session.execute(stmt, params)
             rows = result.scalars().all()
 
-        # Convert to domain and sort by priority
-        products = [_db_to_domain(r) for r in rows]
-        priority_order = {
-            ProductPriority.CRITICAL: 0,
-            ProductPriority.HIGH: 1,
-            ProductPriority.MEDIUM: 2,
-            ProductPriority.LOW: 3,
-        }
-        products.sort(key=lambda p: (priority_order.get(p.priority, 4), p.created_at))
-        return products
+        return [_db_to_domain(r) for r in rows]
+
+    async def _mutate(
+        self,
+        product_id: str,
+        apply: Callable[[ProductItem], Optional[Dict[str, Any]]],
+    ) -> Optional[ProductItem]:
+        """
+        單一 session 內讀取 → 修改 → 寫回
+
+        apply 就地修改 ProductItem 並回傳要寫回的欄位；回傳 None 表示
+        不寫入。只有變動欄位會出現在 UPDATE，整個操作一次 commit。
+        """
+        from app.db.models import ProductItemDB
+        async with self._session() as session:
+            row = await session.get(ProductItemDB, product_id)
+            if not row:
+                return None
+            product = _db_to_domain(row)
+            values = apply(product)
+            if values is None:
+                return None
+            for column, value in values.items():
+                setattr(row, column, value)
+            await session.commit()
+        self._invalidate()
+        return product
 
     async def advance_stage(self, product_id: str) -> Optional[ProductItem]:
         """Advance product to next stage"""
-        product = await self.get(product_id)
-        if not product:
-            return None
-
-        new_stage = product.advance_stage()
-        if new_stage:
-            await self.update(product)
-            return product
-        return None
+        def apply(product: ProductItem) -> Optional[Dict[str, Any]]:
+            if not product.advance_stage(datetime.utcnow()):
+                return None
+            return {
+                "stage": product.stage.value,
+                "stage_entered_at": product.stage_entered_at,
+                "started_at": product.started_at,
+                "completed_at": product.completed_at,
+            }
+        return await self._mutate(product_id, apply)
 
     async def set_stage(
         self, product_id: str, stage: ProductStage
     ) -> Optional[ProductItem]:
         """Set product to specific stage"""
-        product = await self.get(product_id)
-        if not product:
-            return None
-
-        can_advance, blockers = product.can_advance_to(stage)
-        if not can_advance:
-            return None
-
-        product.stage = stage
-        product.stage_entered_at = datetime.utcnow()
-
-        if stage == ProductStage.P3_IN_PROGRESS and not product.started_at:
-            product.started_at = datetime.utcnow()
-        elif stage == ProductStage.P6_DONE:
-            product.completed_at = datetime.utcnow()
-
-        await self.update(product)
-        return product
+        def apply(product: ProductItem) -> Optional[Dict[str, Any]]:
+            can_advance, blockers = product.can_advance_to(stage)
+            if not can_advance:
+                return None
+
+            now = datetime.utcnow()
+            product.stage = stage
+            product.stage_entered_at = now
+
+            if stage == ProductStage.P3_IN_PROGRESS and not product.started_at:
+                product.started_at = now
+            elif stage == ProductStage.P6_DONE:
+                product.completed_at = now
+
+            return {
+                "stage": stage.value,
+                "stage_entered_at": now,
+                "started_at": product.started_at,
+                "completed_at": product.completed_at,
+            }
+        return await self._mutate(product_id, apply)
 
     async def block(
         self, product_id: str, reason: str, blocked_by: Optional[str] = None
     ) -> Optional[ProductItem]:
         """Mark product as blocked"""
-        product = await self.get(product_id)
-        if not product:
-            return None
-
-        product.stage = ProductStage.BLOCKED
-        product.blocked_reason = reason
-        product.blocked_by = blocked_by
-        product.stage_entered_at = datetime.utcnow()
-
-        await self.update(product)
-        return product
+        def apply(product: ProductItem) -> Dict[str, Any]:
+            product.stage = ProductStage.BLOCKED
+            product.blocked_reason = reason
+            product.blocked_by = blocked_by
+            product.stage_entered_at = datetime.utcnow()
+            return {
+                "stage": ProductStage.BLOCKED.value,
+                "blocked_reason": reason,
+                "blocked_by": blocked_by,
+                "stage_entered_at": product.stage_entered_at,
+            }
+        return await self._mutate(product_id, apply)
 
     async def unblock(self, product_id: str, return_to_stage: ProductStage) -> Optional[ProductItem]:
         """Unblock product and return to specified stage"""
-        product = await self.get(product_id)
-        if not product or product.stage != ProductStage.BLOCKED:
-            return None
-
-        product.stage = return_to_stage
-        product.blocked_reason = None
-        product.blocked_by = None
-        product.stage_entered_at = datetime.utcnow()
-
-        await self.update(product)
-        return product
+        def apply(product: ProductItem) -> Optional[Dict[str, Any]]:
+            if product.stage != ProductStage.BLOCKED:
+                return None
+            product.stage = return_to_stage
+            product.blocked_reason = None
+            product.blocked_by = None
+            product.stage_entered_at = datetime.utcnow()
+            return {
+                "stage": return_to_stage.value,
+                "blocked_reason": None,
+                "blocked_by": None,
+                "stage_entered_at": product.stage_entered_at,
+            }
+        return await self._mutate(product_id, apply)
 
     async def assign(
         self, product_id: str, assignee: str
     ) -> Optional[ProductItem]:
         """Assign product to an agent"""
-        product = await self.get(product_id)
-        if not product:
-            return None
-
-        product.assignee = assignee
-        await self.update(product)
-        return product
+        def apply(product: ProductItem) -> Dict[str, Any]:
+            product.assignee = assignee
+            return {"assignee": assignee}
+        return await self._mutate(product_id, apply)
 
     async def add_qa_result(
         self, product_id: str, test_name: str, passed: bool, details: Optional[str] = None
     ) -> Optional[ProductItem]:
         """Add QA test result"""
-        product = await self.get(product_id)
-        if not product:
-            return None
-
-        result = QAResult(
-            test_name=test_name,
-            passed=passed,
-            details=details,
-        )
-        product.qa_results.append(result)
-
-        await self.update(product)
-        return product
+        def apply(product: ProductItem) -> Dict[str, Any]:
+            product.add_qa_result(QAResult(
+                test_name=test_name,
+                passed=passed,
+                details=details,
+                timestamp=datetime.utcnow(),
+            ))
+            return {
+                "qa_results": [r.to_dict() for r in product.qa_results],
+                "qa_total": len(product.qa_results),
+                "qa_passed": product.qa_passed_count,
+            }
+        return await self._mutate(product_id, apply)
 
     async def add_uat_feedback(
         self, product_id: str, feedback: str, approved: Optional[bool] = None
     ) -> Optional[ProductItem]:
         """Add UAT feedback"""
-        product = await self.get(product_id)
-        if not product:
-            return None
-
-        uat = UATFeedback(
-            feedback=feedback,
-            approved=approved,
-        )
-        product.uat_feedback.append(uat)
-
-        await self.update(product)
-        return product
+        def apply(product: ProductItem) -> Dict[str, Any]:
+            product.uat_feedback.append(UATFeedback(
+                feedback=feedback,
+                approved=approved,
+                timestamp=datetime.utcnow(),
+            ))
+            return {"uat_feedback": [f.to_dict() for f in product.uat_feedback]}
+        return await self._mutate(product_id, apply)
+
+    async def _scan(self) -> AsyncIterator[ProductItem]:
+        """逐筆串流產品（供彙總使用，不先組成完整 list）"""
+        from app.db.models import ProductItemDB
+        stmt = select(ProductItemDB).order_by(*_order_by()).limit(_SCAN_LIMIT)
+        async with self._session() as session:
+            async for row in await session.stream_scalars(stmt):
+                yield _db_to_domain(row)
 
     async def get_dashboard(self) -> Dict[str, Any]:
         """Get dashboard summary"""
-        products = await self.list(limit=10000)
-
-        # Count by stage
-        stage_counts = {stage.value: 0 for stage in ProductStage}
-        for p in products:
-            stage_counts[p.stage.value] += 1
-
-        # Count by type
-        type_counts = {t.value: 0 for t in ProductType}
-        for p in products:
-            type_counts[p.type.value] += 1
-
-        # Count by priority
-        priority_counts = {pr.value: 0 for pr in ProductPriority}
-        for p in products:
-            priority_counts[p.priority.value] += 1
-
-        # Blocked items
-        blocked = [p for p in products if p.stage == ProductStage.BLOCKED]
+        cached = self._cached("dashboard")
+        if cached is not None:
+            return cached
+        generation = self._generation
 
-        # In progress
-        in_progress = [p for p in products if p.stage == ProductStage.P3_IN_PROGRESS]
-
-        # Stale items (>7 days in stage)
-        stale = [p for p in products if p.days_in_stage > 7 and p.stage not in [ProductStage.P6_DONE, ProductStage.P1_BACKLOG]]
+        from app.db.models import ProductItemDB
+        now = datetime.utcnow()
+
+        # 計數交給 GROUP BY；阻擋 / 停滯項目只取摘要欄位
+        # 五個查詢互不相依，各用一個 session 併發送出
+        (
+            stage_counts, type_counts, priority_counts, blocked_items, stale_items,
+        ) = await asyncio.gather(
+            self._query(_count_by, ProductItemDB.stage, _STAGE_COUNTS),
+            self._query(_count_by, ProductItemDB.type, _TYPE_COUNTS),
+            self._query(_count_by, ProductItemDB.priority, _PRIO_COUNTS),
+            self._query(
+                _fetch_summaries, now, ProductItemDB.stage == ProductStage.BLOCKED.value
+            ),
+            self._query(
+                _fetch_summaries,
+                now,
+                ProductItemDB.stage.in_(_STALE_STAGE_VALUES),
+                ProductItemDB.stage_entered_at <= now - _STALE_AFTER,
+            ),
+        )
 
-        return {
-            "total": len(products),
+        return self._remember("dashboard", {
+            "total": sum(stage_counts.values()),
             "by_stage": stage_counts,
             "by_type": type_counts,
             "by_priority": priority_counts,
-            "blocked_count": len(blocked),
-            "in_progress_count": len(in_progress),
-            "stale_count": len(stale),
-            "blocked_items": [p.to_summary() for p in blocked],
-            "stale_items": [p.to_summary() for p in stale],
-        }
+            "blocked_count": len(blocked_items),
+            "in_progress_count": stage_counts[ProductStage.P3_IN_PROGRESS.value],
+            "stale_count": len(stale_items),
+            "blocked_items": blocked_items,
+            "stale_items": stale_items,
+        }, generation)
 
     async def get_roadmap(self) -> Dict[str, List[Dict[str, Any]]]:
         """Get roadmap grouped by target release version"""
-        products = await self.list(limit=10000)
-
-        roadmap: Dict[str, List[Dict[str, Any]]] = {}
-
-        for p in products:
-            version = p.target_release or "Unscheduled"
-            if version not in roadmap:
-                roadmap[version] = []
-            roadmap[version].append(p.to_summary())
+        roadmap: Dict[str, List[ProductItem]] = defaultdict(list)
+        async for p in self._scan():
+            roadmap[p.target_release or "Unscheduled"].append(p)
 
         # Sort versions (semver-like sorting)
-        sorted_roadmap = {}
-        for version in sorted(roadmap.keys(), key=lambda v: (v == "Unscheduled", v)):
-            sorted_roadmap[version] = roadmap[version]
-
-        return sorted_roadmap
+        now = datetime.utcnow()
+        return {
+            version: [p.to_summary(now) for p in roadmap[version]]
+            for version in sorted(roadmap, key=lambda v: (v == "Unscheduled", _version_key(v)))
+        }
 
     async def get_statistics(self) -> Dict[str, Any]:
         """Get detailed statistics"""
-        products = await self.list(limit=10000)
+        cached = self._cached("statistics")
+        if cached is not None:
+            return cached
+        generation = self._generation
 
-        completed = [p for p in products if p.stage == ProductStage.P6_DONE]
+        # 全部在 SQL 聚合；QA 走持久化計數欄位，不再讀 qa_results JSON
+        total, completed, total_days, qa_total, passed = await self._query(_statistics_row)
 
         # Average time to complete (for completed items)
-        avg_completion_days = 0
-        if completed:
-            total_days = sum(
-                (p.completed_at - p.created_at).days
-                for p in completed
-                if p.completed_at
-            )
-            avg_completion_days = total_days / len(completed) if completed else 0
-
-        # QA pass rate
-        all_qa_results = []
-        for p in products:
-            all_qa_results.extend(p.qa_results)
+        avg_completion_days = total_days / completed if completed else 0
 
         qa_pass_rate = 0
-        if all_qa_results:
-            passed = sum(1 for r in all_qa_results if r.passed)
-            qa_pass_rate = (passed / len(all_qa_results)) * 100
+        if qa_total:
+            qa_pass_rate = (passed / qa_total) * 100
 
-        return {
-            "total_products": len(products),
-            "completed_products": len(completed),
+        return self._remember("statistics", {
+            "total_products": total,
+            "completed_products": completed,
             "avg_completion_days": round(avg_completion_days, 1),
             "qa_pass_rate": round(qa_pass_rate, 1),
-            "total_qa_tests": len(all_qa_results),
-        }
+            "total_qa_tests": qa_total,
+        }, generation)
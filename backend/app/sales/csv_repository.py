@@ -10,44 +10,205 @@ import csv
 import io
 import logging
 import os
+from collections import defaultdict
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
 from uuid import uuid4
 
 from app.sales.models import (
-    ActivityTypeEnum,
     Client,
     Deal,
     DealStage,
     Quote,
     SalesActivity,
     SalesProduct,
-    STAGE_PROBABILITY,
 )
+from app.sales.pipeline_state_machine import STAGNATION_THRESHOLDS, detect_stagnant_deals
+from app.sales.shared import (
+    ACTIVITY_TYPE_LOOKUP,
+    STAGE_LOOKUP,
+    pipeline_summary,
+    write_csv,
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Default data directory
 DATA_DIR = Path(__file__).resolve().parent.parent.parent.parent / "data" / "sales"
 
 
-def _read_csv(filepath: Path) -> List[Dict[str, str]]:
-    """Read CSV file synchronously (called via to_thread)."""
+def _iter_csv(filepath: Path) -> Iterator[Dict[str, str]]:
+    """逐列讀取 CSV（generator，檔案不存在時為空）"""
     if not filepath.exists():
-        return []
+        return
     with open(filepath, "r", newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        return list(reader)
+        yield from csv.DictReader(f)
+
 
+def _read_csv(filepath: Path) -> List[Dict[str, str]]:
+    """Read CSV file synchronously (called via to_thread)."""
+    return list(_iter_csv(filepath))
+
+
+def _select(
+    filepath: Path,
+    parse: Callable[[Dict[str, str]], T],
+    match: Optional[Callable[[Dict[str, str]], bool]] = None,
+    dedupe: bool = False,
+) -> List[T]:
+    """
+    讀取 + 過濾 + 轉換（整段在 to_thread 中執行）
+
+    match 直接作用在原始列上，不符合的列不會建立 model，
+    也不會回傳到 event loop。dedupe 用於 append-only 的 deals.csv。
+    """
+    rows: Iterable[Dict[str, str]] = _iter_csv(filepath)
+    if dedupe:
+        rows = _latest(rows)
+    if match is None:
+        return [parse(r) for r in rows]
+    return [parse(r) for r in rows if match(r)]
 
-def _write_csv(filepath: Path, rows: List[Dict[str, str]], fieldnames: List[str]):
-    """Write CSV file synchronously (called via to_thread)."""
+
+def _stamp(filepath: Path) -> Optional[Tuple[int, int]]:
+    """檔案版本戳 (mtime_ns, size)；不存在時為 None"""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _append_csv(filepath: Path, row: Dict[str, str], fieldnames: List[str]):
+    """Append one row synchronously (called via to_thread); header only for a new file."""
     filepath.parent.mkdir(parents=True, exist_ok=True)
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
+    new_file = not filepath.exists() or filepath.stat().st_size == 0
+    with open(filepath, "a", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+        if new_file:
+            writer.writeheader()
+        writer.writerow(row)
+
+
+def _latest(rows: Iterable[Dict[str, str]]) -> List[Dict[str, str]]:
+    """同 id 多筆時保留最後一筆（last-write-wins），位置維持第一次出現處"""
+    return list({r["id"]: r for r in rows}.values())
+
+
+def _arrow_latest_deals(filepath: Path, column_types: Dict[str, Any]):
+    """
+    以 pyarrow C++ CSV parser 讀 deals.csv 的指定欄位，依 id 取最後一筆
+
+    回傳 Table（順序同 _latest：id 第一次出現的位置）；空檔時為 None。
+    """
+    if not filepath.exists() or filepath.stat().st_size == 0:
+        return None
+    table = pa_csv.read_csv(filepath, convert_options=pa_csv.ConvertOptions(
+        include_columns=["id", *column_types],
+        column_types={"id": pa.string(), **column_types},
+    ))
+    if table.num_rows == 0:
+        return None
+    table = table.append_column("_row", pa.array(range(table.num_rows), pa.int64()))
+    rows = table.group_by("id").aggregate([("_row", "min"), ("_row", "max")])
+    rows = rows.sort_by("_row_min")
+    return table.take(rows["_row_max"])
+
+
+def _arrow_stage_totals(filepath: Path) -> Dict[str, Tuple[int, float, float]]:
+    """
+    以 pyarrow 彙總 deals.csv（called via to_thread）
+
+    只載入需要的四欄；先依 id 取最後一筆（append-only log），
+    再 group_by stage 一次算出 (count, amount, weighted amount)。
+    """
+    table = _arrow_latest_deals(filepath, {
+        "stage": pa.string(),
+        "amount": pa.float64(),
+        "probability": pa.int64(),
+    })
+    if table is None:
+        return {}
+    table = table.append_column(
+        "weighted", pc.divide(pc.multiply(table["amount"], table["probability"]), 100.0)
+    )
+    grouped = table.group_by("stage").aggregate(
+        [("id", "count"), ("amount", "sum"), ("weighted", "sum")]
+    )
+    return {
+        stage: (count, amount or 0.0, weighted or 0.0)
+        for stage, count, amount, weighted in zip(
+            grouped["stage"].to_pylist(),
+            grouped["id_count"].to_pylist(),
+            grouped["amount_sum"].to_pylist(),
+            grouped["weighted_sum"].to_pylist(),
+        )
+    }
+
+
+_DAY_US = 86400 * 1_000_000
+
+
+def _arrow_stagnant_deals(filepath: Path, now: datetime) -> Optional[List[Dict[str, Any]]]:
+    """
+    以欄式運算找出停滯 deals（called via to_thread）
+
+    只載入 id / title / stage / stage_entered_at 四欄，不建立 Deal；
+    天數 = floor((now - entered) / 1 day)，與 detect_stagnant_deals 相同。
+    stage_entered_at 含時區等 Arrow 無法直接轉型的格式時回傳 None，
+    由呼叫端改走 Python 版。
+    """
+    table = _arrow_latest_deals(filepath, {
+        "title": pa.string(),
+        "stage": pa.string(),
+        "stage_entered_at": pa.string(),
+    })
+    if table is None:
+        return []
+    # 各 stage 門檻（收尾階段為 null，比較結果為 null 即被濾掉）
+    open_stages = list(STAGNATION_THRESHOLDS)
+    threshold = pc.take(
+        pa.array([STAGNATION_THRESHOLDS[s] for s in open_stages], pa.int64()),
+        pc.index_in(table["stage"], value_set=pa.array([s.value for s in open_stages])),
+    )
+    # 空字串視同未設定（null → 比較為 null，不會停滯）
+    entered = pc.if_else(pc.equal(table["stage_entered_at"], ""), None, table["stage_entered_at"])
+    try:
+        entered = pc.cast(entered, pa.timestamp("us"))
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        return None
+    elapsed = pc.cast(pc.subtract(pa.scalar(now, pa.timestamp("us")), entered), pa.int64())
+    days = pc.cast(pc.floor(pc.divide(pc.cast(elapsed, pa.float64()), float(_DAY_US))), pa.int64())
+
+    mask = pc.fill_null(pc.greater(days, threshold), False)
+    return [
+        {
+            "deal_id": deal_id,
+            "title": title,
+            "stage": stage,
+            "days_in_stage": d,
+            "threshold": t,
+            "overdue_days": d - t,
+        }
+        for deal_id, title, stage, d, t in zip(
+            table["id"].filter(mask).to_pylist(),
+            table["title"].filter(mask).to_pylist(),
+            table["stage"].filter(mask).to_pylist(),
+            days.filter(mask).to_pylist(),
+            threshold.filter(mask).to_pylist(),
+        )
+    ]
 
 
 # CSV field definitions
@@ -61,6 +222,96 @@ ACTIVITY_FIELDS = ["id", "deal_id", "type", "summary", "created_at"]
 QUOTE_FIELDS = ["id", "deal_id", "version", "total_price", "margin", "evidence_log", "created_at"]
 PRODUCT_FIELDS = ["id", "name", "list_price", "cost_base"]
 
+# deals.csv 為 append-only log：更新即追加新版本，累積這麼多筆後自動壓縮
+_COMPACT_EVERY = 200
+
+
+# === Row → Domain parsers ===
+
+def _parse_client(r: Dict[str, str]) -> Client:
+    return Client(
+        id=r["id"],
+        name=r["name"],
+        industry=r.get("industry", ""),
+        tier=r.get("tier", "standard"),
+        created_at=r.get("created_at", ""),
+    )
+
+
+def _parse_deal(r: Dict[str, str]) -> Deal:
+    return Deal(
+        id=r["id"],
+        client_id=r["client_id"],
+        title=r["title"],
+        stage=STAGE_LOOKUP[r["stage"]],
+        amount=float(r.get("amount", 0)),
+        probability=int(r.get("probability", 10)),
+        owner=r.get("owner", "SALES"),
+        last_activity_at=r.get("last_activity_at", ""),
+        stage_entered_at=r.get("stage_entered_at", ""),
+        created_at=r.get("created_at", ""),
+        final_price=float(r["final_price"]) if r.get("final_price") else None,
+        lost_reason=r.get("lost_reason") or None,
+        lost_to_competitor=r.get("lost_to_competitor") or None,
+    )
+
+
+def _parse_activity(r: Dict[str, str]) -> SalesActivity:
+    return SalesActivity(
+        id=r["id"],
+        deal_id=r["deal_id"],
+        type=ACTIVITY_TYPE_LOOKUP[r.get("type", "note")],
+        summary=r.get("summary", ""),
+        created_at=r.get("created_at", ""),
+    )
+
+
+def _parse_quote(r: Dict[str, str]) -> Quote:
+    return Quote(
+        id=r["id"],
+        deal_id=r["deal_id"],
+        version=int(r.get("version", 1)),
+        total_price=float(r.get("total_price", 0)),
+        margin=float(r.get("margin", 0)),
+        evidence_log=r.get("evidence_log", ""),
+        created_at=r.get("created_at", ""),
+    )
+
+
+def _parse_product(r: Dict[str, str]) -> SalesProduct:
+    return SalesProduct(
+        id=r["id"],
+        name=r["name"],
+        list_price=float(r.get("list_price", 0)),
+        cost_base=float(r.get("cost_base", 0)),
+    )
+
+
+def _deal_row(deal: Deal) -> Dict[str, str]:
+    return {
+        "id": deal.id,
+        "client_id": deal.client_id,
+        "title": deal.title,
+        "stage": deal.stage.value,
+        "amount": str(deal.amount),
+        "probability": str(deal.probability),
+        "owner": deal.owner,
+        "last_activity_at": deal.last_activity_at,
+        "stage_entered_at": deal.stage_entered_at,
+        "created_at": deal.created_at,
+        "final_price": str(deal.final_price) if deal.final_price else "",
+        "lost_reason": deal.lost_reason or "",
+        "lost_to_competitor": deal.lost_to_competitor or "",
+    }
+
+
+def _client_name_key(client: Client) -> str:
+    return client.name.strip().lower()
+
+
+def _id_key(item: Any) -> str:
+    return item.id
+
 
 class SalesCsvRepository:
     """
@@ -75,6 +326,9 @@ class SalesCsvRepository:
         self._dir.mkdir(parents=True, exist_ok=True)
         # Locks created lazily to avoid event loop binding issues
         self._locks: Dict[str, asyncio.Lock] = {}
+        # 查找索引：cache key → ((mtime_ns, size), {key: item})
+        self._cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self._deal_appends = 0
 
     def _lock(self, name: str) -> asyncio.Lock:
         """Get or create a lock for the given resource."""
@@ -85,43 +339,74 @@ class SalesCsvRepository:
     def _path(self, name: str) -> Path:
         return self._dir / f"{name}.csv"
 
+    async def _read_deals(self) -> List[Dict[str, str]]:
+        """讀取 deals.csv 並收斂為每個 id 的最新版本"""
+        return _latest(await asyncio.to_thread(_read_csv, self._path("deals")))
+
+    async def _lookup(
+        self,
+        name: str,
+        key: str,
+        parse: Callable[[Dict[str, str]], T],
+        key_func: Callable[[T], str] = _id_key,
+    ) -> Optional[T]:
+        """
+        以記憶體索引查找單筆資料
+
+        索引在檔案 (mtime, size) 未變時沿用，變動時整檔重建；
+        deals 先收斂為最新版本；同 key 重複時保留第一筆（與原本線性
+        掃描相同）。回傳副本，
+        呼叫端修改不會污染索引。
+        """
+        path = self._path(name)
+        stamp = _stamp(path)
+        if stamp is None:
+            return None
+        cache_key = f"{name}:{key_func.__name__}"
+        cached = self._cache.get(cache_key)
+        if cached is None or cached[0] != stamp:
+            rows = await asyncio.to_thread(_read_csv, path)
+            if name == "deals":
+                rows = _latest(rows)
+            index: Dict[str, T] = {}
+            for r in rows:
+                item = parse(r)
+                index.setdefault(key_func(item), item)
+            cached = self._cache[cache_key] = (stamp, index)
+        item = cached[1].get(key)
+        return replace(item) if item is not None else None
+
+    def _invalidate(self, name: str) -> None:
+        """本程序寫入後清除該檔索引（不依賴檔案系統 mtime 解析度）"""
+        prefix = f"{name}:"
+        for cache_key in [k for k in self._cache if k.startswith(prefix)]:
+            del self._cache[cache_key]
+
     # === Clients ===
 
     async def list_clients(self) -> List[Client]:
-        rows = await asyncio.to_thread(_read_csv, self._path("clients"))
-        return [
-            Client(
-                id=r["id"],
-                name=r["name"],
-                industry=r.get("industry", ""),
-                tier=r.get("tier", "standard"),
-                created_at=r.get("created_at", ""),
-            )
-            for r in rows
-        ]
+        return await asyncio.to_thread(_select, self._path("clients"), _parse_client)
 
     async def get_client(self, client_id: str) -> Optional[Client]:
-        clients = await self.list_clients()
-        return next((c for c in clients if c.id == client_id), None)
+        return await self._lookup("clients", client_id, _parse_client)
 
     async def find_client_by_name(self, name: str) -> Optional[Client]:
-        clients = await self.list_clients()
-        name_lower = name.strip().lower()
-        return next((c for c in clients if c.name.strip().lower() == name_lower), None)
+        return await self._lookup(
+            "clients", name.strip().lower(), _parse_client, _client_name_key
+        )
 
     async def create_client(self, client: Client) -> Client:
         if not client.id:
             client.id = f"CLI-{uuid4().hex[:8].upper()}"
         async with self._lock("clients"):
-            rows = await asyncio.to_thread(_read_csv, self._path("clients"))
-            rows.append({
+            await asyncio.to_thread(_append_csv, self._path("clients"), {
                 "id": client.id,
                 "name": client.name,
                 "industry": client.industry,
                 "tier": client.tier,
                 "created_at": client.created_at,
-            })
-            await asyncio.to_thread(_write_csv, self._path("clients"), rows, CLIENT_FIELDS)
+            }, CLIENT_FIELDS)
+            self._invalidate("clients")
         return client
 
     # === Deals ===
@@ -131,151 +416,117 @@ class SalesCsvRepository:
         stage: Optional[DealStage] = None,
         client_id: Optional[str] = None,
     ) -> List[Deal]:
-        rows = await asyncio.to_thread(_read_csv, self._path("deals"))
-        deals = []
-        for r in rows:
-            deal = Deal(
-                id=r["id"],
-                client_id=r["client_id"],
-                title=r["title"],
-                stage=DealStage(r["stage"]),
-                amount=float(r.get("amount", 0)),
-                probability=int(r.get("probability", 10)),
-                owner=r.get("owner", "SALES"),
-                last_activity_at=r.get("last_activity_at", ""),
-                stage_entered_at=r.get("stage_entered_at", ""),
-                created_at=r.get("created_at", ""),
-                final_price=float(r["final_price"]) if r.get("final_price") else None,
-                lost_reason=r.get("lost_reason") or None,
-                lost_to_competitor=r.get("lost_to_competitor") or None,
-            )
-            if stage and deal.stage != stage:
-                continue
-            if client_id and deal.client_id != client_id:
-                continue
-            deals.append(deal)
-        return deals
+        match = None
+        if stage or client_id:
+            stage_value = stage.value if stage else None
+
+            def match(r: Dict[str, str]) -> bool:
+                if stage_value and r["stage"] != stage_value:
+                    return False
+                return not client_id or r["client_id"] == client_id
+
+        return await asyncio.to_thread(
+            _select, self._path("deals"), _parse_deal, match, True
+        )
 
     async def get_deal(self, deal_id: str) -> Optional[Deal]:
-        deals = await self.list_deals()
-        return next((d for d in deals if d.id == deal_id), None)
+        return await self._lookup("deals", deal_id, _parse_deal)
 
     async def create_deal(self, deal: Deal) -> Deal:
         if not deal.id:
             deal.id = f"DEAL-{uuid4().hex[:8].upper()}"
         async with self._lock("deals"):
-            rows = await asyncio.to_thread(_read_csv, self._path("deals"))
-            rows.append({
-                "id": deal.id,
-                "client_id": deal.client_id,
-                "title": deal.title,
-                "stage": deal.stage.value,
-                "amount": str(deal.amount),
-                "probability": str(deal.probability),
-                "owner": deal.owner,
-                "last_activity_at": deal.last_activity_at,
-                "stage_entered_at": deal.stage_entered_at,
-                "created_at": deal.created_at,
-                "final_price": str(deal.final_price) if deal.final_price else "",
-                "lost_reason": deal.lost_reason or "",
-                "lost_to_competitor": deal.lost_to_competitor or "",
-            })
-            await asyncio.to_thread(_write_csv, self._path("deals"), rows, DEAL_FIELDS)
+            await asyncio.to_thread(_append_csv, self._path("deals"), _deal_row(deal), DEAL_FIELDS)
+            self._invalidate("deals")
         return deal
 
     async def update_deal(self, deal: Deal) -> Optional[Deal]:
+        if await self.get_deal(deal.id) is None:
+            logger.warning(f"Deal {deal.id} not found in CSV, update skipped")
+            return None
         async with self._lock("deals"):
-            rows = await asyncio.to_thread(_read_csv, self._path("deals"))
-            found = False
-            for i, r in enumerate(rows):
-                if r["id"] == deal.id:
-                    rows[i] = {
-                        "id": deal.id,
-                        "client_id": deal.client_id,
-                        "title": deal.title,
-                        "stage": deal.stage.value,
-                        "amount": str(deal.amount),
-                        "probability": str(deal.probability),
-                        "owner": deal.owner,
-                        "last_activity_at": deal.last_activity_at,
-                        "stage_entered_at": deal.stage_entered_at,
-                        "created_at": deal.created_at,
-                        "final_price": str(deal.final_price) if deal.final_price else "",
-                        "lost_reason": deal.lost_reason or "",
-                        "lost_to_competitor": deal.lost_to_competitor or "",
-                    }
-                    found = True
-                    break
-            if not found:
-                logger.warning(f"Deal {deal.id} not found in CSV, update skipped")
+            await self._append_deal(deal)
+        return deal
+
+    async def _patch_deal(self, deal_id: str, **fields: Any) -> Optional[Deal]:
+        """只改指定欄位：索引取出現值後追加一筆新版本（不重讀、不重寫檔案）"""
+        # 先在 lock 外建好索引；lock 內再查一次只需 stat 驗證，
+        # 除非期間有其他寫入改變了檔案才會重新解析
+        if await self.get_deal(deal_id) is None:
+            return None
+        async with self._lock("deals"):
+            deal = await self.get_deal(deal_id)
+            if deal is None:
                 return None
-            await asyncio.to_thread(_write_csv, self._path("deals"), rows, DEAL_FIELDS)
+            deal = replace(deal, **fields)
+            await self._append_deal(deal)
         return deal
 
+    async def _append_deal(self, deal: Deal) -> None:
+        """追加新版本，讀取端以最後一筆為準（呼叫端須持有 deals lock）"""
+        await asyncio.to_thread(_append_csv, self._path("deals"), _deal_row(deal), DEAL_FIELDS)
+        self._invalidate("deals")
+        self._deal_appends += 1
+        if self._deal_appends >= _COMPACT_EVERY:
+            await self._compact_deals()
+
+    async def _compact_deals(self, rows: Optional[List[Dict[str, str]]] = None) -> None:
+        """重寫 deals.csv，每個 id 只留最新版本（呼叫端須持有 deals lock）"""
+        if rows is None:
+            rows = await self._read_deals()
+        await asyncio.to_thread(write_csv, self._path("deals"), rows, DEAL_FIELDS)
+        self._invalidate("deals")
+        self._deal_appends = 0
+
+    async def compact(self) -> None:
+        """
+        壓縮 append-only 的 deals.csv（可排程呼叫）
+
+        解析在 lock 外進行；取得 lock 後檔案版本戳未變才沿用，
+        否則（期間有寫入）在 lock 內重讀。
+        """
+        path = self._path("deals")
+        stamp = _stamp(path)
+        rows = await self._read_deals()
+        async with self._lock("deals"):
+            await self._compact_deals(rows if _stamp(path) == stamp else None)
+
     # === Activities ===
 
     async def list_activities(self, deal_id: Optional[str] = None) -> List[SalesActivity]:
-        rows = await asyncio.to_thread(_read_csv, self._path("activities"))
-        activities = []
-        for r in rows:
-            a = SalesActivity(
-                id=r["id"],
-                deal_id=r["deal_id"],
-                type=ActivityTypeEnum(r.get("type", "note")),
-                summary=r.get("summary", ""),
-                created_at=r.get("created_at", ""),
-            )
-            if deal_id and a.deal_id != deal_id:
-                continue
-            activities.append(a)
-        return activities
+        match = (lambda r: r["deal_id"] == deal_id) if deal_id else None
+        return await asyncio.to_thread(
+            _select, self._path("activities"), _parse_activity, match
+        )
 
     async def create_activity(self, activity: SalesActivity) -> SalesActivity:
         if not activity.id:
             activity.id = f"ACT-{uuid4().hex[:8].upper()}"
         async with self._lock("activities"):
-            rows = await asyncio.to_thread(_read_csv, self._path("activities"))
-            rows.append({
+            await asyncio.to_thread(_append_csv, self._path("activities"), {
                 "id": activity.id,
                 "deal_id": activity.deal_id,
                 "type": activity.type.value,
                 "summary": activity.summary,
                 "created_at": activity.created_at,
-            })
-            await asyncio.to_thread(_write_csv, self._path("activities"), rows, ACTIVITY_FIELDS)
+            }, ACTIVITY_FIELDS)
         # Also touch deal's last_activity_at
-        deal = await self.get_deal(activity.deal_id)
-        if deal:
-            deal.last_activity_at = activity.created_at
-            await self.update_deal(deal)
+        await self._patch_deal(activity.deal_id, last_activity_at=activity.created_at)
         return activity
 
     # === Quotes ===
 
     async def list_quotes(self, deal_id: Optional[str] = None) -> List[Quote]:
-        rows = await asyncio.to_thread(_read_csv, self._path("quotes"))
-        quotes = []
-        for r in rows:
-            q = Quote(
-                id=r["id"],
-                deal_id=r["deal_id"],
-                version=int(r.get("version", 1)),
-                total_price=float(r.get("total_price", 0)),
-                margin=float(r.get("margin", 0)),
-                evidence_log=r.get("evidence_log", ""),
-                created_at=r.get("created_at", ""),
-            )
-            if deal_id and q.deal_id != deal_id:
-                continue
-            quotes.append(q)
-        return quotes
+        match = (lambda r: r["deal_id"] == deal_id) if deal_id else None
+        return await asyncio.to_thread(
+            _select, self._path("quotes"), _parse_quote, match
+        )
 
     async def create_quote(self, quote: Quote) -> Quote:
         if not quote.id:
             quote.id = f"QUO-{uuid4().hex[:8].upper()}"
         async with self._lock("quotes"):
-            rows = await asyncio.to_thread(_read_csv, self._path("quotes"))
-            rows.append({
+            await asyncio.to_thread(_append_csv, self._path("quotes"), {
                 "id": quote.id,
                 "deal_id": quote.deal_id,
                 "version": str(quote.version),
@@ -283,62 +534,65 @@ class SalesCsvRepository:
                 "margin": str(quote.margin),
                 "evidence_log": quote.evidence_log,
                 "created_at": quote.created_at,
-            })
-            await asyncio.to_thread(_write_csv, self._path("quotes"), rows, QUOTE_FIELDS)
+            }, QUOTE_FIELDS)
         return quote
 
     # === Products ===
 
     async def list_products(self) -> List[SalesProduct]:
-        rows = await asyncio.to_thread(_read_csv, self._path("products"))
-        return [
-            SalesProduct(
-                id=r["id"],
-                name=r["name"],
-                list_price=float(r.get("list_price", 0)),
-                cost_base=float(r.get("cost_base", 0)),
-            )
-            for r in rows
-        ]
+        return await asyncio.to_thread(_select, self._path("products"), _parse_product)
 
     async def get_product(self, product_id: str) -> Optional[SalesProduct]:
-        products = await self.list_products()
-        return next((p for p in products if p.id == product_id), None)
+        return await self._lookup("products", product_id, _parse_product)
 
     # === Dashboard helpers ===
 
     async def get_pipeline_summary(self) -> Dict[str, Any]:
         """Pipeline dashboard: count + amount per stage."""
-        deals = await self.list_deals()
-        summary: Dict[str, Dict[str, Any]] = {}
-        total_weighted = 0.0
-
-        for stage in DealStage:
-            stage_deals = [d for d in deals if d.stage == stage]
-            total_amount = sum(d.amount for d in stage_deals)
-            weighted = sum(d.amount * d.probability / 100 for d in stage_deals)
-            total_weighted += weighted
-            summary[stage.value] = {
-                "count": len(stage_deals),
-                "total_amount": total_amount,
-                "weighted_amount": weighted,
-            }
-
-        return {
-            "stages": summary,
-            "total_deals": len(deals),
-            "total_weighted_pipeline": total_weighted,
-        }
+        if pa is not None:
+            # 有 pyarrow 時整段在 C++ 完成，不建立任何 Deal
+            totals = await asyncio.to_thread(_arrow_stage_totals, self._path("deals"))
+            return pipeline_summary(totals)
+
+        # 單次掃描累加各 stage（取代每個 stage 各掃一次全部 deals）
+        acc: Dict[str, List[Any]] = defaultdict(lambda: [0, 0.0, 0.0])
+        for d in await self.list_deals():
+            t = acc[d.stage.value]
+            t[0] += 1
+            t[1] += d.amount
+            t[2] += d.amount * d.probability / 100
+        return pipeline_summary({k: tuple(v) for k, v in acc.items()})
+
+    async def find_stagnant_deals(self) -> List[Dict[str, Any]]:
+        """Stagnant deal summaries for the daily briefing (see detect_stagnant_deals)."""
+        if pa is not None:
+            # 欄式掃描：不為每列建立 Deal；格式無法轉型時退回 Python 版
+            stagnant = await asyncio.to_thread(
+                _arrow_stagnant_deals, self._path("deals"), datetime.utcnow()
+            )
+            if stagnant is not None:
+                return stagnant
+        return detect_stagnant_deals(await self.list_deals())
 
 
 # --- Lazy singleton ---
 
-_sales_repo: Optional[SalesCsvRepository] = None
+_sales_repo: Optional[Any] = None
 
 
-def get_sales_repo() -> SalesCsvRepository:
-    """Get the shared SalesCsvRepository instance."""
+def get_sales_repo():
+    """
+    Get the shared sales repository instance.
+
+    SALES_BACKEND=sql 改用 SalesSqlRepository（與 CSV 版同介面）；
+    預設仍為 CSV。
+    """
     global _sales_repo
     if _sales_repo is None:
-        _sales_repo = SalesCsvRepository()
+        if os.getenv("SALES_BACKEND", "csv").lower() == "sql":
+            from app.db.database import AsyncSessionLocal
+            from app.sales.sql_repository import SalesSqlRepository
+            _sales_repo = SalesSqlRepository(session_factory=AsyncSessionLocal)
+        else:
+            _sales_repo = SalesCsvRepository()
     return _sales_repo
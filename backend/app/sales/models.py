@@ -5,10 +5,12 @@ DealStage pipeline, Client, Deal, SalesActivity, Quote, SalesProduct.
 All data persisted via CSV (Phase 1).
 """
 
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from operator import attrgetter
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class DealStage(Enum):
@@ -31,6 +33,51 @@ STAGE_PROBABILITY: Dict[DealStage, int] = {
     DealStage.CLOSED_LOST: 0,
 }
 
+# Stage -> position in declaration order
+_STAGE_ORD: Dict[DealStage, int] = {s: i for i, s in enumerate(DealStage)}
+_STAGE_BY_ORD: Tuple[DealStage, ...] = tuple(DealStage)
+# Closed stages are declared last: `_STAGE_ORD[stage] >= _TERMINAL_ORD_MIN` means closed
+_TERMINAL_ORD_MIN = _STAGE_ORD[DealStage.CLOSED_WON]
+
+
+def is_closed(stage: DealStage) -> bool:
+    """True for the terminal stages (closed won / closed lost)."""
+    return _STAGE_ORD[stage] >= _TERMINAL_ORD_MIN
+
+
+def next_stage(stage: DealStage) -> Optional[DealStage]:
+    """Next active stage in the pipeline; None at the last active stage or when closed."""
+    nxt = _STAGE_ORD[stage] + 1
+    return _STAGE_BY_ORD[nxt] if nxt < _TERMINAL_ORD_MIN else None
+
+
+# (epoch second, ISO string, naive UTC datetime) of the last generated timestamp
+_iso_cache: Tuple[int, str, Optional[datetime]] = (-1, "", None)
+
+
+def _utc_now() -> Tuple[datetime, str]:
+    """
+    Current UTC time, second resolution, as (datetime, ISO-8601 string).
+
+    Objects created within the same second share one formatted string,
+    so bulk construction formats at most once per second. The cache is
+    swapped as a single tuple so concurrent readers never see a
+    mismatched pair.
+    """
+    global _iso_cache
+    sec = int(time.time())
+    cached_sec, iso, dt = _iso_cache
+    if cached_sec != sec:
+        dt = datetime.utcfromtimestamp(sec)
+        iso = dt.isoformat()
+        _iso_cache = (sec, iso, dt)
+    return dt, iso
+
+
+def _iso_now() -> str:
+    """Current UTC time as ISO-8601, second resolution (see _utc_now)."""
+    return _utc_now()[1]
+
 
 class ActivityTypeEnum(Enum):
     """Sales activity types"""
@@ -40,7 +87,7 @@ class ActivityTypeEnum(Enum):
     NOTE = "note"
 
 
-@dataclass
+@dataclass(slots=True)
 class Client:
     """CRM Client"""
     id: str
@@ -49,21 +96,19 @@ class Client:
     tier: str = "standard"  # standard, premium, enterprise
     created_at: str = ""
 
+    # to_dict key order; attrgetter fetches every value in one C call
+    _KEYS = ("id", "name", "industry", "tier", "created_at")
+    _GET = attrgetter(*_KEYS)
+
     def __post_init__(self):
         if not self.created_at:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = _iso_now()
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "name": self.name,
-            "industry": self.industry,
-            "tier": self.tier,
-            "created_at": self.created_at,
-        }
+        return dict(zip(self._KEYS, self._GET(self)))
 
 
-@dataclass
+@dataclass(slots=True)
 class Deal:
     """Sales Deal (Opportunity)"""
     id: str
@@ -79,37 +124,48 @@ class Deal:
     final_price: Optional[float] = None
     lost_reason: Optional[str] = None
     lost_to_competitor: Optional[str] = None
+    # stage_entered_at as a datetime when this process set it; None for
+    # deals loaded from storage (the string is parsed instead)
+    _stage_entered_dt: Optional[datetime] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    _KEYS = (
+        "id",
+        "client_id",
+        "title",
+        "stage",
+        "amount",
+        "probability",
+        "owner",
+        "last_activity_at",
+        "stage_entered_at",
+        "created_at",
+        "final_price",
+        "lost_reason",
+        "lost_to_competitor",
+    )
+    _GET = attrgetter(*_KEYS)
 
     def __post_init__(self):
-        now = datetime.utcnow().isoformat()
+        now_dt, now = _utc_now()
         if not self.created_at:
             self.created_at = now
         if not self.stage_entered_at:
             self.stage_entered_at = now
+            self._stage_entered_dt = now_dt
         if not self.last_activity_at:
             self.last_activity_at = now
         if self.probability < 0:
-            self.probability = STAGE_PROBABILITY.get(self.stage, 10)
+            self.probability = STAGE_PROBABILITY[self.stage]
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "client_id": self.client_id,
-            "title": self.title,
-            "stage": self.stage.value,
-            "amount": self.amount,
-            "probability": self.probability,
-            "owner": self.owner,
-            "last_activity_at": self.last_activity_at,
-            "stage_entered_at": self.stage_entered_at,
-            "created_at": self.created_at,
-            "final_price": self.final_price,
-            "lost_reason": self.lost_reason,
-            "lost_to_competitor": self.lost_to_competitor,
-        }
-
-
-@dataclass
+        d = dict(zip(self._KEYS, self._GET(self)))
+        d["stage"] = self.stage.value
+        return d
+
+
+@dataclass(slots=True)
 class SalesActivity:
     """Sales interaction record"""
     id: str
@@ -118,21 +174,20 @@ class SalesActivity:
     summary: str = ""
     created_at: str = ""
 
+    _KEYS = ("id", "deal_id", "type", "summary", "created_at")
+    _GET = attrgetter(*_KEYS)
+
     def __post_init__(self):
         if not self.created_at:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = _iso_now()
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "deal_id": self.deal_id,
-            "type": self.type.value,
-            "summary": self.summary,
-            "created_at": self.created_at,
-        }
+        d = dict(zip(self._KEYS, self._GET(self)))
+        d["type"] = self.type.value
+        return d
 
 
-@dataclass
+@dataclass(slots=True)
 class Quote:
     """Sales quotation"""
     id: str
@@ -143,23 +198,26 @@ class Quote:
     evidence_log: str = ""
     created_at: str = ""
 
+    _KEYS = (
+        "id",
+        "deal_id",
+        "version",
+        "total_price",
+        "margin",
+        "evidence_log",
+        "created_at",
+    )
+    _GET = attrgetter(*_KEYS)
+
     def __post_init__(self):
         if not self.created_at:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = _iso_now()
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "deal_id": self.deal_id,
-            "version": self.version,
-            "total_price": self.total_price,
-            "margin": self.margin,
-            "evidence_log": self.evidence_log,
-            "created_at": self.created_at,
-        }
-
-
-@dataclass
+        return dict(zip(self._KEYS, self._GET(self)))
+
+
+@dataclass(slots=True)
 class SalesProduct:
     """Product catalog item with cost"""
     id: str
@@ -167,10 +225,8 @@ class SalesProduct:
     list_price: float = 0.0
     cost_base: float = 0.0
 
+    _KEYS = ("id", "name", "list_price", "cost_base")
+    _GET = attrgetter(*_KEYS)
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "id": self.id,
-            "name": self.name,
-            "list_price": self.list_price,
-            "cost_base": self.cost_base,
-        }
+        return dict(zip(self._KEYS, self._GET(self)))
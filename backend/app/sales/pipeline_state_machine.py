@@ -4,10 +4,10 @@ Sales Pipeline State Machine
 Valid stage transitions, deal validation, stagnation detection.
 """
 
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.sales.models import Deal, DealStage, STAGE_PROBABILITY
+from app.sales.models import STAGE_PROBABILITY, Deal, DealStage, _utc_now
 
 
 # Valid transitions: key = current stage, value = allowed next stages
@@ -29,6 +29,36 @@ STAGNATION_THRESHOLDS: Dict[DealStage, int] = {
 }
 
 
+_OK: Tuple[bool, str] = (True, "OK")
+
+# Explicit allow-list of (current, target) pairs; anything else is rejected
+_ALLOWED = frozenset(
+    (current, target)
+    for current, targets in VALID_TRANSITIONS.items()
+    for target in targets
+)
+
+
+def _build_rejections() -> Dict[Tuple[DealStage, DealStage], Tuple[bool, str]]:
+    """(current, target) → (False, reason) for every invalid pair, formatted once at import."""
+    rejections = {}
+    for current in DealStage:
+        allowed = VALID_TRANSITIONS[current]
+        allowed_names = [s.value for s in allowed]
+        for target in DealStage:
+            if target == current:
+                rejections[current, target] = (False, "Already in this stage")
+            elif target not in allowed:
+                rejections[current, target] = (
+                    False,
+                    f"Cannot transition from {current.value} to {target.value}. Allowed: {allowed_names}",
+                )
+    return rejections
+
+
+_REJECTIONS = _build_rejections()
+
+
 class NewDealValidationError(Exception):
     """Raised when a new deal fails validation."""
     def __init__(self, missing_fields: List[str]):
@@ -46,12 +76,19 @@ def validate_new_deal(
 
     Returns list of missing fields (empty = valid).
     """
+    # isspace() scans in C without building stripped copies
+    name_ok = bool(client_name) and not client_name.isspace()
+    amount_ok = amount is not None and amount > 0
+    action_ok = bool(next_action) and not next_action.isspace()
+    if name_ok and amount_ok and action_ok:
+        return []
+
     missing = []
-    if not client_name or not client_name.strip():
+    if not name_ok:
         missing.append("client_name")
-    if amount is None or amount <= 0:
+    if not amount_ok:
         missing.append("amount")
-    if not next_action or not next_action.strip():
+    if not action_ok:
         missing.append("next_action")
     return missing
 
@@ -62,14 +99,32 @@ def can_transition(current: DealStage, target: DealStage) -> Tuple[bool, str]:
 
     Returns (ok, reason).
     """
-    if current == target:
-        return False, "Already in this stage"
+    if (current, target) in _ALLOWED:
+        return _OK
+    rejection = _REJECTIONS.get((current, target))
+    if rejection is None:
+        # Not a DealStage pair at all: reject rather than fail open
+        rejection = (False, f"Invalid transition: {current!r} -> {target!r}")
+    return rejection
 
-    allowed = VALID_TRANSITIONS.get(current, [])
-    if target not in allowed:
-        allowed_names = [s.value for s in allowed]
-        return False, f"Cannot transition from {current.value} to {target.value}. Allowed: {allowed_names}"
 
+def _apply_transition(deal: Deal, target: DealStage, **fields: Any) -> Tuple[bool, str]:
+    """
+    Shared transition body: validate, then stamp stage / probability /
+    timestamps with one clock reading and set any extra deal fields.
+    """
+    ok, reason = can_transition(deal.stage, target)
+    if not ok:
+        return False, reason
+
+    now_dt, now = _utc_now()
+    deal.stage = target
+    deal.probability = STAGE_PROBABILITY[target]
+    deal.stage_entered_at = now
+    deal._stage_entered_dt = now_dt
+    deal.last_activity_at = now
+    for name, value in fields.items():
+        setattr(deal, name, value)
     return True, "OK"
 
 
@@ -83,31 +138,15 @@ def advance_deal(deal: Deal, target: DealStage) -> Tuple[bool, str]:
 
     Returns (ok, reason).
     """
-    ok, reason = can_transition(deal.stage, target)
-    if not ok:
-        return False, reason
-
-    now = datetime.utcnow().isoformat()
-    deal.stage = target
-    deal.probability = STAGE_PROBABILITY.get(target, deal.probability)
-    deal.stage_entered_at = now
-    deal.last_activity_at = now
-    return True, "OK"
+    return _apply_transition(deal, target)
 
 
 def close_won(deal: Deal, final_price: Optional[float] = None) -> Tuple[bool, str]:
     """Close a deal as won."""
-    ok, reason = can_transition(deal.stage, DealStage.CLOSED_WON)
-    if not ok:
-        return False, reason
-
-    now = datetime.utcnow().isoformat()
-    deal.stage = DealStage.CLOSED_WON
-    deal.probability = 100
-    deal.stage_entered_at = now
-    deal.last_activity_at = now
-    deal.final_price = final_price if final_price is not None else deal.amount
-    return True, "OK"
+    return _apply_transition(
+        deal, DealStage.CLOSED_WON,
+        final_price=final_price if final_price is not None else deal.amount,
+    )
 
 
 def close_lost(
@@ -116,56 +155,86 @@ def close_lost(
     competitor: Optional[str] = None,
 ) -> Tuple[bool, str]:
     """Close a deal as lost."""
-    allowed = VALID_TRANSITIONS.get(deal.stage, [])
-    if DealStage.CLOSED_LOST not in allowed:
+    ok, _ = _apply_transition(
+        deal, DealStage.CLOSED_LOST,
+        lost_reason=reason, lost_to_competitor=competitor,
+    )
+    if not ok:
         return False, f"Cannot close-lost from {deal.stage.value}"
-
-    now = datetime.utcnow().isoformat()
-    deal.stage = DealStage.CLOSED_LOST
-    deal.probability = 0
-    deal.stage_entered_at = now
-    deal.last_activity_at = now
-    deal.lost_reason = reason
-    deal.lost_to_competitor = competitor
     return True, "OK"
 
 
-def days_in_current_stage(deal: Deal) -> int:
-    """Calculate days the deal has been in its current stage."""
-    if not deal.stage_entered_at:
+def _clock(now: datetime) -> Tuple[datetime, int, str]:
+    """Precompute (now, day ordinal, time-of-day ISO) once per batch."""
+    return now, now.toordinal(), now.time().isoformat()
+
+
+def _days_in_stage_as_of(deal: Deal, clock: Tuple[datetime, int, str]) -> int:
+    """
+    Days in current stage, equal to `(now - entered).days`.
+
+    Naive `YYYY-MM-DD[THH:MM:SS[.ffffff]]` strings (what the models write)
+    are handled by slicing: day-ordinal difference, minus one when the
+    entered time-of-day is later than now's. Anything else falls back to
+    fromisoformat. Deals whose stage was set in this process carry the
+    datetime already and skip parsing entirely.
+    """
+    now, today, time_of_day = clock
+    entered_dt = deal._stage_entered_dt
+    if entered_dt is not None:
+        return (now - entered_dt).days
+    entered = deal.stage_entered_at
+    if not entered:
         return 0
     try:
-        entered = datetime.fromisoformat(deal.stage_entered_at)
-        return (datetime.utcnow() - entered).days
+        tail = entered[11:]
+        if "+" not in tail and "-" not in tail and "Z" not in tail:
+            days = today - date(int(entered[0:4]), int(entered[5:7]), int(entered[8:10])).toordinal()
+            return days - 1 if tail > time_of_day else days
+        return (now - datetime.fromisoformat(entered)).days
     except (ValueError, TypeError):
         return 0
 
 
-def is_stagnant(deal: Deal) -> bool:
-    """Check if a deal is stagnant (over threshold for its stage)."""
+def days_in_current_stage(deal: Deal) -> int:
+    """Calculate days the deal has been in its current stage."""
+    return _days_in_stage_as_of(deal, _clock(datetime.utcnow()))
+
+
+def _stagnation(deal: Deal, clock: Tuple[datetime, int, str]) -> Optional[Tuple[int, int]]:
+    """(days, threshold) when the deal is stagnant, else None; parses the timestamp once."""
     threshold = STAGNATION_THRESHOLDS.get(deal.stage)
     if threshold is None:
-        return False  # closed stages don't stagnate
-    return days_in_current_stage(deal) > threshold
+        return None  # closed stages don't stagnate
+    days = _days_in_stage_as_of(deal, clock)
+    return (days, threshold) if days > threshold else None
+
+
+def is_stagnant(deal: Deal) -> bool:
+    """Check if a deal is stagnant (over threshold for its stage)."""
+    return _stagnation(deal, _clock(datetime.utcnow())) is not None
 
 
 def detect_stagnant_deals(deals: List[Deal]) -> List[Dict]:
     """
     Return list of stagnant deal summaries for daily briefing.
+
+    Single pass: one clock reading for the whole batch; the days value
+    that decided stagnation is the one reported.
     """
+    clock = _clock(datetime.utcnow())
     stagnant = []
     for deal in deals:
-        if deal.stage in (DealStage.CLOSED_WON, DealStage.CLOSED_LOST):
+        hit = _stagnation(deal, clock)
+        if hit is None:
             continue
-        if is_stagnant(deal):
-            days = days_in_current_stage(deal)
-            threshold = STAGNATION_THRESHOLDS.get(deal.stage, 0)
-            stagnant.append({
-                "deal_id": deal.id,
-                "title": deal.title,
-                "stage": deal.stage.value,
-                "days_in_stage": days,
-                "threshold": threshold,
-                "overdue_days": days - threshold,
-            })
+        days, threshold = hit
+        stagnant.append({
+            "deal_id": deal.id,
+            "title": deal.title,
+            "stage": deal.stage.value,
+            "days_in_stage": days,
+            "threshold": threshold,
+            "overdue_days": days - threshold,
+        })
     return stagnant
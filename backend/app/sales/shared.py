@@ -0,0 +1,45 @@
+"""
+Sales Repository Shared Helpers
+
+CSV / SQL 兩種 repository 共用的 enum 查表、pipeline summary 組裝與 CSV 寫出。
+"""
+
+import csv
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from app.sales.models import ActivityTypeEnum, DealStage
+
+# 字串 → Enum 直接查 dict（省去 Enum.__call__ 的 metaclass 路徑）
+STAGE_LOOKUP: Dict[str, DealStage] = {s.value: s for s in DealStage}
+ACTIVITY_TYPE_LOOKUP: Dict[str, ActivityTypeEnum] = {t.value: t for t in ActivityTypeEnum}
+
+
+def write_csv(filepath: Path, rows: List[Dict[str, str]], fieldnames: List[str]):
+    """Write CSV file synchronously (called via to_thread)."""
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def pipeline_summary(totals: Dict[str, Tuple[int, float, float]]) -> Dict[str, Any]:
+    """stage → (count, amount, weighted amount) 組成 dashboard 回傳格式"""
+    summary: Dict[str, Dict[str, Any]] = {}
+    total_deals = 0
+    total_weighted = 0.0
+    for stage in DealStage:
+        count, amount, weighted = totals.get(stage.value, (0, 0.0, 0.0))
+        summary[stage.value] = {
+            "count": count,
+            "total_amount": amount,
+            "weighted_amount": weighted,
+        }
+        total_deals += count
+        total_weighted += weighted
+    return {
+        "stages": summary,
+        "total_deals": total_deals,
+        "total_weighted_pipeline": total_weighted,
+    }
@@ -0,0 +1,309 @@
+"""
+Sales SQL Repository
+
+SQLAlchemy-backed CRM repository. Same interface as SalesCsvRepository,
+but gets are indexed point lookups and creates are single INSERTs
+instead of re-reading / re-writing whole CSV files.
+"""
+
+import asyncio
+import logging
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import func, select, update
+
+from app.sales.csv_repository import (
+    ACTIVITY_FIELDS,
+    CLIENT_FIELDS,
+    DEAL_FIELDS,
+    PRODUCT_FIELDS,
+    QUOTE_FIELDS,
+)
+from app.sales.models import (
+    Client,
+    Deal,
+    DealStage,
+    Quote,
+    SalesActivity,
+    SalesProduct,
+)
+from app.sales.pipeline_state_machine import STAGNATION_THRESHOLDS, detect_stagnant_deals
+from app.sales.shared import (
+    ACTIVITY_TYPE_LOOKUP,
+    STAGE_LOOKUP,
+    pipeline_summary,
+    write_csv,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# === DB → Domain Converters ===
+
+def _to_client(row) -> Client:
+    return Client(
+        id=row.id,
+        name=row.name,
+        industry=row.industry or "",
+        tier=row.tier or "standard",
+        created_at=row.created_at or "",
+    )
+
+
+def _to_deal(row) -> Deal:
+    return Deal(
+        id=row.id,
+        client_id=row.client_id,
+        title=row.title,
+        stage=STAGE_LOOKUP[row.stage],
+        amount=row.amount or 0.0,
+        probability=row.probability if row.probability is not None else 10,
+        owner=row.owner or "SALES",
+        last_activity_at=row.last_activity_at or "",
+        stage_entered_at=row.stage_entered_at or "",
+        created_at=row.created_at or "",
+        final_price=row.final_price,
+        lost_reason=row.lost_reason or None,
+        lost_to_competitor=row.lost_to_competitor or None,
+    )
+
+
+def _to_activity(row) -> SalesActivity:
+    return SalesActivity(
+        id=row.id,
+        deal_id=row.deal_id,
+        type=ACTIVITY_TYPE_LOOKUP[row.type or "note"],
+        summary=row.summary or "",
+        created_at=row.created_at or "",
+    )
+
+
+def _to_quote(row) -> Quote:
+    return Quote(
+        id=row.id,
+        deal_id=row.deal_id,
+        version=row.version or 1,
+        total_price=row.total_price or 0.0,
+        margin=row.margin or 0.0,
+        evidence_log=row.evidence_log or "",
+        created_at=row.created_at or "",
+    )
+
+
+def _to_product(row) -> SalesProduct:
+    return SalesProduct(
+        id=row.id,
+        name=row.name,
+        list_price=row.list_price or 0.0,
+        cost_base=row.cost_base or 0.0,
+    )
+
+
+def _deal_values(deal: Deal) -> Dict[str, Any]:
+    """Deal dataclass → 欄位值 dict（to_dict 已將 stage 轉字串，且不含快取欄位）"""
+    return deal.to_dict()
+
+
+class SalesSqlRepository:
+    """
+    SQLAlchemy-backed Sales CRM repository.
+
+    Drop-in replacement for SalesCsvRepository (same method signatures).
+    """
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+
+    def _session(self):
+        return self._session_factory()
+
+    # === Clients ===
+
+    async def list_clients(self) -> List[Client]:
+        from app.db.models import SalesClientDB
+        async with self._session() as session:
+            rows = await session.scalars(select(SalesClientDB))
+            return [_to_client(r) for r in rows]
+
+    async def get_client(self, client_id: str) -> Optional[Client]:
+        from app.db.models import SalesClientDB
+        async with self._session() as session:
+            row = await session.get(SalesClientDB, client_id)
+            return _to_client(row) if row else None
+
+    async def find_client_by_name(self, name: str) -> Optional[Client]:
+        from app.db.models import SalesClientDB
+        name_lower = name.strip().lower()
+        async with self._session() as session:
+            row = await session.scalar(
+                select(SalesClientDB)
+                .where(func.lower(func.trim(SalesClientDB.name)) == name_lower)
+                .limit(1)
+            )
+            return _to_client(row) if row else None
+
+    async def create_client(self, client: Client) -> Client:
+        from app.db.models import SalesClientDB
+        if not client.id:
+            client.id = f"CLI-{uuid4().hex[:8].upper()}"
+        async with self._session() as session:
+            session.add(SalesClientDB(**asdict(client)))
+            await session.commit()
+        return client
+
+    # === Deals ===
+
+    async def list_deals(
+        self,
+        stage: Optional[DealStage] = None,
+        client_id: Optional[str] = None,
+    ) -> List[Deal]:
+        from app.db.models import SalesDealDB
+        stmt = select(SalesDealDB)
+        if stage:
+            stmt = stmt.where(SalesDealDB.stage == stage.value)
+        if client_id:
+            stmt = stmt.where(SalesDealDB.client_id == client_id)
+        async with self._session() as session:
+            rows = await session.scalars(stmt)
+            return [_to_deal(r) for r in rows]
+
+    async def get_deal(self, deal_id: str) -> Optional[Deal]:
+        from app.db.models import SalesDealDB
+        async with self._session() as session:
+            row = await session.get(SalesDealDB, deal_id)
+            return _to_deal(row) if row else None
+
+    async def create_deal(self, deal: Deal) -> Deal:
+        from app.db.models import SalesDealDB
+        if not deal.id:
+            deal.id = f"DEAL-{uuid4().hex[:8].upper()}"
+        async with self._session() as session:
+            session.add(SalesDealDB(**_deal_values(deal)))
+            await session.commit()
+        return deal
+
+    async def update_deal(self, deal: Deal) -> Optional[Deal]:
+        from app.db.models import SalesDealDB
+        async with self._session() as session:
+            result = await session.execute(
+                update(SalesDealDB)
+                .where(SalesDealDB.id == deal.id)
+                .values(**_deal_values(deal))
+            )
+            await session.commit()
+        if not result.rowcount:
+            logger.warning(f"Deal {deal.id} not found, update skipped")
+            return None
+        return deal
+
+    # === Activities ===
+
+    async def list_activities(self, deal_id: Optional[str] = None) -> List[SalesActivity]:
+        from app.db.models import SalesActivityDB
+        stmt = select(SalesActivityDB)
+        if deal_id:
+            stmt = stmt.where(SalesActivityDB.deal_id == deal_id)
+        async with self._session() as session:
+            rows = await session.scalars(stmt)
+            return [_to_activity(r) for r in rows]
+
+    async def create_activity(self, activity: SalesActivity) -> SalesActivity:
+        from app.db.models import SalesActivityDB, SalesDealDB
+        if not activity.id:
+            activity.id = f"ACT-{uuid4().hex[:8].upper()}"
+        values = asdict(activity)
+        values["type"] = activity.type.value
+        async with self._session() as session:
+            session.add(SalesActivityDB(**values))
+            # Also touch deal's last_activity_at（同一交易，只更新一個欄位）
+            await session.execute(
+                update(SalesDealDB)
+                .where(SalesDealDB.id == activity.deal_id)
+                .values(last_activity_at=activity.created_at)
+            )
+            await session.commit()
+        return activity
+
+    # === Quotes ===
+
+    async def list_quotes(self, deal_id: Optional[str] = None) -> List[Quote]:
+        from app.db.models import SalesQuoteDB
+        stmt = select(SalesQuoteDB)
+        if deal_id:
+            stmt = stmt.where(SalesQuoteDB.deal_id == deal_id)
+        async with self._session() as session:
+            rows = await session.scalars(stmt)
+            return [_to_quote(r) for r in rows]
+
+    async def create_quote(self, quote: Quote) -> Quote:
+        from app.db.models import SalesQuoteDB
+        if not quote.id:
+            quote.id = f"QUO-{uuid4().hex[:8].upper()}"
+        async with self._session() as session:
+            session.add(SalesQuoteDB(**asdict(quote)))
+            await session.commit()
+        return quote
+
+    # === Products ===
+
+    async def list_products(self) -> List[SalesProduct]:
+        from app.db.models import SalesProductDB
+        async with self._session() as session:
+            rows = await session.scalars(select(SalesProductDB))
+            return [_to_product(r) for r in rows]
+
+    async def get_product(self, product_id: str) -> Optional[SalesProduct]:
+        from app.db.models import SalesProductDB
+        async with self._session() as session:
+            row = await session.get(SalesProductDB, product_id)
+            return _to_product(row) if row else None
+
+    # === Dashboard helpers ===
+
+    async def get_pipeline_summary(self) -> Dict[str, Any]:
+        """Pipeline dashboard: count + amount per stage (GROUP BY stage)."""
+        from app.db.models import SalesDealDB
+        stmt = select(
+            SalesDealDB.stage,
+            func.count(),
+            func.sum(SalesDealDB.amount),
+            func.sum(SalesDealDB.amount * SalesDealDB.probability / 100.0),
+        ).group_by(SalesDealDB.stage)
+        async with self._session() as session:
+            rows = (await session.execute(stmt)).all()
+        return pipeline_summary({
+            stage: (count, amount or 0.0, weighted or 0.0)
+            for stage, count, amount, weighted in rows
+        })
+
+    async def find_stagnant_deals(self) -> List[Dict[str, Any]]:
+        """Stagnant deal summaries; closed stages are filtered out in SQL."""
+        from app.db.models import SalesDealDB
+        stmt = select(SalesDealDB).where(
+            SalesDealDB.stage.in_([s.value for s in STAGNATION_THRESHOLDS])
+        )
+        async with self._session() as session:
+            rows = await session.scalars(stmt)
+            return detect_stagnant_deals([_to_deal(r) for r in rows])
+
+    # === Export ===
+
+    async def export_to_csv(self, data_dir: Path) -> None:
+        """匯出全部資料為 CSV（與 SalesCsvRepository 相同格式）"""
+        tables = [
+            ("clients", await self.list_clients(), CLIENT_FIELDS),
+            ("deals", await self.list_deals(), DEAL_FIELDS),
+            ("activities", await self.list_activities(), ACTIVITY_FIELDS),
+            ("quotes", await self.list_quotes(), QUOTE_FIELDS),
+            ("products", await self.list_products(), PRODUCT_FIELDS),
+        ]
+        for name, items, fieldnames in tables:
+            rows = [
+                {k: "" if v is None else str(v) for k, v in item.to_dict().items()}
+                for item in items
+            ]
+            await asyncio.to_thread(write_csv, data_dir / f"{name}.csv", rows, fieldnames)
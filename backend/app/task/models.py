@@ -6,8 +6,12 @@ ID 產生器 + TaskStatus 列舉。
 Issue #14
 """
 
+import os
+import time
 from datetime import datetime
 from enum import Enum
+from types import MappingProxyType
+from typing import Mapping, Tuple
 from uuid import uuid4
 
 
@@ -31,26 +35,69 @@ class TaskStatus(str, Enum):
 
 TERMINAL_STATES = {TaskStatus.COMPLETED, TaskStatus.REJECTED, TaskStatus.ESCALATED}
 
+# DB 以 SMALLINT 儲存狀態的固定代碼表。代碼一經寫入資料庫就不可變更：
+# 新狀態只能接在最後一碼之後，與列舉的定義順序無關。
+STATUS_CODES: Mapping[str, int] = MappingProxyType({
+    "submitted": 0,
+    "planning": 1,
+    "plan_review": 2,
+    "plan_approved": 3,
+    "reasoning": 4,
+    "draft_generated": 5,
+    "schema_check": 6,
+    "rule_check": 7,
+    "draft_review": 8,
+    "draft_approved": 9,
+    "executing": 10,
+    "uat_review": 11,
+    "completed": 12,
+    "rejected": 13,
+    "escalated": 14,
+})
+STATUS_NAMES: Mapping[int, str] = MappingProxyType(
+    {code: name for name, code in STATUS_CODES.items()}
+)
+
+_uncoded = {s.value for s in TaskStatus} - STATUS_CODES.keys()
+if _uncoded:
+    raise RuntimeError(f"TaskStatus without a DB code: {sorted(_uncoded)}")
+del _uncoded
+
+
+# (UTC 日序號, "YYYYMMDD")：日期前綴每天只格式化一次
+_date_cache: Tuple[int, str] = (-1, "")
+
+
+def _date_prefix() -> str:
+    """目前 UTC 日期 YYYYMMDD（以 tuple 整體替換，多執行緒下不會讀到不一致的組合）"""
+    global _date_cache
+    now = time.time()
+    day = int(now // 86400)
+    cached_day, prefix = _date_cache
+    if cached_day != day:
+        prefix = datetime.utcfromtimestamp(now).strftime("%Y%m%d")
+        _date_cache = (day, prefix)
+    return prefix
+
+
+def _short() -> str:
+    """4 碼大寫 hex（2 bytes 亂數，不必產生整個 UUID）"""
+    return os.urandom(2).hex().upper()
+
 
 def generate_task_id() -> str:
     """產生 Task ID: TSK-YYYYMMDD-XXXX"""
-    date_str = datetime.utcnow().strftime("%Y%m%d")
-    short = uuid4().hex[:4].upper()
-    return f"TSK-{date_str}-{short}"
+    return f"TSK-{_date_prefix()}-{_short()}"
 
 
 def generate_event_id() -> str:
     """產生 Event ID: EVT-YYYYMMDD-XXXX"""
-    date_str = datetime.utcnow().strftime("%Y%m%d")
-    short = uuid4().hex[:4].upper()
-    return f"EVT-{date_str}-{short}"
+    return f"EVT-{_date_prefix()}-{_short()}"
 
 
 def generate_plan_id() -> str:
     """產生 Execution Plan ID: EP-YYYYMMDD-XXXX"""
-    date_str = datetime.utcnow().strftime("%Y%m%d")
-    short = uuid4().hex[:4].upper()
-    return f"EP-{date_str}-{short}"
+    return f"EP-{_date_prefix()}-{_short()}"
 
 
 def generate_trace_id() -> str:
@@ -7,12 +7,17 @@ Issue #14
 """
 
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from asyncio import current_task
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import func, insert, select, update
 
+from app.db.models import ExecutionPlan, Task, TaskEvent
 from app.task.models import (
+    STATUS_CODES,
     generate_task_id,
     generate_event_id,
     generate_plan_id,
@@ -42,16 +47,137 @@ def set_task_repo(repo: "TaskLifecycleRepository") -> None:
     _task_repo = repo
 
 
+# === Event helpers ===
+
+def _event_values(
+    created_at: datetime,
+    task_id: str,
+    event_type: str,
+    actor: str,
+    from_status: Optional[str] = None,
+    to_status: Optional[str] = None,
+    payload: Optional[Dict[str, Any]] = None,
+    trace_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """事件欄位值（INSERT 用，id 在 Python 端產生）"""
+    return {
+        "id": generate_event_id(),
+        "task_id": task_id,
+        "event_type": event_type,
+        "actor": actor,
+        "from_status": from_status,
+        "to_status": to_status,
+        "payload": payload or {},
+        "trace_id": trace_id,
+        "created_at": created_at,
+    }
+
+
+def _event_to_dict(values: Dict[str, Any]) -> Dict[str, Any]:
+    """事件欄位值 → API dict"""
+    result = dict(values)
+    result["created_at"] = values["created_at"].isoformat()
+    return result
+
+
+# === Task helpers ===
+
+# 列表用欄位：不含 description（可能數 KB 的 Text），只搬摘要需要的資料
+_TASK_LIST_FIELDS = (
+    "id",
+    "title",
+    "pipeline",
+    "stage",
+    "lifecycle_status",
+    "retry_count",
+    "trace_id",
+    "source",
+    "assigned_to",
+    "priority",
+    "created_at",
+    "updated_at",
+    "completed_at",
+)
+
+
+_TASK_LIST_COLUMNS = tuple(getattr(Task, name) for name in _TASK_LIST_FIELDS)
+
+
+def _task_summary_to_dict(row) -> Dict[str, Any]:
+    """列表欄位 Row → dict（_task_to_dict 去掉 description）"""
+    return {
+        "id": row.id,
+        "title": row.title,
+        "pipeline": row.pipeline,
+        "stage": row.stage,
+        "lifecycle_status": row.lifecycle_status,
+        "retry_count": row.retry_count,
+        "trace_id": row.trace_id,
+        "source": row.source,
+        "assigned_to": row.assigned_to,
+        "priority": row.priority,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        "completed_at": row.completed_at.isoformat() if row.completed_at else None,
+    }
+
+
 # === Repository ===
 
+# bulk_scope() 綁定的 (task, session)；只有建立 scope 的 task 會沿用
+_bulk_session: ContextVar[Optional[Tuple[Any, Any]]] = ContextVar(
+    "task_repo_bulk_session", default=None
+)
+
+
 class TaskLifecycleRepository:
     """SQLAlchemy-backed repository for task lifecycle"""
 
     def __init__(self, session_factory=None):
         self._session_factory = session_factory
 
-    def _session(self):
-        return self._session_factory()
+    @staticmethod
+    def _bound_session() -> Optional[Any]:
+        """目前 task 的 bulk_scope session（子 task 繼承 ContextVar 但不共用）"""
+        bound = _bulk_session.get()
+        if bound is not None and bound[0] is current_task():
+            return bound[1]
+        return None
+
+    @asynccontextmanager
+    async def bulk_scope(self) -> AsyncIterator[None]:
+        """
+        多個 repository 操作共用一個 session / 交易，離開時一次 commit
+
+        scope 內各方法只 flush（錯誤仍在當下拋出），例外時整批 rollback。
+        巢狀使用時沿用外層 scope。
+        """
+        if self._bound_session() is not None:
+            yield
+            return
+        async with self._session_factory() as session:
+            token = _bulk_session.set((current_task(), session))
+            try:
+                yield
+                await session.commit()
+            finally:
+                _bulk_session.reset(token)
+
+    @asynccontextmanager
+    async def _session(self) -> AsyncIterator[Any]:
+        session = self._bound_session()
+        if session is not None:
+            yield session
+            return
+        async with self._session_factory() as session:
+            yield session
+
+    async def _commit(self, session) -> None:
+        """bulk_scope 內只 flush，commit 留給 scope 結束時"""
+        if session is self._bound_session():
+            await session.flush()
+        else:
+            await session.commit()
 
     async def create_task(
         self,
@@ -63,8 +189,6 @@ class TaskLifecycleRepository:
         description: Optional[str] = None,
     ) -> Dict[str, Any]:
         """建立 lifecycle task（status=submitted）"""
-        from app.db.models import Task
-
         task_id = generate_task_id()
         if trace_id is None:
             trace_id = generate_trace_id()
@@ -87,7 +211,7 @@ class TaskLifecycleRepository:
                 updated_at=now,
             )
             session.add(task)
-            await session.commit()
+            await self._commit(session)
 
         logger.info(f"Created lifecycle task: {task_id} (intent={intent})")
         return {
@@ -102,8 +226,6 @@ class TaskLifecycleRepository:
 
     async def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
         """取得 task 詳情"""
-        from app.db.models import Task
-
         async with self._session() as session:
             row = await session.get(Task, task_id)
             if not row:
@@ -115,20 +237,21 @@ class TaskLifecycleRepository:
         status: Optional[str] = None,
         limit: int = 50,
     ) -> List[Dict[str, Any]]:
-        """列出 lifecycle tasks"""
-        from app.db.models import Task
+        """列出 lifecycle tasks（摘要欄位，不含 description；詳情用 get_task）"""
+        if status and status not in STATUS_CODES:
+            return []  # 未知狀態：沒有任何 task 符合
 
         async with self._session() as session:
-            stmt = select(Task).where(Task.pipeline == "lifecycle")
+            stmt = select(*_TASK_LIST_COLUMNS).where(Task.pipeline == "lifecycle")
 
             if status:
                 stmt = stmt.where(Task.lifecycle_status == status)
 
             stmt = stmt.order_by(Task.created_at.desc()).limit(limit)
             result = await session.execute(stmt)
-            rows = result.scalars().all()
+            rows = result.all()
 
-        return [self._task_to_dict(r) for r in rows]
+        return [_task_summary_to_dict(r) for r in rows]
 
     async def update_lifecycle_status(
         self,
@@ -136,24 +259,29 @@ class TaskLifecycleRepository:
         new_status: str,
         retry_count: Optional[int] = None,
     ) -> Optional[Dict[str, Any]]:
-        """更新 lifecycle_status"""
-        from app.db.models import Task
+        """更新 lifecycle_status（單一 UPDATE ... RETURNING，不先 SELECT 也不重讀）"""
+        now = datetime.utcnow()
+        values: Dict[str, Any] = {
+            "lifecycle_status": new_status,
+            "stage": new_status,
+            "updated_at": now,
+        }
+        if retry_count is not None:
+            values["retry_count"] = retry_count
+        if new_status == "completed":
+            values["completed_at"] = now
 
         async with self._session() as session:
-            row = await session.get(Task, task_id)
-            if not row:
+            result = await session.execute(
+                update(Task).where(Task.id == task_id).values(**values).returning(Task)
+            )
+            row = result.scalar_one_or_none()
+            if row is None:
                 return None
+            task = self._task_to_dict(row)
+            await self._commit(session)
 
-            row.lifecycle_status = new_status
-            row.stage = new_status
-            row.updated_at = datetime.utcnow()
-            if retry_count is not None:
-                row.retry_count = retry_count
-            if new_status == "completed":
-                row.completed_at = datetime.utcnow()
-            await session.commit()
-
-        return await self.get_task(task_id)
+        return task
 
     async def record_event(
         self,
@@ -166,65 +294,83 @@ class TaskLifecycleRepository:
         trace_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """記錄不可變事件"""
-        from app.db.models import TaskEvent
+        values = _event_values(
+            datetime.utcnow(),
+            task_id=task_id,
+            event_type=event_type,
+            actor=actor,
+            from_status=from_status,
+            to_status=to_status,
+            payload=payload,
+            trace_id=trace_id,
+        )
+        async with self._session() as session:
+            session.add(TaskEvent(**values))
+            await self._commit(session)
 
-        event_id = generate_event_id()
-        now = datetime.utcnow()
+        return _event_to_dict(values)
 
+    async def record_events_bulk(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        批次記錄事件（單一交易，Core INSERT executemany）
+
+        每筆 dict 的 key 同 record_event 參數（task_id / event_type / actor 必填）。
+        created_at 依序遞增 1 微秒，get_task_events 的排序與傳入順序一致。
+        """
+        if not events:
+            return []
+
+        now = datetime.utcnow()
+        rows = [
+            _event_values(now + timedelta(microseconds=i), **event)
+            for i, event in enumerate(events)
+        ]
         async with self._session() as session:
-            event = TaskEvent(
-                id=event_id,
-                task_id=task_id,
-                event_type=event_type,
-                actor=actor,
-                from_status=from_status,
-                to_status=to_status,
-                payload=payload or {},
-                trace_id=trace_id,
-                created_at=now,
+            await session.execute(insert(TaskEvent), rows)
+            await self._commit(session)
+
+        return [_event_to_dict(r) for r in rows]
+
+    async def stream_task_events(self, task_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        逐筆產生 task 的事件歷史
+
+        以 server-side cursor 串流欄位值（不建 ORM 物件、不進 identity map），
+        記憶體用量與事件數量無關。
+        """
+        stmt = (
+            select(
+                TaskEvent.id,
+                TaskEvent.task_id,
+                TaskEvent.event_type,
+                TaskEvent.actor,
+                TaskEvent.from_status,
+                TaskEvent.to_status,
+                TaskEvent.payload,
+                TaskEvent.trace_id,
+                TaskEvent.created_at,
             )
-            session.add(event)
-            await session.commit()
-
-        return {
-            "id": event_id,
-            "task_id": task_id,
-            "event_type": event_type,
-            "actor": actor,
-            "from_status": from_status,
-            "to_status": to_status,
-            "payload": payload or {},
-            "trace_id": trace_id,
-            "created_at": now.isoformat(),
-        }
+            .where(TaskEvent.task_id == task_id)
+            .order_by(TaskEvent.created_at.asc())
+        )
+        async with self._session() as session:
+            result = await session.stream(stmt)
+            async for r in result:
+                yield {
+                    "id": r.id,
+                    "task_id": r.task_id,
+                    "event_type": r.event_type,
+                    "actor": r.actor,
+                    "from_status": r.from_status,
+                    "to_status": r.to_status,
+                    "payload": r.payload,
+                    "trace_id": r.trace_id,
+                    "created_at": r.created_at.isoformat() if r.created_at else None,
+                }
 
     async def get_task_events(self, task_id: str) -> List[Dict[str, Any]]:
         """取得 task 的事件歷史"""
-        from app.db.models import TaskEvent
-
-        async with self._session() as session:
-            stmt = (
-                select(TaskEvent)
-                .where(TaskEvent.task_id == task_id)
-                .order_by(TaskEvent.created_at.asc())
-            )
-            result = await session.execute(stmt)
-            rows = result.scalars().all()
-
-        return [
-            {
-                "id": r.id,
-                "task_id": r.task_id,
-                "event_type": r.event_type,
-                "actor": r.actor,
-                "from_status": r.from_status,
-                "to_status": r.to_status,
-                "payload": r.payload,
-                "trace_id": r.trace_id,
-                "created_at": r.created_at.isoformat() if r.created_at else None,
-            }
-            for r in rows
-        ]
+        return [event async for event in self.stream_task_events(task_id)]
 
     async def save_execution_plan(
         self,
@@ -234,16 +380,15 @@ class TaskLifecycleRepository:
         risk_factors: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """儲存執行計畫"""
-        from app.db.models import ExecutionPlan
-
         plan_id = generate_plan_id()
         now = datetime.utcnow()
 
-        # 計算版本號
-        existing = await self.get_execution_plan(task_id)
-        version = (existing["version"] + 1) if existing else 1
-
         async with self._session() as session:
+            # 版本號：同一 session 內取 MAX(version)+1，不載入舊 plan_json
+            version = await session.scalar(
+                select(func.coalesce(func.max(ExecutionPlan.version), 0) + 1)
+                .where(ExecutionPlan.task_id == task_id)
+            )
             plan = ExecutionPlan(
                 id=plan_id,
                 task_id=task_id,
@@ -255,7 +400,7 @@ class TaskLifecycleRepository:
                 created_at=now,
             )
             session.add(plan)
-            await session.commit()
+            await self._commit(session)
 
         return {
             "id": plan_id,
@@ -270,8 +415,6 @@ class TaskLifecycleRepository:
 
     async def get_execution_plan(self, task_id: str) -> Optional[Dict[str, Any]]:
         """取得最新的執行計畫"""
-        from app.db.models import ExecutionPlan
-
         async with self._session() as session:
             stmt = (
                 select(ExecutionPlan)
@@ -299,8 +442,6 @@ class TaskLifecycleRepository:
 
     async def approve_plan(self, task_id: str) -> Optional[Dict[str, Any]]:
         """核准最新的執行計畫"""
-        from app.db.models import ExecutionPlan
-
         async with self._session() as session:
             stmt = (
                 select(ExecutionPlan)
@@ -316,7 +457,7 @@ class TaskLifecycleRepository:
 
             row.status = "approved"
             row.approved_at = datetime.utcnow()
-            await session.commit()
+            await self._commit(session)
 
             return {
                 "id": row.id,
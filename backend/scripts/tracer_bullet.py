@@ -12,11 +12,22 @@ Tracer Bullet: 驗證完整流程
 使用方式：
     cd backend
     python -m scripts.tracer_bullet
+
+    # 重複執行時快取 Intake 結果（跳過 LLM 呼叫）
+    TRACER_INTAKE_CACHE=/tmp/intake_cache python -m scripts.tracer_bullet
 """
 
 import asyncio
+import hashlib
+import io
+import json
+import os
 import sys
+from dataclasses import asdict
+from datetime import datetime
+from functools import partial
 from pathlib import Path
+from typing import Any, Dict, List
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -24,8 +35,16 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.knowledge.models import KnowledgeType
 from app.knowledge.repository import KnowledgeRepository
 from app.engines.meddic.engine import MEDDICEngine
+from app.intake import processor as processor_module
 from app.intake.processor import IntakeProcessor
-from app.intake.models import InputType
+from app.intake.models import (
+    CEOInput,
+    InputIntent,
+    InputStatus,
+    InputType,
+    ParsedEntity,
+    StructuredOpportunity,
+)
 
 
 # === Seed Data: 預設知識 ===
@@ -144,27 +163,130 @@ SEED_CASES = [
     },
 ]
 
+# 匯入時一次正規化：去掉內容前後空白，分類與標籤字串 intern 共用
+for _case in SEED_CASES:
+    _case["content"] = _case["content"].strip()
+    _case["category"] = sys.intern(_case["category"])
+    _case["tags"] = [sys.intern(tag) for tag in _case["tags"]]
+del _case
+
 
 async def seed_knowledge(repo: KnowledgeRepository):
     """載入種子資料"""
     print("\n📚 載入知識庫種子資料...")
 
-    for data in SEED_CASES:
-        card = await repo.create(
-            type=data["type"],
-            title=data["title"],
-            summary=data["summary"],
-            content=data["content"],
-            category=data["category"],
-            tags=data["tags"],
-            metadata=data["metadata"],
-            created_by="system",
-        )
+    # 一次批次寫入（依原順序回傳）
+    cards = await repo.create_many([
+        {**data, "created_by": "system"} for data in SEED_CASES
+    ])
+    for card in cards:
         print(f"  ✓ {card.id}: {card.title}")
 
     print(f"\n  知識庫共 {repo.count()} 筆資料")
 
 
+# Intake 結果快取目錄（未設定則不快取）；場景輸入固定，重跑時可跳過 LLM
+INTAKE_CACHE_DIR = os.environ.get("TRACER_INTAKE_CACHE")
+
+
+def _intake_cache_key(intake_processor: IntakeProcessor, ceo_input: str) -> str:
+    """
+    快取 key：provider / model + intake 處理器原始碼（含 prompt 與關鍵字表）+ 輸入內容
+
+    換模型或改 prompt 後 key 就不同，不會重播過期的結果。
+    """
+    llm = intake_processor.llm
+    model = f"{llm.provider_name}:{llm.model_name}" if llm else "keyword-fallback"
+    digest = hashlib.sha256(model.encode())
+    digest.update(Path(processor_module.__file__).read_bytes())
+    digest.update(ceo_input.encode())
+    return digest.hexdigest()
+
+
+def _intake_to_cache(result: CEOInput) -> Dict[str, Any]:
+    """CEOInput → JSON 可存的 dict（to_dict 加上 tracer 需要的實體與結構化商機）"""
+    data = result.to_dict()
+    data["parsed_entities"] = [asdict(e) for e in result.parsed_entities]
+    opportunity = result.structured_opportunity
+    data["structured_opportunity"] = asdict(opportunity) if opportunity else None
+    return data
+
+
+def _intake_from_cache(data: Dict[str, Any]) -> CEOInput:
+    """_intake_to_cache 的反向：只還原 tracer 會讀到的欄位"""
+    opportunity = data["structured_opportunity"]
+    return CEOInput(
+        id=data["id"],
+        raw_content=data["raw_content"],
+        input_type=InputType(data["input_type"]),
+        source=data["source"],
+        intent=InputIntent(data["intent"]),
+        intent_confidence=data["intent_confidence"],
+        parsed_entities=[ParsedEntity(**e) for e in data["parsed_entities"]],
+        structured_opportunity=StructuredOpportunity(**opportunity) if opportunity else None,
+        status=InputStatus(data["status"]),
+        summary=data["summary"],
+        suggested_actions=data["suggested_actions"],
+        requires_confirmation=data["requires_confirmation"],
+        ceo_confirmed=data["ceo_confirmed"],
+        routed_to=data["routed_to"],
+        created_entity_id=data["created_entity_id"],
+        created_at=datetime.fromisoformat(data["created_at"]),
+    )
+
+
+async def _process_intake(intake_processor: IntakeProcessor, ceo_input: str) -> CEOInput:
+    """IntakeProcessor.process；有設定快取目錄時以 JSON 檔快取結果（不使用 pickle）"""
+    cache_path = None
+    if INTAKE_CACHE_DIR:
+        key = _intake_cache_key(intake_processor, ceo_input)
+        cache_path = Path(INTAKE_CACHE_DIR) / f"{key}.json"
+        if cache_path.exists():
+            return _intake_from_cache(json.loads(cache_path.read_text(encoding="utf-8")))
+
+    result = await intake_processor.process(
+        content=ceo_input,
+        input_type=InputType.TEXT,
+        source="ceo_direct",
+    )
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(
+            json.dumps(_intake_to_cache(result), ensure_ascii=False), encoding="utf-8"
+        )
+    return result
+
+
+# MEDDIC 結果表格的固定部分（只建一次）
+_BOX_TOP = f"   ┌{'─'*50}┐"
+_BOX_BOTTOM = f"   └{'─'*50}┘"
+
+
+def _clip(text: str, width: int) -> str:
+    """超過 width 字元時截斷並加上 ...（逐字元截斷，中文不需要空白斷詞）"""
+    return text if len(text) <= width else f"{text[:width]}..."
+
+
+def _meddic_row(label: str, component, max_score: int) -> str:
+    found = "已識別" if component.identified else "未識別"
+    return f"   │ {label:<20} │ {found:<10} │ 分數: {component.score}/{max_score} │"
+
+
+def _meddic_box(meddic_result) -> List[str]:
+    """MEDDIC 分析結果表格（各行組好後一次輸出）"""
+    lines = ["\n   MEDDIC 分析結果:", _BOX_TOP]
+    lines.append(_meddic_row("Pain (痛點)", meddic_result.pain, 10))
+    if meddic_result.pain.description:
+        lines.append(f"   │   描述: {_clip(meddic_result.pain.description, 35)}")
+    lines.append(_meddic_row("Champion (內樁)", meddic_result.champion, 9))
+    if meddic_result.champion.title:
+        lines.append(f"   │   職稱: {meddic_result.champion.title}")
+    lines.append(_meddic_row("Economic Buyer", meddic_result.economic_buyer, 10))
+    lines.append(_BOX_BOTTOM)
+    return lines
+
+
 async def run_scenario(
     scenario_name: str,
     ceo_input: str,
@@ -172,129 +294,121 @@ async def run_scenario(
     meddic_engine: MEDDICEngine,
     intake_processor: IntakeProcessor,
 ):
-    """執行測試場景"""
-    print(f"\n{'='*60}")
-    print(f"🎯 場景: {scenario_name}")
-    print(f"{'='*60}")
+    """
+    執行測試場景
+
+    輸出先寫入本場景的 buffer（多個場景同時執行時不會交錯），
+    隨結果一起回傳，由呼叫端依序印出。
+    """
+    buf = io.StringIO()
+    out = partial(print, file=buf)
+
+    out(f"\n{'='*60}")
+    out(f"🎯 場景: {scenario_name}")
+    out(f"{'='*60}")
 
     # Step 1: CEO 輸入
-    print(f"\n📝 CEO 輸入:")
-    print(f"   \"{ceo_input}\"")
+    out(f"\n📝 CEO 輸入:")
+    out(f"   \"{ceo_input}\"")
 
     # Step 2: Intake 處理（意圖識別 + 實體解析）
-    print(f"\n🔍 Step 1: GATEKEEPER 處理輸入...")
-    intake_result = await intake_processor.process(
-        content=ceo_input,
-        input_type=InputType.TEXT,
-        source="ceo_direct",
-    )
+    out(f"\n🔍 Step 1: GATEKEEPER 處理輸入...")
+    intake_result = await _process_intake(intake_processor, ceo_input)
 
-    print(f"   意圖: {intake_result.intent.value} (信心度: {intake_result.intent_confidence:.0%})")
-    print(f"   狀態: {intake_result.status.value}")
+    out(f"   意圖: {intake_result.intent.value} (信心度: {intake_result.intent_confidence:.0%})")
+    out(f"   狀態: {intake_result.status.value}")
 
+    # 列印實體時順便收集公司名稱，供知識庫搜尋使用
+    companies = []
     if intake_result.parsed_entities:
-        print(f"   解析實體:")
+        out(f"   解析實體:")
         for entity in intake_result.parsed_entities:
-            print(f"     - {entity.entity_type}: {entity.value}")
+            out(f"     - {entity.entity_type}: {entity.value}")
+            if entity.entity_type == "company":
+                companies.append(entity.value)
 
     # Step 3: 查詢知識庫
-    print(f"\n📖 Step 2: 查詢知識庫...")
+    out(f"\n📖 Step 2: 查詢知識庫...")
 
-    # 從輸入中提取搜尋關鍵字
-    search_terms = []
+    # 從輸入中提取搜尋關鍵字（dict 去重並保留順序）
+    search_terms: Dict[str, None] = {}
     if intake_result.structured_opportunity:
         if intake_result.structured_opportunity.industry:
-            search_terms.append(intake_result.structured_opportunity.industry)
+            search_terms[intake_result.structured_opportunity.industry] = None
     # 簡單提取：找到的公司實體
-    for entity in intake_result.parsed_entities:
-        if entity.entity_type == "company":
-            search_terms.append(entity.value)
+    search_terms.update(dict.fromkeys(companies))
 
     # 加入一些通用搜尋詞
-    search_query = " ".join(search_terms) if search_terms else "案例"
+    search_query = " ".join(search_terms) or "案例"
 
-    similar_cases = await knowledge_repo.search(
-        query=search_query,
-        filters={"type": "case"},
-        limit=3,
-    )
+    # 案例與經驗兩個查詢合併為一次批次搜尋
+    similar_cases, lessons = await knowledge_repo.search_batch([
+        {"query": search_query, "filters": {"type": "case"}, "limit": 3},
+        {"query": search_query, "filters": {"type": "lesson"}, "limit": 2},
+    ])
 
     if similar_cases:
-        print(f"   找到 {len(similar_cases)} 個相關案例:")
+        out(f"   找到 {len(similar_cases)} 個相關案例:")
         for result in similar_cases:
-            print(f"     - {result.card.title}")
-            print(f"       {result.card.summary}")
+            out(f"     - {result.card.title}")
+            out(f"       {result.card.summary}")
     else:
-        print(f"   未找到相關案例")
-
-    # 查詢相關經驗
-    lessons = await knowledge_repo.search(
-        query=search_query,
-        filters={"type": "lesson"},
-        limit=2,
-    )
+        out(f"   未找到相關案例")
 
     if lessons:
-        print(f"\n   找到 {len(lessons)} 個相關經驗:")
+        out(f"\n   找到 {len(lessons)} 個相關經驗:")
         for result in lessons:
-            print(f"     - {result.card.title}")
+            out(f"     - {result.card.title}")
 
     # Step 4: MEDDIC 分析
-    print(f"\n📊 Step 3: MEDDIC 分析...")
-
-    entities = [
-        {"entity_type": e.entity_type, "value": e.value}
-        for e in intake_result.parsed_entities
-    ]
+    out(f"\n📊 Step 3: MEDDIC 分析...")
 
-    meddic_result = await meddic_engine.analyze(
-        content=ceo_input,
-        entities=entities,
-    )
+    # 與 GatekeeperAgent 相同：只有商機才做 MEDDIC，其他意圖的分析結果用不到
+    meddic_result = None
+    if intake_result.intent != InputIntent.OPPORTUNITY:
+        out(f"   非商機意圖，略過 MEDDIC 分析")
+    else:
+        meddic_result = await meddic_engine.analyze(
+            content=ceo_input,
+            entities=intake_result.parsed_entities,
+        )
 
-    print(f"\n   MEDDIC 分析結果:")
-    print(f"   ┌{'─'*50}┐")
-    print(f"   │ {'Pain (痛點)':<20} │ {'已識別' if meddic_result.pain.identified else '未識別':<10} │ 分數: {meddic_result.pain.score}/10 │")
-    if meddic_result.pain.description:
-        print(f"   │   描述: {meddic_result.pain.description[:35]}{'...' if len(meddic_result.pain.description) > 35 else ''}")
-    print(f"   │ {'Champion (內樁)':<20} │ {'已識別' if meddic_result.champion.identified else '未識別':<10} │ 分數: {meddic_result.champion.score}/9 │")
-    if meddic_result.champion.title:
-        print(f"   │   職稱: {meddic_result.champion.title}")
-    print(f"   │ {'Economic Buyer':<20} │ {'已識別' if meddic_result.economic_buyer.identified else '未識別':<10} │ 分數: {meddic_result.economic_buyer.score}/10 │")
-    print(f"   └{'─'*50}┘")
+        out("\n".join(_meddic_box(meddic_result)))
 
-    print(f"\n   總分: {meddic_result.total_score}/100")
-    print(f"   健康度: {meddic_result.deal_health}")
+        out(f"\n   總分: {meddic_result.total_score}/100")
+        out(f"   健康度: {meddic_result.deal_health}")
 
     # Step 5: 產出建議
-    print(f"\n💡 Step 4: 建議動作...")
+    out(f"\n💡 Step 4: 建議動作...")
 
-    gaps = meddic_result.get_gaps()
-    if gaps:
-        print(f"   ⚠️  MEDDIC 缺口:")
-        for gap in gaps:
-            print(f"      - {gap}")
+    if meddic_result is not None:
+        gaps = meddic_result.get_gaps()
+        if gaps:
+            out(f"   ⚠️  MEDDIC 缺口:")
+            for gap in gaps:
+                out(f"      - {gap}")
 
-    actions = meddic_result.get_next_actions()
-    print(f"\n   📋 建議下一步:")
-    for i, action in enumerate(actions, 1):
-        print(f"      {i}. {action}")
+        actions = meddic_result.get_next_actions()
+        out(f"\n   📋 建議下一步:")
+        for i, action in enumerate(actions, 1):
+            out(f"      {i}. {action}")
 
     # 如果有類似案例，加入參考建議
     if similar_cases:
         best_case = similar_cases[0].card
         if best_case.metadata.get("outcome") == "won":
-            print(f"\n   📌 參考成功案例: {best_case.title}")
+            out(f"\n   📌 參考成功案例: {best_case.title}")
             if "關鍵成功因素" in best_case.content:
-                print(f"      可參考此案例的成功因素")
+                out(f"      可參考此案例的成功因素")
 
-    print(f"\n{'='*60}")
+    out(f"\n{'='*60}")
 
     return {
         "scenario": scenario_name,
         "intake": intake_result,
         "similar_cases": similar_cases,
         "meddic": meddic_result,
+        "output": buf.getvalue(),
     }
 
 
@@ -347,16 +461,19 @@ BigCorp International
         },
     ]
 
-    results = []
-    for scenario in scenarios:
-        result = await run_scenario(
+    # 場景互不相依：同時執行，LLM / 知識庫 / MEDDIC 的等待彼此重疊
+    results = await asyncio.gather(*(
+        run_scenario(
             scenario_name=scenario["name"],
             ceo_input=scenario["input"],
             knowledge_repo=knowledge_repo,
             meddic_engine=meddic_engine,
             intake_processor=intake_processor,
         )
-        results.append(result)
+        for scenario in scenarios
+    ))
+    for result in results:
+        print(result["output"], end="")
 
     # === 總結 ===
     print("\n" + "="*60)
@@ -375,7 +492,10 @@ BigCorp International
     for result in results:
         meddic = result["meddic"]
         print(f"  {result['scenario'][:30]}...")
-        print(f"    總分: {meddic.total_score}/100 | 健康度: {meddic.deal_health}")
+        if meddic is None:
+            print(f"    略過（意圖: {result['intake'].intent.value}）")
+        else:
+            print(f"    總分: {meddic.total_score}/100 | 健康度: {meddic.deal_health}")
 
     print("\n" + "="*60)
     print("✅ Tracer Bullet 完成！流程驗證通過。")
@@ -5,16 +5,24 @@ Agent 測試腳本
 """
 
 import asyncio
+import io
+from functools import partial
+
 from app.agents.gatekeeper import GatekeeperAgent, analyze_input
 from app.agents.hunter import HunterAgent
 from app.agents.orchestrator import OrchestratorAgent
 
+# 各流程共用同一組 Agent（初始化只做一次）
+_gatekeeper = GatekeeperAgent()
+_hunter = HunterAgent()
+_orchestrator = OrchestratorAgent()
 
-async def test_opportunity_flow():
-    """測試商機流程"""
-    print("\n" + "=" * 60)
-    print("🧪 測試 1: 商機流程 (GATEKEEPER → HUNTER)")
-    print("=" * 60)
+
+async def test_opportunity_flow(out=print):
+    """測試商機流程（out: 輸出函式，預設直接 print）"""
+    out("\n" + "=" * 60)
+    out("🧪 測試 1: 商機流程 (GATEKEEPER → HUNTER)")
+    out("=" * 60)
 
     # CEO 輸入
     ceo_input = """
@@ -23,45 +31,43 @@ async def test_opportunity_flow():
     想下週約個會議聊聊，預算大概 200 萬。
     """
 
-    print(f"\n📥 CEO 輸入:\n{ceo_input}")
+    out(f"\n📥 CEO 輸入:\n{ceo_input}")
 
     # 1. GATEKEEPER 分析
-    print("\n🚪 GATEKEEPER 分析中...")
-    gatekeeper = GatekeeperAgent()
-    analysis = await gatekeeper.analyze(ceo_input)
+    out("\n🚪 GATEKEEPER 分析中...")
+    analysis = await _gatekeeper.analyze(ceo_input)
 
-    print(f"\n📊 分析結果:")
-    print(f"   意圖: {analysis.intent.value} (信心度: {analysis.confidence:.0%})")
-    print(f"   路由: {analysis.route_to}")
-    print(f"   需確認: {analysis.requires_confirmation}")
+    out(f"\n📊 分析結果:")
+    out(f"   意圖: {analysis.intent.value} (信心度: {analysis.confidence:.0%})")
+    out(f"   路由: {analysis.route_to}")
+    out(f"   需確認: {analysis.requires_confirmation}")
 
-    print(f"\n📋 識別的實體:")
+    out(f"\n📋 識別的實體:")
     for entity in analysis.entities:
-        print(f"   - {entity.entity_type}: {entity.value}")
+        out(f"   - {entity.entity_type}: {entity.value}")
 
     if analysis.meddic_analysis:
         meddic = analysis.meddic_analysis
-        print(f"\n📈 MEDDIC 分析:")
-        print(f"   Pain: {meddic['pain']['score']}/10 (已識別: {meddic['pain']['identified']})")
-        print(f"   Champion: {meddic['champion']['score']}/9 (已識別: {meddic['champion']['identified']})")
-        print(f"   EB: {meddic['economic_buyer']['score']}/10 (已識別: {meddic['economic_buyer']['identified']})")
-        print(f"   總分: {meddic['total_score']}/100")
-        print(f"   健康度: {meddic.get('deal_health', 'N/A')}")
+        out(f"\n📈 MEDDIC 分析:")
+        out(f"   Pain: {meddic['pain']['score']}/10 (已識別: {meddic['pain']['identified']})")
+        out(f"   Champion: {meddic['champion']['score']}/9 (已識別: {meddic['champion']['identified']})")
+        out(f"   EB: {meddic['economic_buyer']['score']}/10 (已識別: {meddic['economic_buyer']['identified']})")
+        out(f"   總分: {meddic['total_score']}/100")
+        out(f"   健康度: {meddic.get('deal_health', 'N/A')}")
 
         if meddic['gaps']:
-            print(f"\n⚠️  缺口:")
+            out(f"\n⚠️  缺口:")
             for gap in meddic['gaps']:
-                print(f"   - {gap}")
+                out(f"   - {gap}")
 
         if meddic['next_actions']:
-            print(f"\n💡 建議動作:")
+            out(f"\n💡 建議動作:")
             for action in meddic['next_actions']:
-                print(f"   - {action}")
+                out(f"   - {action}")
 
     # 2. HUNTER 處理
     if analysis.route_to == "HUNTER":
-        print("\n\n🎯 HUNTER 接手處理...")
-        hunter = HunterAgent()
+        out("\n\n🎯 HUNTER 接手處理...")
 
         # 轉換實體格式
         entities = [
@@ -69,50 +75,52 @@ async def test_opportunity_flow():
             for e in analysis.entities
         ]
 
-        result = await hunter.process_intake(
+        result = await _hunter.process_intake(
             content=ceo_input,
             entities=entities,
             meddic_analysis=analysis.meddic_analysis,
         )
-
-        print(f"\n✅ 商機已建立:")
         opp = result['opportunity']
-        print(f"   ID: {opp['id']}")
-        print(f"   名稱: {opp['name']}")
-        print(f"   公司: {opp['company']}")
-        print(f"   金額: ${opp['amount']:,.0f}" if opp['amount'] else "   金額: 未知")
-        print(f"   階段: {opp['stage']}")
-        print(f"   MEDDIC: {opp['meddic']['total_score']}/100 ({opp['meddic']['health']})")
+
+        # 3. 下一步建議只依賴商機 ID：商機建立後立即開始，與下方輸出重疊
+        suggestion_task = asyncio.create_task(_hunter.suggest_action(opp['id']))
+
+        out(f"\n✅ 商機已建立:")
+        out(f"   ID: {opp['id']}")
+        out(f"   名稱: {opp['name']}")
+        out(f"   公司: {opp['company']}")
+        out(f"   金額: ${opp['amount']:,.0f}" if opp['amount'] else "   金額: 未知")
+        out(f"   階段: {opp['stage']}")
+        out(f"   MEDDIC: {opp['meddic']['total_score']}/100 ({opp['meddic']['health']})")
 
         if result['suggestions']:
-            print(f"\n📝 處理建議:")
+            out(f"\n📝 處理建議:")
             for sug in result['suggestions']:
-                print(f"   - {sug}")
+                out(f"   - {sug}")
 
-        # 3. 取得下一步建議
-        print("\n\n🤔 HUNTER 思考下一步...")
-        suggestion = await hunter.suggest_action(opp['id'])
+        out("\n\n🤔 HUNTER 思考下一步...")
+        suggestion = await suggestion_task
 
-        print(f"\n💭 建議動作:")
-        print(f"   動作: {suggestion.action.value}")
-        print(f"   原因: {suggestion.reasoning}")
-        print(f"   信心度: {suggestion.confidence:.0%}")
+        out(f"\n💭 建議動作:")
+        out(f"   動作: {suggestion.action.value}")
+        out(f"   原因: {suggestion.reasoning}")
+        out(f"   信心度: {suggestion.confidence:.0%}")
 
         if suggestion.suggested_next_steps:
-            print(f"\n📋 具體步驟:")
+            out(f"\n📋 具體步驟:")
             for step in suggestion.suggested_next_steps:
-                print(f"   - {step}")
+                out(f"   - {step}")
 
         return opp['id']
 
     return None
 
 
-async def test_project_flow():
-    """測試專案流程"""
-    print("\n" + "=" * 60)
-    print("🧪 測試 2: 專案流程 (GATEKEEPER → ORCHESTRATOR)")
-    print("=" * 60)
+async def test_project_flow(out=print):
+    """測試專案流程（out: 輸出函式，預設直接 print）"""
+    out("\n" + "=" * 60)
+    out("🧪 測試 2: 專案流程 (GATEKEEPER → ORCHESTRATOR)")
+    out("=" * 60)
 
     # CEO 輸入
     ceo_input = """
@@ -121,51 +129,48 @@ async def test_project_flow():
     這個比較急，下週要用。
     """
 
-    print(f"\n📥 CEO 輸入:\n{ceo_input}")
+    out(f"\n📥 CEO 輸入:\n{ceo_input}")
 
     # 1. GATEKEEPER 分析
-    print("\n🚪 GATEKEEPER 分析中...")
-    gatekeeper = GatekeeperAgent()
-    analysis = await gatekeeper.analyze(ceo_input)
+    out("\n🚪 GATEKEEPER 分析中...")
+    analysis = await _gatekeeper.analyze(ceo_input)
 
-    print(f"\n📊 分析結果:")
-    print(f"   意圖: {analysis.intent.value} (信心度: {analysis.confidence:.0%})")
-    print(f"   路由: {analysis.route_to}")
+    out(f"\n📊 分析結果:")
+    out(f"   意圖: {analysis.intent.value} (信心度: {analysis.confidence:.0%})")
+    out(f"   路由: {analysis.route_to}")
 
     # 2. ORCHESTRATOR 處理
     if analysis.route_to == "ORCHESTRATOR":
-        print("\n\n🎯 ORCHESTRATOR 接手處理...")
-        orchestrator = OrchestratorAgent()
-
+        out("\n\n🎯 ORCHESTRATOR 接手處理...")
         entities = [
             {"type": e.entity_type, "value": e.value}
             for e in analysis.entities
         ]
 
-        result = await orchestrator.process_project_request(
+        result = await _orchestrator.process_project_request(
             content=ceo_input,
             entities=entities,
             priority="high",
         )
 
-        print(f"\n✅ Goal 已建立:")
+        out(f"\n✅ Goal 已建立:")
         goal = result['goal']
-        print(f"   ID: {goal['id']}")
-        print(f"   標題: {goal['title']}")
-        print(f"   優先級: {goal['priority']}")
-        print(f"   狀態: {goal['status']}")
+        out(f"   ID: {goal['id']}")
+        out(f"   標題: {goal['title']}")
+        out(f"   優先級: {goal['priority']}")
+        out(f"   狀態: {goal['status']}")
 
         decomp = result['decomposition']
-        print(f"\n📋 分解結果:")
-        print(f"   階段數: {decomp['phases_count']}")
-        print(f"   預估時間: {decomp['total_minutes']} 分鐘")
+        out(f"\n📋 分解結果:")
+        out(f"   階段數: {decomp['phases_count']}")
+        out(f"   預估時間: {decomp['total_minutes']} 分鐘")
 
-        print(f"\n📍 執行階段:")
+        out(f"\n📍 執行階段:")
         for phase in goal['phases']:
-            print(f"   {phase['sequence'] + 1}. {phase['name']} ({phase['time_estimate']['estimated_minutes']} min)")
-            print(f"      目標: {phase['objective']}")
+            out(f"   {phase['sequence'] + 1}. {phase['name']} ({phase['time_estimate']['estimated_minutes']} min)")
+            out(f"      目標: {phase['objective']}")
             if phase['assignee']:
-                print(f"      指派: {phase['assignee']}")
+                out(f"      指派: {phase['assignee']}")
 
         return goal['id']
 
@@ -178,11 +183,15 @@ async def test_full_flow():
     print("       Nexus AI Company - Agent 測試")
     print("🚀" * 20)
 
-    # 測試商機流程
-    opp_id = await test_opportunity_flow()
-
-    # 測試專案流程
-    goal_id = await test_project_flow()
+    # 商機流程與專案流程互不相依，同時執行；
+    # 各自寫入自己的 buffer，結束後依序印出，輸出不會交錯
+    opp_buf, goal_buf = io.StringIO(), io.StringIO()
+    opp_id, goal_id = await asyncio.gather(
+        test_opportunity_flow(out=partial(print, file=opp_buf)),
+        test_project_flow(out=partial(print, file=goal_buf)),
+    )
+    print(opp_buf.getvalue(), end="")
+    print(goal_buf.getvalue(), end="")
 
     print("\n" + "=" * 60)
     print("📊 測試完成摘要")
@@ -10,15 +10,41 @@ Usage:
     python3 agent_status_bridge.py --parse "SWE Agent 正在實作 StockPulse 後端模組"
     python3 agent_status_bridge.py --update BUILDER working "Implementing StockPulse"
     python3 agent_status_bridge.py --idle BUILDER
+    python3 agent_status_bridge.py serve /tmp/agent_bridge.sock
 """
 
 import argparse
+import asyncio
 import json
+import os
 import re
-import subprocess
 import sys
+import urllib.error
+import urllib.request
+from functools import lru_cache
+from operator import itemgetter
 from typing import Optional, Tuple
 
+# orjson 為選用加速（系統 python3 沒有也能執行）；兩者都輸出 UTF-8 bytes
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
+
+    _loads = json.loads
+
+# pyahocorasick 為選用：有裝時 agent 關鍵字改用 Aho–Corasick 自動機比對
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 API_URL = "http://localhost:8000"
 
 # Agent name mappings
@@ -50,29 +76,64 @@ STATUS_KEYWORDS = {
 }
 
 
+
+def _alternation(keywords) -> str:
+    """關鍵字 → regex alternation（長的優先，避免短字先吃掉同位置的長字）"""
+    return "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+
+
+def _agent_automaton():
+    """AGENT_MAPPINGS → Aho–Corasick 自動機，每個命中帶 (關鍵字長度, agent_id)"""
+    automaton = ahocorasick.Automaton()
+    for keyword, agent_id in AGENT_MAPPINGS.items():
+        automaton.add_word(keyword, (len(keyword), agent_id))
+    automaton.make_automaton()
+    return automaton
+
+
+# 啟動時建好一次：一次線性掃描取代逐字 `in` 檢查
+AGENT_AUTOMATON = _agent_automaton() if ahocorasick else None
+# 沒有 pyahocorasick 時的後備：lookahead 讓每個位置都回報從該處開始的最長關鍵字
+# （命中可重疊，與自動機相同）；IGNORECASE 讓原始描述可直接搜尋
+AGENT_RE = re.compile(f"(?=({_alternation(AGENT_MAPPINGS)}))", re.IGNORECASE)
+# 每個狀態一個具名群組，m.lastgroup 即為狀態名
+STATUS_RE = re.compile("|".join(
+    f"(?P<{stat}>{_alternation(keywords)})" for stat, keywords in STATUS_KEYWORDS.items()
+), re.IGNORECASE)
+
+
+def _find_agent(description: str) -> Optional[str]:
+    """最長的 agent 關鍵字對應的 agent_id（同長度取最先出現者）"""
+    if AGENT_AUTOMATON is not None:
+        hits = [value for _, value in AGENT_AUTOMATON.iter(description.lower())]
+    else:
+        hits = [
+            (len(m.group(1)), AGENT_MAPPINGS[m.group(1).lower()])
+            for m in AGENT_RE.finditer(description)
+        ]
+    return max(hits, key=itemgetter(0))[1] if hits else None
+
+
+@lru_cache(maxsize=512)
+def _parse_cached(description: str) -> Tuple[Optional[str], str]:
+    """(agent_id, status)；同一段描述重複解析時直接取快取（關鍵字表為常數）"""
+    # Find agent (longest keyword in the text)
+    agent_id = _find_agent(description)
+
+    # Find status (first keyword appearing in the text; default working)
+    m = STATUS_RE.search(description)
+    status = m.lastgroup if m else "working"
+
+    return agent_id, status
+
+
 def parse_task_description(description: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
     """
     Parse a task description to extract agent, status, and task.
 
     Returns: (agent_id, status, task_description)
     """
-    description_lower = description.lower()
-
-    # Find agent
-    agent_id = None
-    for keyword, agent in AGENT_MAPPINGS.items():
-        if keyword in description_lower:
-            agent_id = agent
-            break
-
-    # Find status
-    status = "working"  # default
-    for stat, keywords in STATUS_KEYWORDS.items():
-        for kw in keywords:
-            if kw in description_lower:
-                status = stat
-                break
-
+    agent_id, status = _parse_cached(description)
     return agent_id, status, description
 
 
@@ -82,22 +143,91 @@ def update_agent_status(agent_id: str, status: str, task: Optional[str] = None)
     if task:
         payload["current_task"] = task
 
-    cmd = [
-        "curl", "-s", "-X", "PUT",
+    # 直接以 urllib 送出（不 fork/exec curl；只用標準庫，Shortcuts 的系統 python3 即可執行）
+    request = urllib.request.Request(
         f"{API_URL}/api/v1/agents/{agent_id}/status",
-        "-H", "Content-Type: application/json",
-        "-d", json.dumps(payload)
-    ]
+        data=_dumps(payload),
+        headers={"Content-Type": "application/json"},
+        method="PUT",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            body = response.read()
+    except urllib.error.HTTPError as e:
+        # 與 curl -s 相同：非 2xx 仍回傳 API 的回應內容
+        body = e.read()
+    except OSError as e:
+        return {"error": str(getattr(e, "reason", e))}
+
+    # 直接解析 bytes；只有解析失敗時才需要解碼成字串
+    try:
+        return _loads(body)
+    except ValueError:
+        return {"error": body.decode(errors="replace")}
+
+
+def handle_command(command: dict) -> dict:
+    """執行一個指令（CLI 與 serve 模式共用），回傳要輸出的 JSON 物件"""
+    cmd = command.get("cmd")
+
+    if cmd == "parse":
+        agent_id, status, task = parse_task_description(command["description"])
+        return {"agent_id": agent_id, "status": status, "task": task}
+
+    if cmd == "update":
+        return update_agent_status(command["agent_id"], command["status"], command.get("task"))
+
+    if cmd == "idle":
+        return update_agent_status(command["agent_id"], "idle", None)
+
+    if cmd == "auto":
+        agent_id, status, task = parse_task_description(command["description"])
+        if agent_id:
+            return update_agent_status(agent_id, status, task)
+        return {"error": "Could not identify agent from description"}
 
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    return {"error": f"Unknown command: {cmd}"}
 
-    if result.returncode == 0:
+
+async def serve(socket_path: str) -> None:
+    """
+    常駐模式：在 Unix domain socket 上接收指令
+
+    每行一個 JSON 指令（同 handle_command，例如
+    {"cmd": "auto", "description": "..."}），每行回一個 JSON 結果。
+    Shortcuts 以 `nc -U` 連線即可，省去每次啟動 Python 的成本。
+    """
+    async def handle_client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         try:
-            return json.loads(result.stdout)
-        except json.JSONDecodeError:
-            return {"error": result.stdout}
-    else:
-        return {"error": result.stderr}
+            async for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    command = _loads(line)
+                    # HTTP 呼叫為同步 I/O，放到 thread 以免擋住其他連線
+                    result = await asyncio.to_thread(handle_command, command)
+                except ValueError:  # json / orjson 的 JSONDecodeError 皆為其子類
+                    result = {"error": "Invalid JSON"}
+                except KeyError as e:
+                    result = {"error": f"Missing field: {e.args[0]}"}
+                except (TypeError, AttributeError):
+                    result = {"error": "Command must be a JSON object"}
+                writer.write(_dumps(result) + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    # 前一次執行留下的 socket 檔
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    server = await asyncio.start_unix_server(handle_client, path=socket_path)
+    print(f"Listening on {socket_path}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
 
 
 def main():
@@ -123,34 +253,28 @@ def main():
     auto_parser = subparsers.add_parser("auto", help="Auto-parse and update")
     auto_parser.add_argument("description", help="Task description")
 
-    args = parser.parse_args()
+    # Serve command (long-running, Unix domain socket)
+    serve_parser = subparsers.add_parser("serve", help="Serve commands on a Unix socket")
+    serve_parser.add_argument(
+        "socket_path", nargs="?", default="/tmp/agent_bridge.sock", help="Socket path"
+    )
 
-    if args.command == "parse":
-        agent_id, status, task = parse_task_description(args.description)
-        print(json.dumps({
-            "agent_id": agent_id,
-            "status": status,
-            "task": task
-        }, indent=2, ensure_ascii=False))
-
-    elif args.command == "update":
-        result = update_agent_status(args.agent_id, args.status, args.task)
-        print(json.dumps(result, indent=2, ensure_ascii=False))
-
-    elif args.command == "idle":
-        result = update_agent_status(args.agent_id, "idle", None)
-        print(json.dumps(result, indent=2, ensure_ascii=False))
-
-    elif args.command == "auto":
-        agent_id, status, task = parse_task_description(args.description)
-        if agent_id:
-            result = update_agent_status(agent_id, status, task)
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(json.dumps({"error": "Could not identify agent from description"}, indent=2))
+    args = parser.parse_args()
 
-    else:
+    if args.command is None:
         parser.print_help()
+    elif args.command == "serve":
+        try:
+            asyncio.run(serve(args.socket_path))
+        except KeyboardInterrupt:
+            pass
+    else:
+        command = vars(args)
+        command["cmd"] = command.pop("command")
+        result = handle_command(command)
+        # 縮排只給人看；輸出被 Shortcuts 等程式讀取時用精簡格式（C 編碼器）
+        indent = 2 if sys.stdout.isatty() else None
+        print(json.dumps(result, indent=indent, ensure_ascii=False))
 
 
 if __name__ == "__main__":